@@ -1,36 +1,40 @@
-from django.db import connection
-from django.core.cache import cache
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
-from rest_framework.response import Response
-import redis
-from django.conf import settings
+"""
+Saúde e prontidão do worker
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
+As duas views só leem a foto publicada pela sondagem em segundo plano
+(ver sondagem.py); não consultam banco nem Redis.
+"""
+from django.http import HttpResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+from .sondagem import sonda
+
+CONTENT_TYPE = 'application/json'
+INICIANDO = b'{"status": "iniciando", "pronto": false, "motivos": ["primeira sondagem em andamento"]}'
+ATRASADA = b'{"pronto": false, "motivos": ["sondagem sem atualizar"]}'
+
+
+@require_GET
+@never_cache
 def health_check_detailed(request):
-    """Health check detalhado com verificações de dependências"""
-    health_status = {
-        'status': 'healthy',
-        'checks': {}
-    }
-    
-    # Verificar database
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-        health_status['checks']['database'] = 'healthy'
-    except Exception as e:
-        health_status['checks']['database'] = f'unhealthy: {str(e)}'
-        health_status['status'] = 'unhealthy'
-    
-    # Verificar Redis
-    try:
-        cache.set('health_check', 'ok', 30)
-        cache.get('health_check')
-        health_status['checks']['redis'] = 'healthy'
-    except Exception as e:
-        health_status['checks']['redis'] = f'unhealthy: {str(e)}'
-        health_status['status'] = 'unhealthy'
-    
-    return Response(health_status)
+    """Latências, conexões, replicação e saturação medidas na última sondagem"""
+    sonda.garantir()
+    foto = sonda.foto
+    if foto is None:
+        return HttpResponse(INICIANDO, content_type=CONTENT_TYPE)
+    return HttpResponse(foto[2], content_type=CONTENT_TYPE)
+
+
+@require_GET
+@never_cache
+def readiness_check(request):
+    """200 se o worker está dentro dos orçamentos de latência; 503 se não"""
+    sonda.garantir()
+    foto = sonda.foto
+    if foto is None:
+        return HttpResponse(INICIANDO, status=503, content_type=CONTENT_TYPE)
+    momento, pronto, _, corpo = foto
+    if sonda.atrasada(momento):
+        return HttpResponse(ATRASADA, status=503, content_type=CONTENT_TYPE)
+    return HttpResponse(corpo, status=200 if pronto else 503, content_type=CONTENT_TYPE)
@@ -0,0 +1,44 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from authentication.backends import JWTAuthentication
+from utils.metricas import exportar
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _administrador(request):
+    """Usuário staff pela sessão (admin) ou por um access token JWT"""
+    if request.user.is_authenticated:
+        return request.user.is_staff
+    try:
+        autenticado = JWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return False
+    return autenticado is not None and autenticado[0].is_staff
+
+
+@require_GET
+@never_cache
+def metricas(request):
+    """
+    Métricas agregadas de todos os workers, no formato do Prometheus
+
+    Com METRICAS_TOKEN, exige "Authorization: Bearer <token>"; sem ele, só
+    administradores, porque a saída lista todas as rotas e o tráfego de cada uma.
+    """
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse('Token de métricas inválido\n', status=401, content_type=CONTENT_TYPE)
+    elif not _administrador(request):
+        return HttpResponse(
+            'Métricas restritas a administradores; configure METRICAS_TOKEN para o Prometheus\n',
+            status=403, content_type=CONTENT_TYPE
+        )
+    return HttpResponse(exportar(), content_type=CONTENT_TYPE)
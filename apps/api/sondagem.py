@@ -0,0 +1,234 @@
+"""
+Sondagem de saúde em segundo plano
+
+Cada worker do gunicorn roda uma thread que, a cada SAUDE_INTERVALO_SEGUNDOS,
+mede os bancos (SELECT 1, conexões abertas e atraso de replicação no
+PostgreSQL), o Redis (PING, clientes conectados, replicação e o pool do
+redis-py) e a saturação do próprio worker. O resultado fica pronto em
+memória, já serializado: /health/detalhado/ e /ready/ só devolvem a última
+foto, sem tocar em banco ou Redis.
+
+As latências entram em janelas de SAUDE_JANELA amostras, das quais saem
+p50, p95 e p99. O worker fica "não pronto" quando alguma verificação falha,
+quando o p95 passa do orçamento (SAUDE_ORCAMENTO_BANCO_MS,
+SAUDE_ORCAMENTO_REDIS_MS), quando a replicação atrasa mais que
+SAUDE_ORCAMENTO_REPLICACAO_SEGUNDOS ou quando a própria sondagem para de
+atualizar (mais de três intervalos).
+
+A thread nasce na primeira consulta aos endpoints de saúde dentro do
+worker; depois de um fork (gunicorn --preload), o processo filho começa a
+sua.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from utils import metricas
+
+logger = logging.getLogger(__name__)
+
+SQL_POSTGRES = """
+    SELECT
+        (SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()),
+        current_setting('max_connections')::int,
+        CASE WHEN pg_is_in_recovery()
+            THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+            ELSE (SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) FROM pg_stat_replication)
+        END
+"""
+
+
+def _config(nome, padrao):
+    return getattr(settings, nome, padrao)
+
+
+def _percentis(amostras):
+    if not amostras:
+        return None
+    ordenadas = sorted(amostras)
+    ultima = len(ordenadas) - 1
+    return {
+        f'p{p}': round(ordenadas[round(ultima * p / 100)] * 1000, 2)
+        for p in (50, 95, 99)
+    }
+
+
+class Sonda:
+    """Thread de sondagem do processo e a última foto publicada"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._series = {}
+        self._ultimo_processo = None
+        # (momento da sondagem, pronto, corpo JSON de /health/detalhado/, corpo de /ready/)
+        self.foto = None
+
+    def garantir(self):
+        """Inicia a thread neste processo, se ainda não houver uma"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._series = {}
+            self._ultimo_processo = None
+            self.foto = None
+            self._pid = os.getpid()
+            threading.Thread(target=self._laco, name='sondagem-saude', daemon=True).start()
+
+    def _laco(self):
+        while True:
+            try:
+                self.sondar()
+            except Exception:
+                logger.exception('Falha na sondagem de saúde')
+            time.sleep(_config('SAUDE_INTERVALO_SEGUNDOS', 5))
+
+    def _serie(self, nome):
+        if nome not in self._series:
+            self._series[nome] = deque(maxlen=_config('SAUDE_JANELA', 120))
+        return self._series[nome]
+
+    def sondar(self):
+        """Mede tudo e publica a foto (troca de referência, sem lock na leitura)"""
+        agora = time.time()
+        bancos = {alias: self._sondar_banco(alias) for alias in settings.DATABASES}
+        redis = self._sondar_redis()
+        worker = self._sondar_worker()
+        motivos = self._motivos(bancos, redis)
+        estado = {
+            'status': 'healthy' if all(b['ok'] for b in bancos.values()) and redis['ok'] else 'unhealthy',
+            'pronto': not motivos,
+            'motivos': motivos,
+            'verificado_em': agora,
+            'intervalo_segundos': _config('SAUDE_INTERVALO_SEGUNDOS', 5),
+            'bancos': bancos,
+            'redis': redis,
+            'worker': worker,
+        }
+        pronto = {'pronto': not motivos, 'motivos': motivos, 'verificado_em': agora}
+        self.foto = (agora, not motivos, json.dumps(estado).encode(), json.dumps(pronto).encode())
+
+    def _sondar_banco(self, alias):
+        conexao = connections[alias]
+        serie = self._serie(f'banco:{alias}')
+        resultado = {'ok': True}
+        try:
+            # A conexão é da thread e fica aberta entre as sondagens (respeitando
+            # CONN_MAX_AGE); conectar não entra na latência
+            conexao.close_if_unusable_or_obsolete()
+            conexao.ensure_connection()
+            with conexao.cursor() as cursor:
+                inicio = time.perf_counter()
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+                serie.append(time.perf_counter() - inicio)
+                if conexao.vendor == 'postgresql':
+                    cursor.execute(SQL_POSTGRES)
+                    abertas, maximo, atraso = cursor.fetchone()
+                    resultado.update(
+                        conexoes=abertas,
+                        max_conexoes=maximo,
+                        uso_conexoes=round(abertas / maximo, 3) if maximo else None,
+                        atraso_replicacao_segundos=round(float(atraso), 3),
+                    )
+        except Exception as e:
+            resultado.update(ok=False, erro=str(e))
+            conexao.close()
+        resultado['latencia_ms'] = _percentis(serie)
+        return resultado
+
+    def _sondar_redis(self):
+        serie = self._serie('redis')
+        resultado = {'ok': True}
+        try:
+            if 'django_redis' in settings.CACHES['default']['BACKEND']:
+                from django_redis import get_redis_connection
+                cliente = get_redis_connection('default')
+                inicio = time.perf_counter()
+                cliente.ping()
+                serie.append(time.perf_counter() - inicio)
+                clientes = cliente.info('clients')
+                replicacao = cliente.info('replication')
+                pool = cliente.connection_pool
+                resultado.update(
+                    clientes_conectados=clientes.get('connected_clients'),
+                    clientes_bloqueados=clientes.get('blocked_clients'),
+                    papel=replicacao.get('role'),
+                    replicas=replicacao.get('connected_slaves', 0),
+                    link_master=replicacao.get('master_link_status'),
+                    pool={
+                        'criadas': getattr(pool, '_created_connections', None),
+                        'livres': len(getattr(pool, '_available_connections', ())),
+                        'em_uso': len(getattr(pool, '_in_use_connections', ())),
+                        'maximo': getattr(pool, 'max_connections', None),
+                    },
+                )
+                if replicacao.get('role') == 'slave' and replicacao.get('master_link_status') != 'up':
+                    resultado.update(ok=False, erro='replicação do Redis desconectada')
+            else:
+                inicio = time.perf_counter()
+                cache.get('saude:sondagem')
+                serie.append(time.perf_counter() - inicio)
+                resultado['backend'] = settings.CACHES['default']['BACKEND']
+        except Exception as e:
+            resultado.update(ok=False, erro=str(e))
+        resultado['latencia_ms'] = _percentis(serie)
+        return resultado
+
+    def _sondar_worker(self):
+        """Ocupação do worker desde a sondagem anterior (1 = sempre atendendo)"""
+        atual = metricas.processo()
+        agora = time.monotonic()
+        capacidade = _config('SAUDE_CAPACIDADE_WORKER', 1)
+        resultado = {
+            'pid': os.getpid(),
+            'em_andamento': atual['em_andamento'],
+            'atendidas': atual['atendidas'],
+            'capacidade': capacidade,
+            'utilizacao': None,
+        }
+        if self._ultimo_processo is not None:
+            antes, momento = self._ultimo_processo
+            decorrido = agora - momento
+            if decorrido > 0:
+                resultado['utilizacao'] = round(
+                    (atual['ocupado'] - antes['ocupado']) / (decorrido * capacidade), 3
+                )
+        self._ultimo_processo = (atual, agora)
+        return resultado
+
+    @staticmethod
+    def _motivos(bancos, redis):
+        motivos = []
+        orcamento_banco = _config('SAUDE_ORCAMENTO_BANCO_MS', 250)
+        orcamento_replicacao = _config('SAUDE_ORCAMENTO_REPLICACAO_SEGUNDOS', 30)
+        for alias, banco in bancos.items():
+            if not banco['ok']:
+                motivos.append(f'banco {alias}: {banco["erro"]}')
+                continue
+            if banco['latencia_ms'] and banco['latencia_ms']['p95'] > orcamento_banco:
+                motivos.append(f'banco {alias}: p95 {banco["latencia_ms"]["p95"]} ms > {orcamento_banco} ms')
+            atraso = banco.get('atraso_replicacao_segundos')
+            if atraso is not None and atraso > orcamento_replicacao:
+                motivos.append(f'banco {alias}: replicação atrasada {atraso} s > {orcamento_replicacao} s')
+        orcamento_redis = _config('SAUDE_ORCAMENTO_REDIS_MS', 50)
+        if not redis['ok']:
+            motivos.append(f'redis: {redis["erro"]}')
+        elif redis['latencia_ms'] and redis['latencia_ms']['p95'] > orcamento_redis:
+            motivos.append(f'redis: p95 {redis["latencia_ms"]["p95"]} ms > {orcamento_redis} ms')
+        return motivos
+
+    def atrasada(self, momento):
+        return time.time() - momento > 3 * _config('SAUDE_INTERVALO_SEGUNDOS', 5)
+
+
+sonda = Sonda()
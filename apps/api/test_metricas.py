@@ -0,0 +1,131 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.cadastro.models import Responsavel
+from utils import metricas
+
+URL = '/api/v1/metrics/'
+URL_RESPONSAVEIS = '/api/v1/cadastro/responsaveis/'
+ROTA = 'rota="cadastro:responsavel-list"'
+
+
+def series(texto):
+    """{série com rótulos: valor} do texto exportado"""
+    return {
+        linha.rsplit(' ', 1)[0]: float(linha.rsplit(' ', 1)[1])
+        for linha in texto.splitlines() if linha and not linha.startswith('#')
+    }
+
+
+class ArmazenamentoEmMemoriaMixin:
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        patcher = mock.patch.object(metricas, '_armazenamento', metricas._Memoria())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class ExportacaoTests(ArmazenamentoEmMemoriaMixin, SimpleTestCase):
+
+    def test_baldes_acumulados_e_rotulos_escapados(self):
+        coletor = metricas.Coletor()
+        serie = metricas.rotulos(rota='a"b', metodo='GET')
+        for duracao in (0.001, 0.02, 30):
+            coletor.observar('http_duracao_segundos', serie, duracao)
+        metricas.gravar(coletor.valores)
+        texto = metricas.exportar()
+        valores = series(texto)
+
+        self.assertIn('# TYPE http_duracao_segundos histogram', texto)
+        self.assertEqual(valores['http_duracao_segundos_bucket{rota="a\\"b",metodo="GET",le="0.005"}'], 1)
+        self.assertEqual(valores['http_duracao_segundos_bucket{rota="a\\"b",metodo="GET",le="0.025"}'], 2)
+        self.assertEqual(valores['http_duracao_segundos_bucket{rota="a\\"b",metodo="GET",le="10"}'], 2)
+        self.assertEqual(valores['http_duracao_segundos_bucket{rota="a\\"b",metodo="GET",le="+Inf"}'], 3)
+        self.assertEqual(valores['http_duracao_segundos_count{rota="a\\"b",metodo="GET"}'], 3)
+
+    def test_cache_fora_de_requisicao_nao_conta(self):
+        metricas.registrar_cache('versao', acertos=1)
+        self.assertEqual(metricas.exportar(), '\n')
+
+
+class MetricasPorRequisicaoTests(ArmazenamentoEmMemoriaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        Responsavel.objects.create(cpf='52998224725', nome='Ana', cep='93000000', numero=1)
+
+    def test_rota_pelo_nome_e_nao_pelo_caminho(self):
+        self.client.get(URL_RESPONSAVEIS)
+        self.client.get(f'{URL_RESPONSAVEIS}52998224725/')
+        self.client.get('/nao/existe/')
+        valores = series(metricas.exportar())
+
+        self.assertEqual(valores[f'http_requisicoes_total{{{ROTA},metodo="GET",status="200"}}'], 1)
+        self.assertEqual(valores['http_requisicoes_total{rota="cadastro:responsavel-detail",metodo="GET",status="200"}'], 1)
+        self.assertEqual(valores['http_requisicoes_total{rota="nao_resolvida",metodo="GET",status="404"}'], 1)
+        self.assertFalse([serie for serie in valores if '52998224725' in serie])
+
+    def test_banco_cache_tamanho_e_ocupacao(self):
+        resposta = self.client.get(URL_RESPONSAVEIS)
+        valores = series(metricas.exportar())
+
+        self.assertGreater(valores[f'db_consultas_total{{{ROTA}}}'], 0)
+        self.assertGreater(valores[f'db_duracao_segundos_total{{{ROTA}}}'], 0)
+        self.assertEqual(valores[f'http_resposta_bytes_sum{{{ROTA}}}'], len(resposta.content))
+        self.assertEqual(valores['cache_leituras_total{uso="versao",resultado="falta"}'], 1)
+        self.assertGreater(valores['http_ocupado_segundos_total'], 0)
+        self.assertEqual(metricas.processo()['em_andamento'], 0)
+
+    def test_uma_gravacao_por_requisicao(self):
+        with mock.patch.object(metricas._armazenamento, 'somar', wraps=metricas._armazenamento.somar) as somar:
+            self.client.get(URL_RESPONSAVEIS)
+        somar.assert_called_once()
+
+    @override_settings(METRICAS_ATIVAS=False, SERVER_TIMING_AMOSTRAGEM=0)
+    def test_desligadas(self):
+        self.client.get(URL_RESPONSAVEIS)
+        self.assertEqual(metricas.exportar(), '\n')
+
+
+class EndpointMetricasTests(ArmazenamentoEmMemoriaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user('admin', password='x', is_staff=True)
+        self.comum = User.objects.create_user('comum', password='x')
+
+    @override_settings(METRICAS_TOKEN='')
+    def test_sem_token_so_administradores(self):
+        self.assertEqual(self.client.get(URL).status_code, 403)
+        self.client.force_login(self.comum)
+        self.assertEqual(self.client.get(URL).status_code, 403)
+        self.client.force_login(self.staff)
+        resposta = self.client.get(URL)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    @override_settings(METRICAS_TOKEN='')
+    def test_access_token_de_administrador(self):
+        for usuario, status in ((self.comum, 403), (self.staff, 200)):
+            with self.subTest(usuario=usuario.username):
+                token = AccessToken.for_user(usuario)
+                self.assertEqual(self.client.get(URL, HTTP_AUTHORIZATION=f'Bearer {token}').status_code, status)
+        self.assertEqual(self.client.get(URL, HTTP_AUTHORIZATION='Bearer invalido').status_code, 403)
+
+    @override_settings(METRICAS_TOKEN='segredo')
+    def test_com_token(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(URL).status_code, 401)
+        self.assertEqual(self.client.get(URL, HTTP_AUTHORIZATION='Bearer outro').status_code, 401)
+        resposta = self.client.get(URL, HTTP_AUTHORIZATION='Bearer segredo')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('http_requisicoes_total', resposta.content.decode())
@@ -0,0 +1,75 @@
+import re
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.cadastro.models import Responsavel
+from utils import metricas
+
+URL = '/api/v1/cadastro/responsaveis/'
+URL_USUARIO = '/api/v1/auth/user/'
+
+
+def fases(cabecalho):
+    """{fase: milissegundos} do Server-Timing"""
+    return {nome: float(dur) for nome, dur in re.findall(r'(\w+);dur=([\d.]+)', cabecalho)}
+
+
+@override_settings(METRICAS_ATIVAS=False)
+class ServerTimingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        usuario = User.objects.create_user('teste', password='x')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(usuario)}')
+        Responsavel.objects.create(cpf='52998224725', nome='Ana', cep='93000000', numero=1)
+
+    @override_settings(SERVER_TIMING_AMOSTRAGEM=1)
+    def test_fases_e_consultas(self):
+        # A listagem lê os tokens de versão no cache; o perfil usa o usuário já em memória
+        for url, esperadas in ((URL, ['auth', 'db', 'cache', 'app', 'render', 'total']),
+                               (URL_USUARIO, ['auth', 'db', 'app', 'render', 'total'])):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as consultas:
+                    resposta = self.client.get(url)
+                self.assertEqual(resposta.status_code, 200)
+                duracoes = fases(resposta['Server-Timing'])
+                self.assertEqual(list(duracoes), esperadas)
+                self.assertLessEqual(duracoes['render'], duracoes['total'])
+                self.assertIn(f'desc="{len(consultas)} consultas"', resposta['Server-Timing'])
+                self.assertEqual(resposta['X-DB-Queries'], str(len(consultas)))
+
+    @override_settings(SERVER_TIMING_AMOSTRAGEM=1, SERVER_TIMING_CONSULTAS=False)
+    def test_sem_x_db_queries(self):
+        resposta = self.client.get(URL)
+        self.assertIn('Server-Timing', resposta)
+        self.assertNotIn('X-DB-Queries', resposta)
+
+    @override_settings(SERVER_TIMING_AMOSTRAGEM=0)
+    def test_fora_da_amostra(self):
+        resposta = self.client.get(URL)
+        self.assertNotIn('Server-Timing', resposta)
+        self.assertNotIn('X-DB-Queries', resposta)
+
+    @override_settings(SERVER_TIMING_AMOSTRAGEM=0.25)
+    def test_amostragem(self):
+        with mock.patch.object(metricas.random, 'random', side_effect=[0.1, 0.5]):
+            self.assertIn('Server-Timing', self.client.get(URL))
+            self.assertNotIn('Server-Timing', self.client.get(URL))
+
+    @override_settings(SERVER_TIMING_AMOSTRAGEM=0)
+    def test_fases_nao_medem_fora_da_amostra(self):
+        coletor, token = metricas.iniciar(detalhar=False)
+        try:
+            with metricas.fase('cache'):
+                pass
+        finally:
+            metricas.encerrar(coletor, token)
+        self.assertEqual(coletor.fases, {})
@@ -0,0 +1,115 @@
+import json
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from .sondagem import Sonda, _percentis, sonda
+
+URL_DETALHADO = '/api/v1/health/detalhado/'
+URL_PRONTO = '/api/v1/ready/'
+
+
+class PercentisMotivosTests(SimpleTestCase):
+
+    def test_percentis_em_ms(self):
+        self.assertIsNone(_percentis([]))
+        self.assertEqual(_percentis([i / 1000 for i in range(100, 0, -1)]), {'p50': 51.0, 'p95': 95.0, 'p99': 99.0})
+        self.assertEqual(_percentis([0.002]), {'p50': 2.0, 'p95': 2.0, 'p99': 2.0})
+
+    @override_settings(SAUDE_ORCAMENTO_BANCO_MS=100, SAUDE_ORCAMENTO_REDIS_MS=10,
+                       SAUDE_ORCAMENTO_REPLICACAO_SEGUNDOS=30)
+    def test_motivos(self):
+        rapido = {'p50': 1.0, 'p95': 2.0, 'p99': 3.0}
+        lento = {'p50': 1.0, 'p95': 150.0, 'p99': 300.0}
+        redis = {'ok': True, 'latencia_ms': rapido}
+        self.assertEqual(Sonda._motivos({'default': {'ok': True, 'latencia_ms': None}}, redis), [])
+        self.assertEqual(Sonda._motivos({
+            'default': {'ok': True, 'latencia_ms': lento},
+            'replica': {'ok': True, 'latencia_ms': rapido, 'atraso_replicacao_segundos': 45.0},
+            'outro': {'ok': False, 'erro': 'recusada', 'latencia_ms': None},
+        }, {'ok': True, 'latencia_ms': lento}), [
+            'banco default: p95 150.0 ms > 100 ms',
+            'banco replica: replicação atrasada 45.0 s > 30 s',
+            'banco outro: recusada',
+            'redis: p95 150.0 ms > 10 ms',
+        ])
+        self.assertEqual(Sonda._motivos({}, {'ok': False, 'erro': 'sem conexão', 'latencia_ms': None}),
+                         ['redis: sem conexão'])
+
+
+class SondarTests(SimpleTestCase):
+    databases = {'default'}
+
+    def test_foto(self):
+        nova = Sonda()
+        nova.sondar()
+        momento, pronto, detalhado, corpo = nova.foto
+        estado = json.loads(detalhado)
+        self.assertTrue(pronto)
+        self.assertEqual(json.loads(corpo), {'pronto': True, 'motivos': [], 'verificado_em': momento})
+        self.assertEqual(estado['status'], 'healthy')
+        self.assertTrue(estado['bancos']['default']['ok'])
+        self.assertEqual(set(estado['bancos']['default']['latencia_ms']), {'p50', 'p95', 'p99'})
+        self.assertTrue(estado['redis']['ok'])
+        self.assertIsNone(estado['worker']['utilizacao'])
+
+        nova.sondar()
+        self.assertIsNotNone(json.loads(nova.foto[2])['worker']['utilizacao'])
+
+    @override_settings(SAUDE_ORCAMENTO_BANCO_MS=0)
+    def test_acima_do_orcamento(self):
+        nova = Sonda()
+        nova.sondar()
+        self.assertFalse(nova.foto[1])
+        self.assertIn('banco default: p95', json.loads(nova.foto[3])['motivos'][0])
+
+    @override_settings(SAUDE_JANELA=3)
+    def test_janela(self):
+        nova = Sonda()
+        for _ in range(5):
+            nova.sondar()
+        self.assertEqual(len(nova._series['banco:default']), 3)
+
+
+class EndpointsSaudeTests(SimpleTestCase):
+
+    def setUp(self):
+        # Sem a thread de sondagem: cada teste publica a foto
+        for atributo, valor in (('garantir', mock.DEFAULT), ('foto', None)):
+            patcher = mock.patch.object(sonda, atributo, valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _foto(self, pronto, momento=None):
+        momento = momento or time.time()
+        corpo = {'pronto': pronto, 'motivos': [] if pronto else ['redis: sem conexão'], 'verificado_em': momento}
+        sonda.foto = (momento, pronto, b'{"status": "healthy"}', json.dumps(corpo).encode())
+
+    def test_primeira_sondagem(self):
+        self.assertEqual(self.client.get(URL_PRONTO).status_code, 503)
+        resposta = self.client.get(URL_DETALHADO)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['status'], 'iniciando')
+
+    def test_pronto_e_nao_pronto(self):
+        self._foto(True)
+        resposta = self.client.get(URL_PRONTO)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('no-cache', resposta['Cache-Control'])
+        self.assertEqual(self.client.get(URL_DETALHADO).json(), {'status': 'healthy'})
+        self._foto(False)
+        resposta = self.client.get(URL_PRONTO)
+        self.assertEqual(resposta.status_code, 503)
+        self.assertEqual(resposta.json()['motivos'], ['redis: sem conexão'])
+
+    @override_settings(SAUDE_INTERVALO_SEGUNDOS=5)
+    def test_sondagem_parada(self):
+        self._foto(True, momento=time.time() - 16)
+        resposta = self.client.get(URL_PRONTO)
+        self.assertEqual(resposta.status_code, 503)
+        self.assertEqual(resposta.json()['motivos'], ['sondagem sem atualizar'])
+
+    def test_so_metodo_get(self):
+        self._foto(True)
+        self.assertEqual(self.client.post(URL_PRONTO).status_code, 405)
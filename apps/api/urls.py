@@ -3,12 +3,17 @@ URLs da API
 """
 from django.urls import path
 from .views import health_check, api_info, RegisterView, ProfileView
+from .health import health_check_detailed, readiness_check
+from .metricas import metricas
 
 app_name = 'api'
 
 urlpatterns = [
     path('', api_info, name='info'),
     path('health/', health_check, name='health'),
+    path('health/detalhado/', health_check_detailed, name='health-detailed'),
+    path('ready/', readiness_check, name='ready'),
+    path('metrics/', metricas, name='metrics'),
     path('auth/register/', RegisterView.as_view(), name='register'),
     path('auth/profile/', ProfileView.as_view(), name='profile'),
 ]
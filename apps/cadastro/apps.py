@@ -4,3 +4,6 @@ class CadastroConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.cadastro'
     verbose_name = 'Cadastro'
+
+    def ready(self):
+        from . import signals  # noqa: F401
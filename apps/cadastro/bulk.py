@@ -0,0 +1,236 @@
+"""
+Gravação em lote de famílias (responsável + membros + demandas)
+
+Cada família é validada pelos serializers do cadastro, sem as consultas
+por linha (unicidade do CPF e chaves estrangeiras), e os registros válidos
+são gravados com INSERT ... ON CONFLICT (cpf) DO UPDATE, um comando por
+tabela a cada bloco. Reenviar o mesmo lote apenas atualiza os registros,
+então repetir a requisição após uma falha de conexão é seguro.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import (
+    DemandaAmbiente, DemandaEducacao, DemandaHabitacao, DemandaInterna,
+    DemandaSaude, Membro, Responsavel
+)
+from .serializers import (
+    DemandaAmbienteSerializer, DemandaEducacaoSerializer, DemandaHabitacaoSerializer,
+    DemandaInternaSerializer, DemandaSaudeSerializer, MembroSerializer,
+    ResponsavelSerializer
+)
+from .signals import lote_gravado, lote_gravando
+
+
+def _serializer_lote(base, substituir=None):
+    """
+    Variante do serializer para lotes: sem validadores de unicidade no CPF
+    (a gravação é um upsert) e com as FKs trocadas por CharField, evitando
+    uma consulta por linha.
+    """
+    meta = type('Meta', (base.Meta,), {
+        'extra_kwargs': {'cpf': {'validators': []}},
+    })
+    atributos = {'Meta': meta}
+    for nome in substituir or ():
+        atributos[nome] = serializers.CharField(max_length=11)
+    return type(f'{base.__name__}Lote', (base,), atributos)
+
+
+ResponsavelLoteSerializer = _serializer_lote(ResponsavelSerializer)
+MembroLoteSerializer = _serializer_lote(MembroSerializer, substituir=['cpf_responsavel'])
+
+# tipo da demanda no payload -> (model, serializer, preenchido com o CPF do responsável)
+DEMANDAS = {
+    'ambiente': (DemandaAmbiente, _serializer_lote(DemandaAmbienteSerializer, substituir=['cpf']), 'cpf'),
+    'educacao': (DemandaEducacao, _serializer_lote(DemandaEducacaoSerializer), 'cpf_responsavel'),
+    'habitacao': (DemandaHabitacao, _serializer_lote(DemandaHabitacaoSerializer), 'cpf'),
+    'interna': (DemandaInterna, _serializer_lote(DemandaInternaSerializer), 'cpf'),
+    'saude': (DemandaSaude, _serializer_lote(DemandaSaudeSerializer), 'cpf'),
+}
+
+TAMANHO_BLOCO = 500
+
+
+class LoteMuitoGrande(Exception):
+    pass
+
+
+def _instancia(model, dados):
+    """Monta a instância usando o attname das FKs (cpf_id, cpf_responsavel_id)"""
+    campos = {model._meta.get_field(nome).attname: valor for nome, valor in dados.items()}
+    return model(**campos)
+
+
+def _upsert(model, objetos):
+    """INSERT ... ON CONFLICT (pk) DO UPDATE; retorna o conjunto de PKs que já existiam"""
+    if not objetos:
+        return set()
+    pk = model._meta.pk
+    chaves = [getattr(obj, pk.attname) for obj in objetos]
+    existentes = set(
+        model._base_manager.filter(pk__in=chaves).values_list(pk.attname, flat=True)
+    )
+    atualizar = [
+        campo.name for campo in model._meta.concrete_fields if not campo.primary_key
+    ]
+    lote_gravando.send(sender=model, chaves=chaves, using=model._base_manager.db)
+    model._base_manager.bulk_create(
+        objetos,
+        batch_size=TAMANHO_BLOCO,
+        update_conflicts=bool(atualizar),
+        ignore_conflicts=not atualizar,
+        unique_fields=[pk.name] if atualizar else None,
+        update_fields=atualizar or None,
+    )
+    transaction.on_commit(
+        lambda: lote_gravado.send(sender=model, chaves=chaves),
+        using=model._base_manager.db
+    )
+    return existentes
+
+
+class _Pendentes:
+    """Objetos válidos de um bloco, agrupados por model e sem CPFs repetidos"""
+
+    def __init__(self):
+        self.por_model = {}
+
+    def adicionar(self, model, obj):
+        chave = getattr(obj, model._meta.pk.attname)
+        # Num mesmo INSERT ... ON CONFLICT a linha não pode aparecer duas vezes
+        self.por_model.setdefault(model, {})[chave] = obj
+
+    def gravar(self):
+        existentes = {}
+        for model in (Responsavel, Membro, *[d[0] for d in DEMANDAS.values()]):
+            objetos = list(self.por_model.get(model, {}).values())
+            existentes[model] = _upsert(model, objetos)
+        return existentes
+
+
+def _validar_familia(indice, familia, agora, pendentes):
+    """Valida uma família; se tudo for válido, enfileira os objetos no bloco"""
+    resultado = {'indice': indice}
+    if not isinstance(familia, dict) or not isinstance(familia.get('responsavel'), dict):
+        resultado.update(status='erro', erros={'responsavel': ['Objeto "responsavel" é obrigatório.']})
+        return resultado, []
+
+    erros = {}
+    objetos = []
+
+    dados_responsavel = dict(familia['responsavel'])
+    dados_responsavel.setdefault('timestamp', agora)
+    serializer = ResponsavelLoteSerializer(data=dados_responsavel)
+    if serializer.is_valid():
+        cpf = serializer.validated_data['cpf']
+        objetos.append((Responsavel, _instancia(Responsavel, serializer.validated_data)))
+    else:
+        cpf = dados_responsavel.get('cpf')
+        erros['responsavel'] = serializer.errors
+    resultado['cpf'] = cpf
+
+    membros = familia.get('membros') or []
+    if not isinstance(membros, list):
+        erros['membros'] = ['Deve ser uma lista.']
+        membros = []
+    for posicao, dados in enumerate(membros):
+        dados = dict(dados) if isinstance(dados, dict) else {}
+        dados['cpf_responsavel'] = cpf
+        dados.setdefault('timestamp', agora)
+        serializer = MembroLoteSerializer(data=dados)
+        if serializer.is_valid():
+            objetos.append((Membro, _instancia(Membro, serializer.validated_data)))
+        else:
+            erros.setdefault('membros', {})[posicao] = serializer.errors
+
+    demandas = familia.get('demandas') or {}
+    if not isinstance(demandas, dict):
+        erros['demandas'] = ['Deve ser um objeto com listas por tipo de demanda.']
+        demandas = {}
+    for tipo, itens in demandas.items():
+        if tipo not in DEMANDAS:
+            erros.setdefault('demandas', {})[tipo] = [f'Tipo de demanda desconhecido: {tipo}.']
+            continue
+        model, serializer_class, campo_cpf = DEMANDAS[tipo]
+        for posicao, dados in enumerate(itens if isinstance(itens, list) else [itens]):
+            dados = dict(dados) if isinstance(dados, dict) else {}
+            dados.setdefault(campo_cpf, cpf)
+            serializer = serializer_class(data=dados)
+            if serializer.is_valid():
+                objetos.append((model, _instancia(model, serializer.validated_data)))
+            else:
+                erros.setdefault('demandas', {}).setdefault(tipo, {})[posicao] = serializer.errors
+
+    if erros:
+        resultado.update(status='erro', erros=erros)
+        return resultado, []
+
+    for model, obj in objetos:
+        pendentes.adicionar(model, obj)
+    return resultado, objetos
+
+
+def _gravar_bloco(bloco, agora):
+    pendentes = _Pendentes()
+    validados = []
+    for indice, familia in bloco:
+        validados.append(_validar_familia(indice, familia, agora, pendentes))
+
+    existentes = pendentes.gravar()
+
+    # Um CPF repetido no bloco é gravado uma vez (vale a última ocorrência);
+    # só a primeira conta como criada, as seguintes como atualizações
+    vistos = {Responsavel: set(existentes[Responsavel]), Membro: set(existentes[Membro])}
+
+    def existia(model, pk):
+        if pk in vistos[model]:
+            return True
+        vistos[model].add(pk)
+        return False
+
+    resultados = []
+    for resultado, objetos in validados:
+        if resultado.get('status') != 'erro':
+            resultado['status'] = 'atualizado' if existia(Responsavel, resultado['cpf']) else 'criado'
+            membros = [existia(Membro, obj.pk) for model, obj in objetos if model is Membro]
+            resultado['membros'] = {
+                'criados': membros.count(False),
+                'atualizados': membros.count(True),
+            }
+            resultado['demandas'] = sum(1 for model, _ in objetos if model not in (Responsavel, Membro))
+        resultados.append(resultado)
+    return resultados
+
+
+def gravar_familias(familias):
+    """
+    Valida e grava um iterável de famílias numa única transação
+
+    Retorna o resumo com o resultado de cada família, na ordem recebida.
+    Famílias inválidas não são gravadas e não impedem a gravação das demais.
+    """
+    limite = getattr(settings, 'CADASTRO_LOTE_MAX_FAMILIAS', 10000)
+    agora = timezone.now()
+    resultados = []
+    bloco = []
+
+    with transaction.atomic():
+        for indice, familia in enumerate(familias):
+            if indice >= limite:
+                raise LoteMuitoGrande(f'O lote excede o limite de {limite} famílias.')
+            bloco.append((indice, familia))
+            if len(bloco) >= TAMANHO_BLOCO:
+                resultados.extend(_gravar_bloco(bloco, agora))
+                bloco = []
+        if bloco:
+            resultados.extend(_gravar_bloco(bloco, agora))
+
+    resumo = {'total': len(resultados), 'criados': 0, 'atualizados': 0, 'erros': 0}
+    for resultado in resultados:
+        chave = {'criado': 'criados', 'atualizado': 'atualizados'}.get(resultado['status'], 'erros')
+        resumo[chave] += 1
+    resumo['resultados'] = resultados
+    return resumo
@@ -0,0 +1,125 @@
+"""
+Busca em lote por lista de CPFs (responsáveis e membros)
+
+Os CPFs são consultados em blocos de TAMANHO_BLOCO com WHERE cpf IN
+(...). Membros e demandas, quando pedidos, saem de uma consulta por
+tabela em cada bloco, então o número de consultas não depende de quantos
+registros relacionados cada pessoa tem.
+"""
+from itertools import islice
+
+from django.conf import settings
+
+from utils.validators import NAO_NUMERICO, TAMANHO_INVALIDO, classificar_cpfs, limpar_documento
+
+from .mixins import planejar_consulta
+from .models import (
+    DemandaAmbiente, DemandaEducacao, DemandaHabitacao, DemandaInterna,
+    DemandaSaude, Membro, Responsavel
+)
+from .serializers import (
+    DemandaAmbienteSerializer, DemandaEducacaoSerializer, DemandaHabitacaoSerializer,
+    DemandaInternaSerializer, DemandaSaudeSerializer, MembroSerializer, ResponsavelSerializer
+)
+
+TAMANHO_BLOCO = 1000
+
+# tipo -> (model, serializer, campo com o CPF da pessoa, vários por pessoa)
+DEMANDAS_RESPONSAVEL = {
+    'ambiente': (DemandaAmbiente, DemandaAmbienteSerializer, 'cpf', False),
+    'educacao': (DemandaEducacao, DemandaEducacaoSerializer, 'cpf_responsavel', True),
+    'habitacao': (DemandaHabitacao, DemandaHabitacaoSerializer, 'cpf', False),
+    'interna': (DemandaInterna, DemandaInternaSerializer, 'cpf', False),
+    'saude': (DemandaSaude, DemandaSaudeSerializer, 'cpf', False),
+}
+DEMANDAS_MEMBRO = {
+    'educacao': (DemandaEducacao, DemandaEducacaoSerializer, 'cpf', False),
+    'interna': (DemandaInterna, DemandaInternaSerializer, 'cpf', False),
+    'saude': (DemandaSaude, DemandaSaudeSerializer, 'cpf', False),
+}
+
+
+class BuscaInvalida(Exception):
+    pass
+
+
+def _ler_pedido(dados, inclusoes):
+    """(CPFs sem repetição na ordem recebida, CPFs mal formados, inclusões)"""
+    if not isinstance(dados, dict) or not isinstance(dados.get('cpfs'), list):
+        raise BuscaInvalida('Envie {"cpfs": [...]} com a lista de CPFs')
+    limite = getattr(settings, 'CADASTRO_BUSCA_LOTE_MAX_CPFS', 5000)
+    if len(dados['cpfs']) > limite:
+        raise BuscaInvalida(f'Máximo de {limite} CPFs por requisição')
+    incluir = dados.get('incluir') or []
+    if (
+        not isinstance(incluir, list)
+        or not all(isinstance(item, str) for item in incluir)
+        or set(incluir) - inclusoes
+    ):
+        raise BuscaInvalida(f'"incluir" aceita: {", ".join(sorted(inclusoes))}')
+
+    cpfs = list(dict.fromkeys(limpar_documento(cpf) for cpf in dados['cpfs']))
+    # Dígito verificador errado não impede a busca: há cadastros antigos assim
+    situacoes = classificar_cpfs(cpfs)
+    mal_formados = [cpf for cpf, situacao in zip(cpfs, situacoes) if situacao in (TAMANHO_INVALIDO, NAO_NUMERICO)]
+    validos = [cpf for cpf, situacao in zip(cpfs, situacoes) if situacao not in (TAMANHO_INVALIDO, NAO_NUMERICO)]
+    return validos, mal_formados, set(incluir)
+
+
+def _serializar(serializer_class, queryset, context):
+    objetos = list(planejar_consulta(serializer_class).aplicar(queryset))
+    return zip(objetos, serializer_class(objetos, many=True, context=context).data)
+
+
+def _demandas(tipos, cpfs, context):
+    """{cpf: {tipo: dados}} com uma consulta por tabela de demanda"""
+    resultado = {cpf: {tipo: [] if varios else None for tipo, (*_, varios) in tipos.items()} for cpf in cpfs}
+    for tipo, (model, serializer_class, campo, varios) in tipos.items():
+        queryset = model._base_manager.filter(**{f'{campo}__in': cpfs})
+        atributo = model._meta.get_field(campo).attname
+        for objeto, dados in _serializar(serializer_class, queryset, context):
+            demandas = resultado[getattr(objeto, atributo)]
+            if varios:
+                demandas[tipo].append(dados)
+            else:
+                demandas[tipo] = dados
+    return resultado
+
+
+def _buscar(model, serializer_class, demandas, dados, context, membros=False):
+    inclusoes = {'membros', 'demandas'} if membros else {'demandas'}
+    cpfs, mal_formados, incluir = _ler_pedido(dados, inclusoes)
+    encontrados = {}
+    pendentes = iter(cpfs)
+    while bloco := list(islice(pendentes, TAMANHO_BLOCO)):
+        achados = {
+            objeto.pk: linha for objeto, linha in
+            _serializar(serializer_class, model._base_manager.filter(pk__in=bloco), context)
+        }
+        if not achados:
+            continue
+        if 'membros' in incluir:
+            for linha in achados.values():
+                linha['membros'] = []
+            queryset = Membro._base_manager.filter(cpf_responsavel__in=list(achados))
+            for objeto, linha in _serializar(MembroSerializer, queryset, context):
+                achados[objeto.cpf_responsavel_id]['membros'].append(linha)
+        if 'demandas' in incluir:
+            for cpf, por_tipo in _demandas(demandas, list(achados), context).items():
+                achados[cpf]['demandas'] = por_tipo
+        encontrados.update(achados)
+    return {
+        'encontrados': {cpf: encontrados[cpf] for cpf in cpfs if cpf in encontrados},
+        'nao_encontrados': [cpf for cpf in cpfs if cpf not in encontrados],
+        'invalidos': mal_formados,
+    }
+
+
+def buscar_responsaveis(dados, context=None):
+    """Responsáveis dos CPFs; `incluir` pode pedir membros e demandas da família"""
+    return _buscar(Responsavel, ResponsavelSerializer, DEMANDAS_RESPONSAVEL, dados, context, membros=True)
+
+
+def buscar_membros(dados, context=None):
+    """Membros dos CPFs; `incluir` pode pedir as demandas de cada pessoa"""
+    return _buscar(Membro, MembroSerializer, DEMANDAS_MEMBRO, dados, context)
@@ -0,0 +1,329 @@
+"""
+Carga em massa de planilhas (CSV/XLSX) nas tabelas do cadastro
+
+A leitura do arquivo é feita em streaming e dividida em blocos. Cada bloco
+é validado e gravado por um processo separado: as linhas válidas vão para
+uma tabela temporária via COPY e de lá para a tabela de destino com
+INSERT ... ON CONFLICT (pk) DO UPDATE. As linhas rejeitadas voltam ao
+processo principal com o motivo, para o relatório.
+"""
+import csv
+import datetime
+import io
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+
+from django.core.exceptions import ValidationError
+from django.db import connections, models, transaction
+
+from utils.validators import (
+    MENSAGEM_CEP, MENSAGENS_CPF, VALIDO, classificar_ceps, classificar_cpfs,
+    situacao_cep, situacao_cpf
+)
+
+from .models import (
+    CepAtingido, DemandaAmbiente, DemandaEducacao, DemandaHabitacao,
+    DemandaInterna, DemandaSaude, Membro, Responsavel
+)
+from .signals import lote_gravado, lote_gravando
+
+TABELAS = {
+    model._meta.db_table: model for model in (
+        CepAtingido, Responsavel, Membro, DemandaAmbiente, DemandaEducacao,
+        DemandaHabitacao, DemandaInterna, DemandaSaude,
+    )
+}
+
+COLUNAS_CPF = {'cpf', 'cpf_responsavel'}
+COLUNAS_CEP = {'cep'}
+
+
+class ErroCarga(Exception):
+    pass
+
+
+class Relatorio:
+    """Totais da carga"""
+
+    def __init__(self):
+        self.lidas = 0
+        self.gravadas = 0
+        self.rejeitadas = 0
+        self.inicio = time.monotonic()
+
+    @property
+    def segundos(self):
+        return time.monotonic() - self.inicio
+
+    @property
+    def linhas_por_segundo(self):
+        return self.lidas / self.segundos if self.segundos else 0.0
+
+
+def colunas_do_model(model):
+    return {campo.column: campo for campo in model._meta.concrete_fields}
+
+
+def validar_cabecalho(model, cabecalho):
+    campos = colunas_do_model(model)
+    desconhecidas = [coluna for coluna in cabecalho if coluna not in campos]
+    if desconhecidas:
+        raise ErroCarga(f'Colunas desconhecidas em {model._meta.db_table}: {", ".join(desconhecidas)}')
+    if model._meta.pk.column not in cabecalho:
+        raise ErroCarga(f'A coluna {model._meta.pk.column} (chave primária) é obrigatória')
+    obrigatorias = [
+        coluna for coluna, campo in campos.items()
+        if not campo.null and not campo.has_default() and coluna not in cabecalho
+    ]
+    if obrigatorias:
+        raise ErroCarga(f'Colunas obrigatórias ausentes: {", ".join(obrigatorias)}')
+
+
+def ler_csv(caminho, delimitador=',', encoding='utf-8-sig'):
+    """Gera (cabeçalho, linhas) de um CSV sem carregá-lo inteiro"""
+    arquivo = open(caminho, newline='', encoding=encoding)
+    leitor = csv.reader(arquivo, delimiter=delimitador)
+    cabecalho = [coluna.strip().lower() for coluna in next(leitor, [])]
+
+    def linhas():
+        with arquivo:
+            yield from leitor
+    return cabecalho, linhas()
+
+
+def ler_xlsx(caminho, planilha=None):
+    """Gera (cabeçalho, linhas) de uma planilha XLSX em modo somente leitura"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ErroCarga('Para ler XLSX instale o pacote openpyxl')
+    livro = load_workbook(caminho, read_only=True, data_only=True)
+    folha = livro[planilha] if planilha else livro.active
+    iterador = folha.iter_rows(values_only=True)
+    cabecalho = [str(coluna or '').strip().lower() for coluna in next(iterador, ())]
+
+    def linhas():
+        try:
+            for linha in iterador:
+                if any(valor is not None for valor in linha):
+                    yield list(linha)
+        finally:
+            livro.close()
+    return cabecalho, linhas()
+
+
+def _para_python(campo, valor):
+    if isinstance(valor, str):
+        valor = valor.strip()
+    if valor is None or valor == '':
+        return None
+    if isinstance(campo, models.DateField) and not isinstance(campo, models.DateTimeField):
+        if isinstance(valor, str) and re.match(r'^\d{2}/\d{2}/\d{4}$', valor):
+            return datetime.datetime.strptime(valor, '%d/%m/%Y').date()
+    if isinstance(campo, (models.IntegerField, models.BigIntegerField)) and isinstance(valor, float):
+        if valor.is_integer():
+            valor = int(valor)
+    return campo.to_python(valor)
+
+
+def _documento(coluna, valor):
+    """
+    Só os dígitos do CPF/CEP. Células numéricas do XLSX (int ou float
+    inteiro) perdem os zeros à esquerda e, como float, ganhariam um '.0';
+    voltam ao tamanho do documento.
+    """
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        if isinstance(valor, int) or valor.is_integer():
+            return str(int(valor)).zfill(11 if coluna in COLUNAS_CPF else 8)
+    return re.sub(r'\D', '', str(valor))
+
+
+def classificar_documentos(cabecalho, linhas):
+    """
+    Situação dos CPFs e CEPs do bloco, classificados uma coluna inteira por
+    vez: {coluna: [situação de cada linha]}
+    """
+    situacoes = {}
+    for posicao, coluna in enumerate(cabecalho):
+        if coluna not in COLUNAS_CPF | COLUNAS_CEP:
+            continue
+        valores = [
+            _documento(coluna, linha[posicao])
+            if len(linha) == len(cabecalho) and linha[posicao] not in (None, '') else ''
+            for linha in linhas
+        ]
+        classificar = classificar_cpfs if coluna in COLUNAS_CPF else classificar_ceps
+        situacoes[coluna] = classificar(valores)
+    return situacoes
+
+
+def _verificar_documento(coluna, valor, situacao=None):
+    if coluna in COLUNAS_CPF:
+        situacao = situacao or situacao_cpf(valor)
+        if situacao != VALIDO:
+            raise ValidationError(MENSAGENS_CPF[situacao])
+    elif coluna in COLUNAS_CEP:
+        if (situacao or situacao_cep(valor)) != VALIDO:
+            raise ValidationError(MENSAGEM_CEP)
+
+
+def validar_linha(campos, cabecalho, linha, situacoes=None):
+    """
+    Normaliza e valida uma linha; retorna a lista de valores ou lança ValidationError
+
+    `situacoes` ({coluna: situação}) traz os CPFs e CEPs da linha já
+    classificados por `classificar_documentos`.
+    """
+    if len(linha) != len(cabecalho):
+        raise ValidationError(f'Esperadas {len(cabecalho)} colunas, encontradas {len(linha)}')
+    situacoes = situacoes or {}
+    valores = []
+    for coluna, valor in zip(cabecalho, linha):
+        campo = campos[coluna]
+        if coluna in COLUNAS_CPF | COLUNAS_CEP and valor not in (None, ''):
+            valor = _documento(coluna, valor)
+        try:
+            valor = _para_python(campo, valor)
+            if valor is None:
+                if not campo.null:
+                    raise ValidationError('Campo obrigatório')
+            else:
+                _verificar_documento(coluna, valor, situacoes.get(coluna))
+                campo.run_validators(valor)
+        except ValidationError as e:
+            raise ValidationError(f'{coluna}: {"; ".join(e.messages)}')
+        valores.append(valor)
+    return valores
+
+
+def _como_copy(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return valor
+
+
+def processar_bloco(alias, tabela, cabecalho, inicio, linhas):
+    """
+    Valida um bloco e grava as linhas válidas (executado num processo filho)
+
+    Retorna (gravadas, rejeitadas), em que gravadas é o número de linhas
+    inseridas ou atualizadas (chaves repetidas no bloco contam uma vez) e
+    rejeitadas é uma lista de (número da linha, motivo, linha original).
+    """
+    model = TABELAS[tabela]
+    campos = colunas_do_model(model)
+    validas = []
+    rejeitadas = []
+    documentos = classificar_documentos(cabecalho, linhas)
+    for deslocamento, linha in enumerate(linhas):
+        situacoes = {coluna: classes[deslocamento] for coluna, classes in documentos.items()}
+        try:
+            validas.append(validar_linha(campos, cabecalho, linha, situacoes))
+        except ValidationError as e:
+            rejeitadas.append((inicio + deslocamento, '; '.join(e.messages), linha))
+
+    if not validas:
+        return 0, rejeitadas
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for valores in validas:
+        escritor.writerow([_como_copy(valor) for valor in valores])
+    buffer.seek(0)
+
+    conexao = connections[alias]
+    quote = conexao.ops.quote_name
+    pk = model._meta.pk.column
+    colunas = ', '.join(quote(coluna) for coluna in cabecalho)
+    atualizar = ', '.join(
+        f'{quote(coluna)} = EXCLUDED.{quote(coluna)}' for coluna in cabecalho if coluna != pk
+    )
+    conflito = f'DO UPDATE SET {atualizar}' if atualizar else 'DO NOTHING'
+    staging = quote(f'stg_{tabela}')
+
+    try:
+        with transaction.atomic(using=alias), conexao.cursor() as cursor:
+            lote_gravando.send(sender=model, chaves=None, using=alias)
+            cursor.execute(
+                f'CREATE TEMP TABLE {staging} (LIKE {quote(tabela)} INCLUDING DEFAULTS) ON COMMIT DROP'
+            )
+            cursor.copy_expert(f'COPY {staging} ({colunas}) FROM STDIN WITH (FORMAT csv)', buffer)
+            # Se a mesma chave aparece mais de uma vez no bloco, vale a última linha
+            cursor.execute(
+                f'INSERT INTO {quote(tabela)} ({colunas}) '
+                f'SELECT DISTINCT ON ({quote(pk)}) {colunas} FROM {staging} '
+                f'ORDER BY {quote(pk)}, ctid DESC '
+                f'ON CONFLICT ({quote(pk)}) {conflito}'
+            )
+            gravadas = cursor.rowcount
+    except Exception as e:
+        motivo = f'Erro no banco ao gravar o bloco: {e}'.strip()
+        rejeitadas.extend(
+            (inicio + deslocamento, motivo, linha) for deslocamento, linha in enumerate(linhas)
+        )
+        return 0, rejeitadas
+    return gravadas, rejeitadas
+
+
+def _blocos(linhas, tamanho):
+    bloco = []
+    inicio = 2  # linha 1 é o cabeçalho
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) >= tamanho:
+            yield inicio, bloco
+            inicio += len(bloco)
+            bloco = []
+    if bloco:
+        yield inicio, bloco
+
+
+def carregar(tabela, cabecalho, linhas, alias='default', workers=4, tamanho_bloco=20000,
+             ao_rejeitar=None, ao_progredir=None):
+    """
+    Carrega as linhas na tabela usando `workers` processos em paralelo
+
+    No máximo 2 blocos por worker ficam em memória ao mesmo tempo.
+    """
+    if tabela not in TABELAS:
+        raise ErroCarga(f'Tabela não suportada: {tabela}. Opções: {", ".join(sorted(TABELAS))}')
+    if connections[alias].vendor != 'postgresql':
+        raise ErroCarga('A carga via COPY exige PostgreSQL')
+    validar_cabecalho(TABELAS[tabela], cabecalho)
+
+    relatorio = Relatorio()
+    # lote_gravando é enviado na transação de cada bloco (processar_bloco) e
+    # lote_gravado uma vez, no fim. As conexões abertas não podem ser
+    # herdadas pelos processos filhos
+    connections.close_all()
+
+    def concluir(futuros):
+        for futuro in futuros:
+            gravadas, rejeitadas = futuro.result()
+            relatorio.gravadas += gravadas
+            relatorio.rejeitadas += len(rejeitadas)
+            if ao_rejeitar:
+                for rejeitada in rejeitadas:
+                    ao_rejeitar(*rejeitada)
+            if ao_progredir:
+                ao_progredir(relatorio)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('fork')) as executor:
+        pendentes = set()
+        for inicio, bloco in _blocos(linhas, tamanho_bloco):
+            relatorio.lidas += len(bloco)
+            pendentes.add(executor.submit(processar_bloco, alias, tabela, cabecalho, inicio, bloco))
+            if len(pendentes) >= workers * 2:
+                prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                concluir(prontos)
+        concluir(pendentes)
+
+    if relatorio.gravadas:
+        lote_gravado.send(sender=TABELAS[tabela], chaves=None)
+    return relatorio
@@ -0,0 +1,112 @@
+"""
+Exportação em streaming (NDJSON/CSV/array JSON) de querysets do cadastro
+
+As linhas são lidas com QuerySet.iterator(chunk_size=...), que no
+PostgreSQL usa cursor do lado do servidor, e enviadas aos poucos num
+StreamingHttpResponse: a memória do worker fica constante qualquer que
+seja o tamanho da exportação. No formato json o array é escrito de forma
+incremental, um objeto por vez, com o mesmo encoder do ORJSONRenderer.
+
+A leitura acontece numa transação REPEATABLE READ somente leitura, então
+os prefetches de cada bloco veem o mesmo snapshot da consulta principal.
+Dentro de uma transação já aberta (ATOMIC_REQUESTS, testes, chamador com
+atomic()) o nível não pode mais ser trocado e vale o snapshot dela.
+"""
+import csv
+
+from django.db import connections, transaction
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .renderers import codificar
+
+FORMATOS = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+}
+
+TAMANHO_BLOCO_SAIDA = 64 * 1024
+
+
+class _Eco:
+    """Pseudo-arquivo para o csv.writer: devolve a linha em vez de gravar"""
+
+    def write(self, valor):
+        return valor
+
+
+def iterar_snapshot(queryset, chunk_size):
+    """Itera o queryset num snapshot consistente, com cursor do servidor"""
+    conexao = connections[queryset.db]
+    externa = conexao.in_atomic_block
+    with transaction.atomic(using=queryset.db):
+        if conexao.vendor == 'postgresql' and not externa:
+            with conexao.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        yield from queryset.iterator(chunk_size=chunk_size)
+
+
+def _linhas_ndjson(serializer, objetos):
+    for obj in objetos:
+        yield codificar(serializer.to_representation(obj)) + b'\n'
+
+
+def _linhas_json(serializer, objetos):
+    yield b'['
+    separador = b''
+    for obj in objetos:
+        yield separador + codificar(serializer.to_representation(obj))
+        separador = b','
+    yield b']'
+
+
+def _linhas_csv(serializer, objetos):
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    escritor = csv.writer(_Eco())
+    colunas = None
+    for obj in objetos:
+        dados = serializer.to_representation(obj)
+        if colunas is None:
+            colunas = list(dados.keys())
+            yield escritor.writerow(colunas).encode('utf-8')
+        yield escritor.writerow([
+            encoder.encode(dados.get(coluna))
+            if isinstance(dados.get(coluna), (dict, list)) else dados.get(coluna)
+            for coluna in colunas
+        ]).encode('utf-8')
+
+
+def _agrupar(linhas):
+    """Junta linhas pequenas em blocos de ~64 KB antes de enviar"""
+    partes = []
+    tamanho = 0
+    for linha in linhas:
+        partes.append(linha)
+        tamanho += len(linha)
+        if tamanho >= TAMANHO_BLOCO_SAIDA:
+            yield b''.join(partes)
+            partes = []
+            tamanho = 0
+    if partes:
+        yield b''.join(partes)
+
+
+def resposta_streaming(queryset, serializer, formato, nome_arquivo, chunk_size=2000):
+    """
+    StreamingHttpResponse com o queryset serializado linha a linha
+
+    `serializer` é uma instância sem dados (ex.: view.get_serializer()),
+    usada apenas para to_representation de cada objeto.
+    """
+    objetos = iterar_snapshot(queryset, chunk_size)
+    if formato == 'csv':
+        linhas = _linhas_csv(serializer, objetos)
+    elif formato == 'json':
+        linhas = _linhas_json(serializer, objetos)
+    else:
+        linhas = _linhas_ndjson(serializer, objetos)
+    resposta = StreamingHttpResponse(_agrupar(linhas), content_type=FORMATOS[formato])
+    resposta['Content-Disposition'] = f'attachment; filename="{nome_arquivo}.{formato}"'
+    resposta['X-Accel-Buffering'] = 'no'
+    return resposta
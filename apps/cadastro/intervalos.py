@@ -0,0 +1,109 @@
+"""
+Índice em memória das faixas de numeração atingidas (cep_atingido)
+
+Para cada CEP guarda as faixas [num_inicial, num_final] já ordenadas e
+mescladas; verificar se um endereço (cep, numero) está atingido é uma
+busca binária, sem consulta ao banco. Faixa sem número inicial/final vale
+como aberta daquele lado (CEP inteiro quando ambos são nulos).
+
+Cada processo monta o seu índice sob demanda. Uma versão guardada no
+cache (Redis) é incrementada sempre que cep_atingido muda; os processos
+comparam essa versão no máximo uma vez por segundo e remontam o índice
+quando ela muda.
+"""
+import math
+import threading
+import time
+from bisect import bisect_right
+
+from django.core.cache import cache
+
+from .models import CepAtingido
+
+CHAVE_VERSAO = 'cadastro:cep_atingido:versao'
+INTERVALO_VERIFICACAO = 1.0
+
+
+def _mesclar(faixas):
+    faixas.sort()
+    inicios, fins = [], []
+    for inicio, fim in faixas:
+        if fins and inicio <= fins[-1]:
+            fins[-1] = max(fins[-1], fim)
+        else:
+            inicios.append(inicio)
+            fins.append(fim)
+    return inicios, fins
+
+
+class IndiceFaixas:
+    """Faixas mescladas por CEP"""
+
+    def __init__(self, linhas):
+        por_cep = {}
+        for cep, inicio, fim in linhas:
+            inicio = -math.inf if inicio is None else inicio
+            fim = math.inf if fim is None else fim
+            if inicio > fim:
+                inicio, fim = fim, inicio
+            por_cep.setdefault(cep, []).append((inicio, fim))
+        self.faixas = {cep: _mesclar(faixas) for cep, faixas in por_cep.items()}
+
+    def __len__(self):
+        return len(self.faixas)
+
+    def contem(self, cep, numero):
+        faixas = self.faixas.get(cep)
+        if faixas is None:
+            return False
+        if numero is None:
+            return True
+        inicios, fins = faixas
+        posicao = bisect_right(inicios, numero) - 1
+        return posicao >= 0 and numero <= fins[posicao]
+
+
+class IndiceCepAtingido:
+    """Índice do processo, remontado quando a versão no cache muda"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indice = None
+        self._versao = None
+        self._verificado_em = 0.0
+
+    def _versao_atual(self):
+        versao = cache.get(CHAVE_VERSAO)
+        if versao is None:
+            # Sem versão (cache limpo): um valor novo força a remontagem em todos
+            cache.add(CHAVE_VERSAO, time.time_ns(), timeout=None)
+            versao = cache.get(CHAVE_VERSAO)
+        return versao
+
+    def obter(self):
+        agora = time.monotonic()
+        if self._indice is not None and agora - self._verificado_em < INTERVALO_VERIFICACAO:
+            return self._indice
+        with self._lock:
+            versao = self._versao_atual()
+            self._verificado_em = agora
+            if self._indice is None or versao != self._versao:
+                linhas = CepAtingido.objects.values_list('cep', 'num_inicial', 'num_final').iterator()
+                self._indice = IndiceFaixas(linhas)
+                self._versao = versao
+            return self._indice
+
+    def invalidar(self):
+        """Descarta o índice deste processo e avisa os demais pelo cache"""
+        try:
+            cache.incr(CHAVE_VERSAO)
+        except ValueError:
+            cache.set(CHAVE_VERSAO, time.time_ns(), timeout=None)
+        with self._lock:
+            self._indice = None
+
+    def contem(self, cep, numero):
+        return self.obter().contem(cep, numero)
+
+
+indice_ceps = IndiceCepAtingido()
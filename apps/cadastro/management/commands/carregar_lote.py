@@ -0,0 +1,77 @@
+"""
+Carga em massa de CSV/XLSX nas tabelas do cadastro via COPY
+
+Exemplo:
+    python manage.py carregar_lote cep_atingido ceps.csv --workers 4
+"""
+import csv
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.cadastro.carga import TABELAS, ErroCarga, carregar, ler_csv, ler_xlsx
+
+
+class Command(BaseCommand):
+    help = 'Carrega um CSV/XLSX numa tabela do cadastro (COPY + upsert em paralelo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tabela', choices=sorted(TABELAS), help='Tabela de destino')
+        parser.add_argument('arquivo', help='Arquivo .csv ou .xlsx com cabeçalho na primeira linha')
+        parser.add_argument('--workers', type=int, default=4, help='Processos em paralelo (padrão: 4)')
+        parser.add_argument('--bloco', type=int, default=20000, help='Linhas por bloco (padrão: 20000)')
+        parser.add_argument('--delimitador', default=',', help='Delimitador do CSV (padrão: ,)')
+        parser.add_argument('--encoding', default='utf-8-sig', help='Encoding do CSV (padrão: utf-8-sig)')
+        parser.add_argument('--planilha', default=None, help='Nome da planilha no XLSX (padrão: a ativa)')
+        parser.add_argument('--rejeitados', default=None,
+                            help='CSV para as linhas rejeitadas (padrão: <arquivo>.rejeitados.csv)')
+        parser.add_argument('--database', default='default', help='Alias do banco (padrão: default)')
+
+    def handle(self, *args, **options):
+        caminho = Path(options['arquivo'])
+        if not caminho.exists():
+            raise CommandError(f'Arquivo não encontrado: {caminho}')
+
+        try:
+            if caminho.suffix.lower() in ('.xlsx', '.xlsm'):
+                cabecalho, linhas = ler_xlsx(caminho, options['planilha'])
+            else:
+                cabecalho, linhas = ler_csv(caminho, options['delimitador'], options['encoding'])
+        except ErroCarga as e:
+            raise CommandError(str(e))
+
+        destino_rejeitados = Path(options['rejeitados'] or f'{caminho}.rejeitados.csv')
+        with open(destino_rejeitados, 'w', newline='', encoding='utf-8') as arquivo_rejeitados:
+            escritor = csv.writer(arquivo_rejeitados)
+            escritor.writerow(['linha', 'motivo', *cabecalho])
+
+            def ao_rejeitar(numero, motivo, linha):
+                escritor.writerow([numero, motivo, *linha])
+
+            def ao_progredir(relatorio):
+                self.stdout.write(
+                    f'{relatorio.lidas} lidas, {relatorio.gravadas} gravadas, '
+                    f'{relatorio.rejeitadas} rejeitadas ({relatorio.linhas_por_segundo:.0f} linhas/s)'
+                )
+
+            try:
+                relatorio = carregar(
+                    options['tabela'], cabecalho, linhas,
+                    alias=options['database'],
+                    workers=max(1, options['workers']),
+                    tamanho_bloco=max(1, options['bloco']),
+                    ao_rejeitar=ao_rejeitar,
+                    ao_progredir=ao_progredir,
+                )
+            except ErroCarga as e:
+                raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Carga de {options["tabela"]} concluída em {relatorio.segundos:.1f}s: '
+            f'{relatorio.gravadas} gravadas, {relatorio.rejeitadas} rejeitadas '
+            f'({relatorio.linhas_por_segundo:.0f} linhas/s)'
+        ))
+        if relatorio.rejeitadas:
+            self.stdout.write(self.style.WARNING(f'Linhas rejeitadas em {destino_rejeitados}'))
+        else:
+            destino_rejeitados.unlink(missing_ok=True)
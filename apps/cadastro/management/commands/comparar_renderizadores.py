@@ -0,0 +1,124 @@
+"""
+Compara o ORJSONRenderer com o JSONRenderer do DRF
+
+Serializa registros sintéticos (sem acesso ao banco) com os serializers do
+cadastro, renderiza a mesma página com os dois renderers, confere que a
+saída é idêntica e mostra o tempo de cada um.
+
+Exemplo:
+    python manage.py comparar_renderizadores --linhas 20000 --repeticoes 5
+"""
+import datetime
+import json
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.cadastro.models import DemandaHabitacao, DemandaInterna, DemandaSaude
+from apps.cadastro.renderers import ORJSONRenderer, orjson
+from apps.cadastro.serializers import (
+    DemandaHabitacaoSerializer, DemandaInternaSerializer, DemandaSaudeSerializer
+)
+
+
+def _cpf(i):
+    return f'{i:011d}'
+
+
+def _data(aleatorio):
+    return datetime.date(1930, 1, 1) + datetime.timedelta(days=aleatorio.randrange(33000))
+
+
+def _conjuntos(linhas):
+    aleatorio = random.Random(42)
+    habitacao = [
+        DemandaHabitacao(
+            cpf=_cpf(i),
+            latitude=Decimal(f'-29.{aleatorio.randrange(10 ** 8):08d}'),
+            longitude=Decimal(f'-51.{aleatorio.randrange(10 ** 8):08d}'),
+            area_verde=aleatorio.choice('SN'), ocupacao=aleatorio.choice('SN'),
+            material='Alvenaria', relacao_imovel='Próprio', uso_imovel='Residência',
+            cod_rge=aleatorio.randrange(10 ** 9), evolucao='Aguardando vistoria — área de risco',
+        )
+        for i in range(linhas)
+    ]
+    saude = [
+        DemandaSaude(
+            cpf=_cpf(i), genero=aleatorio.choice(['F', 'M']), saude_cid='F32',
+            data_nasc=_data(aleatorio), gest_puer_nutriz=aleatorio.choice('SN'),
+            mob_reduzida=aleatorio.choice('SN'), cuida_outrem='N', pcd_ou_mental='N',
+            alergia_intol=None, local_ref='UBS Centro', evolucao='Acompanhamento semanal',
+        )
+        for i in range(linhas)
+    ]
+    internas = [
+        DemandaInterna(
+            cpf=_cpf(i), demanda='Cesta básica', data=_data(aleatorio),
+            status=aleatorio.choice(['A', 'C', None]), evolucao='Entregue em mãos ✓',
+        )
+        for i in range(linhas)
+    ]
+    agora = timezone.now()
+    nativos = [
+        {
+            'cpf': _cpf(i), 'latitude': Decimal('-29.68') - Decimal(i) / 10 ** 6,
+            'data_nasc': _data(aleatorio), 'atualizado_em': agora - datetime.timedelta(seconds=i),
+            'membros': [{'nome': 'João da Silva', 'idade': aleatorio.randrange(90)}] * 3,
+        }
+        for i in range(linhas)
+    ]
+    return {
+        'demandas_habitacao': DemandaHabitacaoSerializer(habitacao, many=True).data,
+        'demandas_saude': DemandaSaudeSerializer(saude, many=True).data,
+        'demandas_internas': DemandaInternaSerializer(internas, many=True).data,
+        'valores_nativos': nativos,
+    }
+
+
+def _medir(renderer, dados, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        conteudo = renderer.render(dados, 'application/json', {})
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return conteudo, melhor
+
+
+class Command(BaseCommand):
+    help = 'Compara saída e tempo do ORJSONRenderer com o JSONRenderer do DRF'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=20000, help='Registros por conjunto (padrão: 20000)')
+        parser.add_argument('--repeticoes', type=int, default=5,
+                            help='Renderizações por renderer; vale a mais rápida (padrão: 5)')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('O pacote orjson não está instalado; o ORJSONRenderer usa o encoder do DRF')
+        linhas = max(1, options['linhas'])
+        repeticoes = max(1, options['repeticoes'])
+
+        divergentes = []
+        for nome, dados in _conjuntos(linhas).items():
+            esperado, tempo_drf = _medir(JSONRenderer(), dados, repeticoes)
+            obtido, tempo_orjson = _medir(ORJSONRenderer(), dados, repeticoes)
+            if obtido == esperado:
+                situacao = 'idêntico'
+            elif json.loads(obtido) == json.loads(esperado):
+                situacao = 'equivalente (bytes diferentes)'
+            else:
+                situacao = 'DIVERGENTE'
+                divergentes.append(nome)
+            self.stdout.write(
+                f'{nome}: {len(esperado) / 1024 / 1024:.1f} MB, DRF {tempo_drf * 1000:.0f} ms, '
+                f'orjson {tempo_orjson * 1000:.0f} ms ({tempo_drf / tempo_orjson:.1f}x) — {situacao}'
+            )
+
+        if divergentes:
+            raise CommandError(f'Saída divergente em: {", ".join(divergentes)}')
+        self.stdout.write(self.style.SUCCESS('Saídas equivalentes em todos os conjuntos'))
@@ -0,0 +1,88 @@
+"""
+Cria extensões, funções e índices de apoio nas tabelas do cadastro
+
+As tabelas do cadastro não são gerenciadas pelo Django (managed = False),
+então os índices usados pela busca por nome e pela paginação por cursor
+são criados aqui, de forma idempotente e com CREATE INDEX CONCURRENTLY
+para não bloquear escritas em produção.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.cadastro.search import INDICES_TRIGRAMA
+from apps.cadastro.urls import router
+
+
+PREPARACAO = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    # unaccent() não é IMMUTABLE e não pode ser usado em índice; o wrapper fixa o dicionário
+    "CREATE OR REPLACE FUNCTION public.f_unaccent(text) RETURNS text "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS "
+    "$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$",
+]
+
+
+def indices_trigrama(quote):
+    for model, campo in INDICES_TRIGRAMA:
+        tabela = model._meta.db_table
+        coluna = model._meta.get_field(campo).column
+        nome = f'{tabela}_{coluna}_trgm_idx'
+        yield nome, (
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(nome)} ON {quote(tabela)} '
+            f'USING gin (public.f_unaccent(lower({quote(coluna)})) gin_trgm_ops)'
+        )
+
+
+def indices_cursor(quote):
+    """Um índice por ViewSet com `cursor_ordering`, na mesma ordem da paginação"""
+    vistos = set()
+    for _, viewset, _ in router.registry:
+        ordering = getattr(viewset, 'cursor_ordering', None)
+        if not ordering:
+            continue
+        model = viewset.queryset.model
+        tabela = model._meta.db_table
+        if tabela in vistos:
+            continue
+        vistos.add(tabela)
+        colunas = []
+        for campo in ordering:
+            coluna = model._meta.get_field(campo.lstrip('-')).column
+            direcao = 'DESC' if campo.startswith('-') else 'ASC'
+            colunas.append(f'{quote(coluna)} {direcao} NULLS LAST')
+        nome = f'{tabela}_cursor_idx'
+        yield nome, (
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(nome)} ON {quote(tabela)} '
+            f'({", ".join(colunas)})'
+        )
+
+
+class Command(BaseCommand):
+    help = 'Cria índices de trigramas (busca sem acento) e de paginação por cursor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias do banco (padrão: default)')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas exibe o SQL')
+
+    def handle(self, *args, **options):
+        conexao = connections[options['database']]
+        if conexao.vendor != 'postgresql' and not options['dry_run']:
+            raise CommandError('Os índices de busca exigem PostgreSQL; use --dry-run para ver o SQL.')
+
+        quote = conexao.ops.quote_name
+        comandos = [(None, sql) for sql in PREPARACAO]
+        comandos += list(indices_trigrama(quote))
+        comandos += list(indices_cursor(quote))
+
+        for nome, sql in comandos:
+            if options['dry_run']:
+                self.stdout.write(sql + ';')
+                continue
+            with conexao.cursor() as cursor:
+                cursor.execute(sql)
+            if nome:
+                self.stdout.write(self.style.SUCCESS(f'Índice {nome} ok'))
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('Índices criados/verificados com sucesso'))
@@ -0,0 +1,60 @@
+"""
+Gera famílias sintéticas e carrega nas tabelas do cadastro
+
+Os CSVs ficam em --destino (um por tabela) e são carregados na ordem das
+chaves estrangeiras com o mesmo COPY + upsert do `carregar_lote`. Use
+somente em bancos de teste/benchmark.
+
+Exemplo:
+    python manage.py gerar_sinteticos --familias 1000000 --workers 8
+    python manage.py gerar_sinteticos --familias 1000 --somente-arquivos --destino /tmp/sinteticos
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.cadastro.carga import ErroCarga, carregar, ler_csv
+from apps.cadastro.sinteticos import ORDEM_CARGA, gerar
+
+
+class Command(BaseCommand):
+    help = 'Gera famílias sintéticas (CPFs válidos, CEPs atingidos, membros e demandas) e carrega no banco'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--familias', type=int, default=100000, help='Quantidade de famílias (padrão: 100000)')
+        parser.add_argument('--ceps', type=int, default=2000, help='CEPs atingidos gerados (padrão: 2000)')
+        parser.add_argument('--semente', type=int, default=42, help='Semente do gerador (padrão: 42)')
+        parser.add_argument('--destino', default='dados_sinteticos', help='Pasta dos CSVs (padrão: dados_sinteticos)')
+        parser.add_argument('--somente-arquivos', action='store_true', help='Só gera os CSVs, sem carregar')
+        parser.add_argument('--workers', type=int, default=4, help='Processos da carga (padrão: 4)')
+        parser.add_argument('--bloco', type=int, default=20000, help='Linhas por bloco da carga (padrão: 20000)')
+        parser.add_argument('--database', default='default', help='Alias do banco (padrão: default)')
+
+    def handle(self, *args, **options):
+        if options['familias'] < 1 or options['ceps'] < 1:
+            raise CommandError('--familias e --ceps devem ser positivos')
+        destino = Path(options['destino'])
+
+        contagens = gerar(
+            destino, options['familias'], ceps=options['ceps'], semente=options['semente'],
+            ao_progredir=lambda familias: self.stdout.write(f'{familias} famílias geradas'),
+        )
+        for tabela in ORDEM_CARGA:
+            self.stdout.write(f'{tabela}: {contagens[tabela]} linhas em {destino / f"{tabela}.csv"}')
+        if options['somente_arquivos']:
+            return
+
+        for tabela in ORDEM_CARGA:
+            cabecalho, linhas = ler_csv(destino / f'{tabela}.csv', encoding='utf-8')
+            try:
+                relatorio = carregar(
+                    tabela, cabecalho, linhas, alias=options['database'],
+                    workers=max(1, options['workers']), tamanho_bloco=max(1, options['bloco']),
+                )
+            except ErroCarga as e:
+                raise CommandError(f'{tabela}: {e} (os CSVs continuam em {destino})')
+            self.stdout.write(
+                f'{tabela}: {relatorio.gravadas} gravadas, {relatorio.rejeitadas} rejeitadas '
+                f'em {relatorio.segundos:.1f}s ({relatorio.linhas_por_segundo:.0f} linhas/s)'
+            )
+        self.stdout.write(self.style.SUCCESS(f'{options["familias"]} famílias sintéticas carregadas'))
@@ -0,0 +1,480 @@
+"""
+Mixins compartilhados pelos ViewSets do cadastro
+"""
+import hashlib
+import time
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import router, transaction
+from django.db.models import Count, Prefetch
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from utils.metricas import fase, registrar_cache
+
+from . import versoes
+from .export import FORMATOS, resposta_streaming
+from .serializers import ContagemRelacionadaField
+
+
+def _relacao(model, nome):
+    """Retorna o campo de relação acessado por `nome` no model, ou None"""
+    try:
+        campo = model._meta.get_field(nome)
+    except FieldDoesNotExist:
+        campo = next(
+            (rel for rel in model._meta.related_objects if rel.get_accessor_name() == nome),
+            None
+        )
+    if campo is None or not campo.is_relation:
+        return None
+    return campo
+
+
+def _e_unico(relacao):
+    return relacao.many_to_one or relacao.one_to_one
+
+
+class PlanoConsulta:
+    """
+    select_related/prefetch_related/anotações necessários para um serializer
+    """
+
+    def __init__(self):
+        self.select = set()
+        self.prefetch = {}
+        self.contagens = {}
+
+    def incorporar(self, outro, prefixo):
+        """Adiciona um plano aninhado numa relação única (select_related)"""
+        self.select.update(f'{prefixo}__{caminho}' for caminho in outro.select)
+        for caminho, (model, plano) in outro.prefetch.items():
+            self.prefetch[f'{prefixo}__{caminho}'] = (model, plano)
+
+    def aplicar(self, queryset):
+        if self.select:
+            queryset = queryset.select_related(*sorted(self.select))
+        for caminho, (model, plano) in sorted(self.prefetch.items()):
+            if plano is None:
+                queryset = queryset.prefetch_related(caminho)
+            else:
+                queryset = queryset.prefetch_related(
+                    Prefetch(caminho, queryset=plano.aplicar(model._default_manager.all()))
+                )
+        if self.contagens:
+            queryset = queryset.annotate(**{
+                anotacao: Count(caminho) for anotacao, caminho in self.contagens.items()
+            })
+        return queryset
+
+
+def _planejar_fonte(plano, model, partes):
+    """Percorre um `source` pontuado (ex.: cpf_responsavel.nome)"""
+    caminho = []
+    for parte in partes:
+        relacao = _relacao(model, parte)
+        if relacao is None:
+            return
+        caminho.append(parte)
+        if not _e_unico(relacao):
+            plano.prefetch.setdefault('__'.join(caminho), (relacao.related_model, None))
+            return
+        plano.select.add('__'.join(caminho))
+        model = relacao.related_model
+
+
+@lru_cache(maxsize=None)
+def planejar_consulta(serializer_class, campos=None):
+    """
+    Monta o plano de consulta a partir dos campos do serializer
+
+    Campos com `source` pontuado e serializers aninhados em relações únicas
+    viram select_related; serializers aninhados com many=True viram
+    Prefetch (com o plano do serializer filho) e campos de relação com
+    many=True (ex.: PrimaryKeyRelatedField) viram prefetch_related;
+    ContagemRelacionadaField vira uma anotação Count. `campos` limita o
+    plano aos campos informados.
+    """
+    plano = PlanoConsulta()
+    model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+    if model is None:
+        return plano
+
+    for nome, campo in serializer_class().fields.items():
+        if campo.write_only or (campos is not None and nome not in campos):
+            continue
+
+        if isinstance(campo, ContagemRelacionadaField):
+            relacao = _relacao(model, campo.relacao)
+            if relacao is not None:
+                plano.contagens[campo.anotacao] = relacao.name
+            continue
+
+        if campo.source == '*':
+            continue
+        partes = campo.source.split('.')
+
+        if isinstance(campo, serializers.ListSerializer) and len(partes) == 1:
+            relacao = _relacao(model, partes[0])
+            if relacao is not None and not _e_unico(relacao):
+                filho = planejar_consulta(type(campo.child))
+                plano.prefetch[partes[0]] = (relacao.related_model, filho)
+            continue
+
+        if isinstance(campo, serializers.ManyRelatedField) and len(partes) == 1:
+            relacao = _relacao(model, partes[0])
+            if relacao is not None and not _e_unico(relacao):
+                plano.prefetch.setdefault(partes[0], (relacao.related_model, None))
+            continue
+
+        if isinstance(campo, serializers.BaseSerializer) and len(partes) == 1:
+            relacao = _relacao(model, partes[0])
+            if relacao is not None and _e_unico(relacao):
+                plano.select.add(partes[0])
+                plano.incorporar(planejar_consulta(type(campo)), partes[0])
+            continue
+
+        if len(partes) > 1:
+            _planejar_fonte(plano, model, partes[:-1])
+
+    return plano
+
+
+@lru_cache(maxsize=None)
+def nomes_dos_campos(serializer_class):
+    """Campos de leitura do serializer, na ordem de saída"""
+    return tuple(nome for nome, campo in serializer_class().fields.items() if not campo.write_only)
+
+
+@lru_cache(maxsize=None)
+def colunas_da_consulta(serializer_class, campos):
+    """
+    Colunas do model lidas pelos `campos` do serializer, para QuerySet.only()
+
+    Retorna None quando algum campo lê o objeto inteiro (source='*' sem
+    `colunas` declaradas, propriedades do model), caso em que todas as
+    colunas continuam sendo lidas. Campos de relações únicas levam a
+    chave estrangeira e, com source pontuado, a coluna do model
+    relacionado; relações reversas (pelo nome do acessor, ex.: membro_set)
+    só precisam da chave primária. Nomes que não são campo nem atributo
+    do model (anotações) são ignorados.
+    """
+    model = serializer_class.Meta.model
+    instancia = serializer_class()
+    colunas = {model._meta.pk.name}
+    for nome in campos:
+        campo = instancia.fields[nome]
+        if isinstance(campo, ContagemRelacionadaField):
+            continue
+        if campo.source == '*':
+            declaradas = getattr(campo, 'colunas', None)
+            if isinstance(campo, serializers.SerializerMethodField):
+                declaradas = getattr(serializer_class, 'colunas_dos_metodos', {}).get(nome)
+            if declaradas is None:
+                return None
+            colunas.update(declaradas)
+            continue
+        partes = campo.source.split('.')
+        try:
+            campo_model = model._meta.get_field(partes[0])
+        except FieldDoesNotExist:
+            # Acessor de relação reversa (ex.: membro_set)
+            campo_model = _relacao(model, partes[0])
+        if campo_model is None:
+            if hasattr(model, partes[0]):
+                # Propriedade ou método do model: pode ler qualquer coluna
+                return None
+            # Anotação do queryset, como as contagens
+            continue
+        if not campo_model.concrete:
+            # Relação reversa: o prefetch/select_related do plano de
+            # consulta só precisa da chave primária
+            if len(partes) > 1 and _e_unico(campo_model):
+                colunas.add('__'.join(partes[:2]))
+            continue
+        colunas.add(partes[0])
+        if campo_model.is_relation and len(partes) > 1:
+            relacionado = campo_model.related_model
+            try:
+                if relacionado._meta.get_field(partes[1]).concrete:
+                    colunas.add('__'.join(partes[:2]))
+                    continue
+            except FieldDoesNotExist:
+                pass
+            return None
+    return tuple(sorted(colunas))
+
+
+class ConsultaOtimizadaMixin:
+    """
+    Aplica automaticamente select_related/prefetch_related/contagens em
+    get_queryset() conforme o serializer usado pela ação, para que uma
+    página custe um número fixo de consultas, independente do aninhamento.
+
+    Nas leituras, ?fields=cpf,nome ou ?omit=complemento limitam os campos
+    da resposta; os campos que ficam de fora não são serializados, os
+    serializers aninhados deles não são consultados e as colunas lidas do
+    banco se restringem às necessárias (QuerySet.only()).
+    """
+    campos_query_param = 'fields'
+    omitir_query_param = 'omit'
+
+    def _lista_do_parametro(self, parametro):
+        valor = self.request.query_params.get(parametro, '')
+        return [nome.strip() for nome in valor.split(',') if nome.strip()]
+
+    def campos_solicitados(self):
+        """frozenset dos campos pedidos em ?fields=/?omit=, ou None para todos"""
+        if hasattr(self, '_campos_solicitados'):
+            return self._campos_solicitados
+        campos = None
+        request = getattr(self, 'request', None)
+        if request is not None and request.method in SAFE_METHODS:
+            incluir = self._lista_do_parametro(self.campos_query_param)
+            omitir = self._lista_do_parametro(self.omitir_query_param)
+            if incluir or omitir:
+                disponiveis = nomes_dos_campos(self.get_serializer_class())
+                desconhecidos = sorted(set(incluir + omitir) - set(disponiveis))
+                if desconhecidos:
+                    raise ValidationError({
+                        self.campos_query_param: f'Campos desconhecidos: {", ".join(desconhecidos)}'
+                    })
+                campos = frozenset(
+                    nome for nome in disponiveis
+                    if (not incluir or nome in incluir) and nome not in omitir
+                )
+        self._campos_solicitados = campos
+        return campos
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        campos = self.campos_solicitados()
+        queryset = planejar_consulta(serializer_class, campos).aplicar(queryset)
+        if campos is not None:
+            colunas = colunas_da_consulta(serializer_class, campos)
+            if colunas is not None:
+                # A paginação por cursor lê os campos de ordenação do último objeto
+                ordenacao = [campo.lstrip('-') for campo in getattr(self, 'cursor_ordering', None) or ()]
+                queryset = queryset.only(*colunas, *ordenacao)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        campos = self.campos_solicitados()
+        if campos is not None:
+            alvo = getattr(serializer, 'child', serializer)
+            for nome in [nome for nome in alvo.fields if nome not in campos]:
+                del alvo.fields[nome]
+        return serializer
+
+
+class ExportacaoMixin:
+    """
+    Exportação em streaming (NDJSON, CSV ou array JSON) com os mesmos filtros da lista
+
+    Adiciona a ação `exportar` (?formato=ndjson|csv|json) e o método
+    `responder_lista`, usado pelas ações não paginadas para responder em
+    streaming quando o cliente pede um `formato`.
+    """
+    export_chunk_size = 2000
+    formato_query_param = 'formato'
+
+    def _formato(self, padrao=None):
+        formato = self.request.query_params.get(self.formato_query_param, padrao)
+        if formato is not None and formato not in FORMATOS:
+            return False
+        return formato
+
+    def _streaming(self, queryset, formato):
+        nome = self.basename or queryset.model._meta.db_table
+        if self.action not in ('list', 'exportar'):
+            nome = f'{nome}-{self.action}'
+        return resposta_streaming(
+            queryset, self.get_serializer(), formato, nome, chunk_size=self.export_chunk_size
+        )
+
+    def _formato_invalido(self):
+        return Response(
+            {'detail': f'Formato inválido. Use: {", ".join(FORMATOS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta todos os registros filtrados em NDJSON (padrão), CSV ou array JSON
+        """
+        formato = self._formato(padrao='ndjson')
+        if not formato:
+            return self._formato_invalido()
+        return self._streaming(self.filter_queryset(self.get_queryset()), formato)
+
+    def responder_lista(self, queryset):
+        """Resposta de lista não paginada; em streaming se houver ?formato="""
+        queryset = self.filter_queryset(queryset)
+        formato = self._formato()
+        if formato is False:
+            return self._formato_invalido()
+        if formato:
+            return self._streaming(queryset, formato)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+class GravacaoAtomicaMixin:
+    """
+    Create, update e destroy numa transação, para que o que os signals
+    gravam junto (ex.: o log de sincronização) entre no mesmo commit
+    """
+
+    def _atomica(self):
+        return transaction.atomic(using=router.db_for_write(self.get_queryset().model))
+
+    def perform_create(self, serializer):
+        with self._atomica():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with self._atomica():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with self._atomica():
+            super().perform_destroy(instance)
+
+
+class _RespostaPronta(Exception):
+    """Interrompe a requisição com uma resposta já montada (ex.: 304)"""
+
+    def __init__(self, resposta):
+        self.resposta = resposta
+
+
+class RespostaCondicionalMixin:
+    """
+    GET condicional (ETag / Last-Modified) nas ações de leitura
+
+    O ETag combina a URL, o tipo de conteúdo, os tokens de versão dos
+    models de que a ação depende (`versoes_por_acao`, {ação: (models)};
+    por padrão list e retrieve dependem só do model da view) e, nas ações
+    de detalhe, o conteúdo da linha. Com isso o 304 sai de uma leitura no
+    cache e, no detalhe, de uma consulta pela chave primária, sem filtros,
+    paginação ou serializer.
+    """
+    versoes_por_acao = None
+
+    def dependencias(self, acao):
+        versoes_por_acao = self.versoes_por_acao
+        if versoes_por_acao is None:
+            model = self.queryset.model
+            versoes_por_acao = {'list': (model,), 'retrieve': (model,)}
+        return versoes_por_acao.get(acao)
+
+    def _conteudo_da_linha(self):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        model = self.queryset.model
+        colunas = [campo.attname for campo in model._meta.concrete_fields]
+        return model._base_manager.filter(
+            **{self.lookup_field: self.kwargs.get(lookup)}
+        ).values_list(*colunas).first()
+
+    def validadores(self, request):
+        """(etag, last_modified) da resposta, ou None se a ação não é condicional"""
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        dependencias = self.dependencias(self.action)
+        if not dependencias:
+            return None
+        tokens = versoes.obter(dependencias)
+        partes = [request.build_absolute_uri(), request.accepted_media_type, *tokens]
+        if self.detail:
+            partes.append(repr(self._conteudo_da_linha()))
+        etag = '"%s"' % hashlib.sha1('\n'.join(partes).encode()).hexdigest()
+        last_modified = int(max(versoes.instante(token) for token in tokens))
+        if last_modified >= int(time.time()):
+            # Outra gravação ainda pode cair no mesmo segundo; só o ETag vale
+            last_modified = None
+        return etag, last_modified
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validadores = self.validadores(request)
+        if self._validadores:
+            etag, last_modified = self._validadores
+            resposta = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if resposta is not None:
+                resposta['ETag'] = etag
+                raise _RespostaPronta(resposta)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _RespostaPronta):
+            return exc.resposta
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validadores = getattr(self, '_validadores', None)
+        if validadores and response.status_code == 200 and not response.streaming:
+            etag, last_modified = validadores
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class RespostaEmCacheMixin(RespostaCondicionalMixin):
+    """
+    Guarda no cache (Redis) a resposta renderizada das ações de
+    `cache_por_acao` ({ação: segundos})
+
+    A chave é o próprio ETag, que já inclui a URL com a query string e os
+    tokens de versão dos models; qualquer gravação troca o token e as
+    respostas antigas deixam de ser alcançadas, expirando sozinhas. O
+    tempo limite cobre só as gravações feitas fora da aplicação.
+
+    Os cabeçalhos (Content-Type, Vary, Allow, ETag...) são guardados com o
+    corpo e devolvidos iguais no acerto.
+    """
+    cache_por_acao = {}
+    # v2: o valor guardado passou a ser (conteúdo, cabeçalhos)
+    prefixo_cache_resposta = 'cadastro:resposta:v2:'
+
+    def _chave_resposta(self):
+        return f'{self.prefixo_cache_resposta}{self._validadores[0]}'
+
+    def initial(self, request, *args, **kwargs):
+        self._resposta_do_cache = False
+        super().initial(request, *args, **kwargs)
+        if self._validadores and self.cache_por_acao.get(self.action):
+            with fase('cache'):
+                guardada = cache.get(self._chave_resposta())
+            registrar_cache('resposta', acertos=guardada is not None, faltas=guardada is None)
+            if guardada is not None:
+                conteudo, cabecalhos = guardada
+                resposta = HttpResponse(conteudo)
+                for nome, valor in cabecalhos.items():
+                    resposta[nome] = valor
+                self._resposta_do_cache = True
+                raise _RespostaPronta(resposta)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validade = self.cache_por_acao.get(self.action)
+        if (
+            validade and getattr(self, '_validadores', None)
+            and not getattr(self, '_resposta_do_cache', False)
+            and response.status_code == 200 and not response.streaming
+        ):
+            response.render()
+            cache.set(self._chave_resposta(), (response.content, dict(response.items())), validade)
+        return response
@@ -0,0 +1,305 @@
+"""
+Paginação por cursor (keyset) para as listas grandes do cadastro
+
+A paginação padrão (PageNumberPagination) faz OFFSET + COUNT(*) a cada
+página, o que fica mais lento quanto mais fundo o cliente navega. Aqui a
+posição é guardada no próprio cursor como (campo de ordenação, chave
+primária) e a página seguinte é obtida com um WHERE sobre essas colunas,
+sem contagem, com custo constante em qualquer profundidade.
+
+Quando as duas colunas têm a mesma direção, o WHERE é uma comparação de
+linha, `(timestamp, cpf) < (%s, %s)`, que o PostgreSQL usa como limite do
+índice criado por criar_indices; com direções diferentes, vai junto um
+limite simples no campo principal (`pontuacao <= %s`). Linhas com o campo
+principal nulo ficam num trecho separado, lido só depois que os não nulos
+acabam, para que o OR com IS NULL não entre no WHERE de todas as páginas.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import BooleanField, F, Func, Q, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ComparacaoLinha(Func):
+    """(campo1, campo2) <op> (valor1, valor2), que o PostgreSQL resolve pelo índice"""
+    conditional = True
+    output_field = BooleanField()
+
+    def __init__(self, campos, valores, operador):
+        self.operador = operador
+        super().__init__(*campos, *valores)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        partes, params = [], []
+        for expressao in self.get_source_expressions():
+            sql, parametros = compiler.compile(expressao)
+            partes.append(sql)
+            params.extend(parametros)
+        metade = len(partes) // 2
+        return f'({", ".join(partes[:metade])}) {self.operador} ({", ".join(partes[metade:])})', params
+
+
+def cursor_solicitado(request):
+    """Indica se a requisição pediu paginação por cursor"""
+    params = request.query_params
+    return (
+        params.get(KeysetPagination.modo_query_param) == 'cursor'
+        or KeysetPagination.cursor_query_param in params
+    )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação keyset sobre (campo principal, chave primária)
+
+    A view informa a ordenação em `cursor_ordering`, por exemplo
+    ('-timestamp', '-cpf'). O primeiro campo pode ser nulo (os nulos ficam
+    sempre no fim); o segundo deve ser único para desempatar.
+    """
+    cursor_query_param = 'cursor'
+    modo_query_param = 'paginacao'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+
+        principal, desempate = self.ordering
+        campo_principal = principal.lstrip('-')
+        campo_desempate = desempate.lstrip('-')
+        model = self.ordering_model = queryset.model
+
+        posicao, reverso = self.decode_cursor(request, model, campo_principal, campo_desempate)
+
+        resultados = []
+        for trecho in self._trechos(queryset, posicao, reverso):
+            resultados += list(trecho[:self.page_size + 1 - len(resultados)])
+            if len(resultados) > self.page_size:
+                break
+        tem_mais = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+        if reverso:
+            resultados.reverse()
+
+        if reverso:
+            self.has_next = posicao is not None
+            self.has_previous = tem_mais
+        else:
+            self.has_next = tem_mais
+            self.has_previous = posicao is not None
+
+        self.primeiro = self._chave(resultados[0], campo_principal, campo_desempate) if resultados else None
+        self.ultimo = self._chave(resultados[-1], campo_principal, campo_desempate) if resultados else None
+        if not resultados and posicao is not None:
+            # Página vazia: os links voltam a partir da própria posição
+            self.primeiro = self.ultimo = posicao
+        return resultados
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                tamanho = int(request.query_params[self.page_size_query_param])
+                if tamanho > 0:
+                    return min(tamanho, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        assert ordering and len(ordering) == 2, (
+            'Defina `cursor_ordering` com dois campos na view para usar KeysetPagination.'
+        )
+        return ordering
+
+    def _direcao(self, campo, reverso):
+        descendente = campo.startswith('-')
+        if reverso:
+            descendente = not descendente
+        return 'lt' if descendente else 'gt'
+
+    def _order_by(self, reverso):
+        expressoes = []
+        for campo in self.ordering:
+            nome = campo.lstrip('-')
+            descendente = campo.startswith('-') != reverso
+            # Nulos sempre no fim da ordem "para frente" (no início ao voltar)
+            nulos = {'nulls_first': True} if reverso else {'nulls_last': True}
+            expressao = F(nome).desc(**nulos) if descendente else F(nome).asc(**nulos)
+            expressoes.append(expressao)
+        return expressoes
+
+    def _trechos(self, queryset, posicao, reverso):
+        """
+        Consultas lidas em sequência até completar a página: primeiro as
+        linhas com o campo principal preenchido, depois as nulas (na ordem
+        inversa ao voltar). Cada uma tem o seu limite de índice.
+        """
+        principal, desempate = self.ordering
+        campo_principal = principal.lstrip('-')
+        campo_desempate = desempate.lstrip('-')
+        order_by = self._order_by(reverso)
+
+        nao_nulos = queryset.filter(**{f'{campo_principal}__isnull': False}).order_by(*order_by)
+        nulos = None
+        if queryset.model._meta.get_field(campo_principal).null:
+            nulos = queryset.filter(**{f'{campo_principal}__isnull': True}).order_by(*order_by)
+
+        if posicao is not None:
+            valor, chave = posicao
+            if valor is None:
+                if nulos is not None:
+                    nulos = nulos.filter(**{f'{campo_desempate}__{self._direcao(desempate, reverso)}': chave})
+                if not reverso:
+                    nao_nulos = None
+            else:
+                nao_nulos = nao_nulos.filter(self._filtro_apos(posicao, reverso))
+                if reverso:
+                    nulos = None
+
+        trechos = [nulos, nao_nulos] if reverso else [nao_nulos, nulos]
+        return [trecho for trecho in trechos if trecho is not None]
+
+    def _filtro_apos(self, posicao, reverso):
+        """Linhas depois de `posicao` entre as que têm o campo principal preenchido"""
+        principal, desempate = self.ordering
+        campo_principal = principal.lstrip('-')
+        campo_desempate = desempate.lstrip('-')
+        op_principal = self._direcao(principal, reverso)
+        op_desempate = self._direcao(desempate, reverso)
+        valor, chave = posicao
+        model = self.ordering_model
+
+        if op_principal == op_desempate:
+            return ComparacaoLinha(
+                (F(campo_principal), F(campo_desempate)),
+                (
+                    Value(valor, output_field=model._meta.get_field(campo_principal)),
+                    Value(chave, output_field=model._meta.get_field(campo_desempate)),
+                ),
+                '<' if op_principal == 'lt' else '>',
+            )
+        # Direções diferentes não cabem numa comparação de linha; o limite
+        # no campo principal ainda restringe a faixa lida do índice
+        return Q(**{f'{campo_principal}__{op_principal}e': valor}) & (
+            Q(**{f'{campo_principal}__{op_principal}': valor})
+            | Q(**{f'{campo_desempate}__{op_desempate}': chave})
+        )
+
+    def _chave(self, obj, campo_principal, campo_desempate):
+        return getattr(obj, campo_principal), getattr(obj, campo_desempate)
+
+    def decode_cursor(self, request, model, campo_principal, campo_desempate):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            dados = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            valor, chave = dados['p']
+            reverso = bool(dados.get('r', False))
+            if valor is not None:
+                valor = model._meta.get_field(campo_principal).to_python(valor)
+            chave = model._meta.get_field(campo_desempate).to_python(chave)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return (valor, chave), reverso
+
+    def encode_cursor(self, posicao, reverso):
+        valor, chave = posicao
+        if hasattr(valor, 'isoformat'):
+            valor = valor.isoformat()
+        if hasattr(chave, 'isoformat'):
+            chave = chave.isoformat()
+        dados = {'p': [valor, chave]}
+        if reverso:
+            dados['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(dados, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.ultimo, reverso=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.primeiro is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.primeiro, reverso=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.modo_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Use "cursor" para paginação por cursor (sem contagem total)',
+                'schema': {'type': 'string', 'enum': ['cursor']},
+            },
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor retornado em next/previous',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Itens por página (máximo {self.max_page_size})',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class PaginacaoCursorMixin:
+    """
+    Permite escolher a paginação por cursor em cada requisição
+
+    Com `?paginacao=cursor` (ou um `cursor` já retornado pela API) a lista
+    usa KeysetPagination ordenada por `cursor_ordering`; sem esses
+    parâmetros segue a paginação padrão por número de página.
+    """
+    cursor_pagination_class = KeysetPagination
+    cursor_ordering = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.cursor_ordering:
+            request = getattr(self, 'request', None)
+            if request is not None and cursor_solicitado(request):
+                self._paginator = self.cursor_pagination_class()
+        return super().paginator
@@ -0,0 +1,108 @@
+"""
+Parsers do cadastro
+"""
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+ABERTURA, ITEM_OU_FIM, ITEM, VIRGULA_OU_FIM = range(4)
+
+
+class JSONArrayStreamParser(BaseParser):
+    """
+    Lê um array JSON do corpo da requisição item a item
+
+    Retorna um gerador em vez da lista completa: o corpo é lido em blocos
+    e cada elemento é decodificado assim que chega, então um lote grande
+    não precisa caber inteiro na memória (nem passa pelo limite de
+    DATA_UPLOAD_MAX_MEMORY_SIZE de request.body).
+    """
+    media_type = 'application/json'
+    tamanho_bloco = 64 * 1024
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if stream is None:
+            raise ParseError('Corpo da requisição vazio')
+        return self._itens(stream, encoding)
+
+    def _itens(self, stream, encoding):
+        decoder = json.JSONDecoder()
+        leitor = codecs.getincrementaldecoder(encoding)()
+        buffer = ''
+        # O que pode vir a seguir: '[' no início; item ou ']' logo depois
+        # dele; só item depois de uma vírgula; vírgula ou ']' depois de um item
+        esperado = ABERTURA
+        fim = False
+        esgotado = False
+
+        while True:
+            if not esgotado:
+                bloco = stream.read(self.tamanho_bloco)
+                esgotado = not bloco
+                buffer += leitor.decode(bloco or b'', final=esgotado)
+
+            posicao = 0
+            while True:
+                posicao = _pular_espacos(buffer, posicao)
+                if posicao >= len(buffer):
+                    break
+                caractere = buffer[posicao]
+                if esperado == ABERTURA:
+                    if caractere != '[':
+                        raise ParseError('Era esperado um array JSON')
+                    esperado = ITEM_OU_FIM
+                    posicao += 1
+                    continue
+                if esperado == VIRGULA_OU_FIM:
+                    if caractere == ',':
+                        esperado = ITEM
+                        posicao += 1
+                        continue
+                    if caractere != ']':
+                        raise ParseError('Era esperado "," ou "]" entre os itens do array JSON')
+                if caractere == ']':
+                    if esperado == ITEM:
+                        raise ParseError('Vírgula antes do fim do array JSON')
+                    fim = True
+                    posicao += 1
+                    break
+                if caractere == ',':
+                    raise ParseError('Item vazio no array JSON')
+                try:
+                    item, posicao_final = decoder.raw_decode(buffer, posicao)
+                except json.JSONDecodeError as exc:
+                    if esgotado:
+                        raise ParseError(f'JSON inválido: {exc}')
+                    # Item incompleto: espera o próximo bloco
+                    break
+                if posicao_final == len(buffer) and not esgotado:
+                    # Um número no fim do bloco pode continuar no próximo
+                    break
+                posicao = posicao_final
+                esperado = VIRGULA_OU_FIM
+                yield item
+
+            buffer = buffer[posicao:]
+            if fim:
+                # Depois do ']' só pode haver espaços, até o fim do corpo
+                while True:
+                    if _pular_espacos(buffer, 0) < len(buffer):
+                        raise ParseError('Conteúdo após o fim do array JSON')
+                    if esgotado:
+                        return
+                    bloco = stream.read(self.tamanho_bloco)
+                    esgotado = not bloco
+                    buffer = leitor.decode(bloco or b'', final=esgotado)
+            if esgotado:
+                raise ParseError('Array JSON incompleto')
+
+
+def _pular_espacos(texto, posicao):
+    while posicao < len(texto) and texto[posicao] in ' \t\r\n':
+        posicao += 1
+    return posicao
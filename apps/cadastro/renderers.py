@@ -0,0 +1,96 @@
+"""
+Renderização JSON com orjson
+
+`ORJSONRenderer` produz a mesma saída do JSONRenderer do DRF (compacta,
+UTF-8, datas em ISO 8601 com 'Z' em UTC, Decimal como número), mas o
+encoder é nativo: os dicts/listas do serializer, textos e números são
+convertidos sem passar pelo json da biblioteca padrão. Datas, Decimal e
+os tipos que o orjson não conhece passam pelo `default` do encoder do DRF,
+que define o formato. O que o orjson não representa igual (inteiros além
+de 64 bits, NaN/Infinito) é codificado de novo pelo DRF, com o mesmo
+resultado ou o mesmo erro (STRICT_JSON). A única diferença em bytes é a
+notação de floats com expoente (1e16 no orjson, 1e+16 no DRF), com o
+mesmo valor.
+
+`codificar` é o mesmo encoder para uso fora do renderer, como nas
+exportações em streaming, que escrevem o array uma linha por vez.
+
+Sem o pacote orjson instalado (ou com UNICODE_JSON/COMPACT_JSON
+desligados, formatos que o orjson não gera), tudo volta ao encoder do DRF.
+"""
+import math
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Mesmas opções que o JSONRenderer passa ao json.dumps
+_encoder_drf = JSONEncoder(
+    ensure_ascii=not api_settings.UNICODE_JSON, allow_nan=not api_settings.STRICT_JSON,
+    separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '),
+)
+_NATIVO = orjson is not None and api_settings.UNICODE_JSON and api_settings.COMPACT_JSON
+_OPCOES = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+
+def _padrao(obj):
+    valor = _encoder_drf.default(obj)
+    if isinstance(valor, float) and not math.isfinite(valor):
+        # Decimal('NaN'): o orjson escreveria null; o DRF decide
+        raise TypeError
+    return valor
+
+
+def _tem_nao_finito(dados):
+    """Indica se há float NaN/Infinito, que o orjson escreve como null"""
+    pendentes = [dados]
+    while pendentes:
+        atual = pendentes.pop()
+        for valor in (atual.values() if isinstance(atual, dict) else atual):
+            tipo = type(valor)
+            # Atalho para os tipos mais comuns nas respostas
+            if tipo is str or valor is None or tipo is int or tipo is bool:
+                continue
+            if isinstance(valor, float):
+                if not math.isfinite(valor):
+                    return True
+            elif isinstance(valor, (dict, list, tuple)):
+                pendentes.append(valor)
+    return False
+
+
+def _escapar_separadores(conteudo):
+    # U+2028/U+2029 são válidos em JSON mas não em JavaScript; o DRF os escapa
+    if b'\xe2\x80\xa8' in conteudo or b'\xe2\x80\xa9' in conteudo:
+        conteudo = conteudo.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return conteudo
+
+
+def codificar(dados):
+    """JSON compacto em bytes, igual ao do JSONRenderer do DRF"""
+    if _NATIVO:
+        try:
+            conteudo = orjson.dumps(dados, default=_padrao, option=_OPCOES)
+        except orjson.JSONEncodeError:
+            # Inteiro além de 64 bits, Decimal não finito, tipo que o DRF recusa
+            conteudo = None
+        # null também vem de NaN/Infinito; só então a estrutura é percorrida
+        if conteudo is not None and not (b'null' in conteudo and _tem_nao_finito(dados)):
+            return _escapar_separadores(conteudo)
+    return _escapar_separadores(_encoder_drf.encode(dados).encode('utf-8'))
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer com encoder nativo; ?indent / Accept com indent usam o do DRF"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not _NATIVO or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return codificar(data)
@@ -0,0 +1,104 @@
+"""
+Busca por nome sem acento e por similaridade de trigramas
+
+No PostgreSQL os campos de nome são comparados via
+public.f_unaccent(lower(campo)), que é a mesma expressão dos índices GIN
+(gin_trgm_ops) criados pelo comando `manage.py criar_indices`. Assim
+"JOAO" encontra "João", a busca usa índice em vez de varrer a tabela e
+os resultados vêm ordenados por relevância. Em outros bancos (ex.: SQLite
+dos testes) ou sem as extensões instaladas, cai no SearchFilter padrão.
+"""
+from django.conf import settings
+from django.contrib.postgres.lookups import TrigramSimilar
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import F, Func, Q, TextField, Value
+from django.db.models.lookups import Contains
+from rest_framework import filters
+
+from .models import DemandaEducacao, Desaparecido, Membro, Responsavel
+
+
+# Colunas de nome com índice de trigramas: (model, campo)
+INDICES_TRIGRAMA = [
+    (Responsavel, 'nome'),
+    (Responsavel, 'nome_mae'),
+    (Responsavel, 'bairro'),
+    (Membro, 'nome'),
+    (DemandaEducacao, 'nome'),
+    (Desaparecido, 'nome_desaparecido'),
+]
+
+_disponibilidade = {}
+
+
+class SemAcento(Func):
+    """public.f_unaccent(lower(expr)) — wrapper IMMUTABLE criado por criar_indices"""
+    template = 'public.f_unaccent(LOWER(%(expressions)s))'
+    arity = 1
+    output_field = TextField()
+
+
+def busca_indexada_disponivel(alias):
+    """Verifica (uma vez por processo) se pg_trgm e f_unaccent existem no banco"""
+    if not getattr(settings, 'CADASTRO_BUSCA_TRIGRAMA', True):
+        return False
+    conexao = connections[alias]
+    if conexao.vendor != 'postgresql':
+        return False
+    if alias not in _disponibilidade:
+        with conexao.cursor() as cursor:
+            cursor.execute(
+                "SELECT to_regprocedure('public.f_unaccent(text)') IS NOT NULL "
+                "AND EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+            )
+            _disponibilidade[alias] = cursor.fetchone()[0]
+    return _disponibilidade[alias]
+
+
+class BuscaNomeFilter(filters.SearchFilter):
+    """
+    SearchFilter com busca sem acento e por trigramas nos campos de nome
+
+    A view lista em `trigram_search_fields` quais de seus `search_fields`
+    são nomes; os demais (CPF, CEP, telefone) continuam com icontains, mas
+    só entram na busca quando o termo tem dígitos, para que uma busca por
+    nome não caia numa varredura da tabela. Sem parâmetro `ordering`
+    explícito, os resultados são ordenados por relevância. Deve vir depois
+    do OrderingFilter em `filter_backends`.
+    """
+    relevancia = 'relevancia_busca'
+
+    def filter_queryset(self, request, queryset, view):
+        campos_nome = getattr(view, 'trigram_search_fields', None)
+        termos = self.get_search_terms(request)
+        if not campos_nome or not termos or not busca_indexada_disponivel(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+
+        search_fields = self.get_search_fields(view, request) or []
+        lookups = [
+            self.construct_search(str(campo))
+            for campo in search_fields if campo not in campos_nome
+        ]
+
+        condicoes = Q()
+        pontuacao = None
+        for termo in termos:
+            termo_normalizado = SemAcento(Value(termo))
+            condicao = Q()
+            if any(caractere.isdigit() for caractere in termo):
+                for lookup in lookups:
+                    condicao |= Q(**{lookup: termo})
+            for campo in campos_nome:
+                coluna = SemAcento(campo)
+                condicao |= Q(Contains(coluna, termo_normalizado))
+                condicao |= Q(TrigramSimilar(coluna, termo_normalizado))
+                similaridade = TrigramSimilarity(coluna, termo_normalizado)
+                pontuacao = similaridade if pontuacao is None else pontuacao + similaridade
+            condicoes &= condicao
+
+        queryset = queryset.annotate(**{self.relevancia: pontuacao}).filter(condicoes)
+        if filters.OrderingFilter.ordering_param not in request.query_params:
+            queryset = queryset.order_by(F(self.relevancia).desc(), *queryset.query.order_by)
+        return queryset
+
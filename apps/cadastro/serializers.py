@@ -1,11 +1,73 @@
 # backend/apps/cadastro/serializers.py
 from rest_framework import serializers
-from drf_spectacular.utils import extend_schema_field
+
+from utils.validators import MENSAGENS_CPF, NAO_NUMERICO, TAMANHO_INVALIDO, VALIDO, situacao_cpf
+
 from .models import (
     Alojamento, CepAtingido, DemandaAmbiente, DemandaEducacao,
     DemandaHabitacao, DemandaInterna, DemandaSaude, Desaparecido,
     Membro, Responsavel
 )
+from .intervalos import indice_ceps
+
+
+class ContagemRelacionadaField(serializers.IntegerField):
+    """
+    Total de objetos de uma relação reversa (ex.: membro_set)
+
+    Lê a anotação aplicada pelo ConsultaOtimizadaMixin; sem ela (objeto
+    recém-criado, por exemplo) faz a contagem diretamente.
+    """
+
+    def __init__(self, relacao, **kwargs):
+        self.relacao = relacao
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def bind(self, field_name, parent):
+        super().bind(field_name, parent)
+        self.anotacao = f'_total_{field_name}'
+
+    def to_representation(self, instance):
+        total = getattr(instance, self.anotacao, None)
+        if total is None:
+            total = getattr(instance, self.relacao).count()
+        return total
+
+
+class EnderecoAtingidoField(serializers.BooleanField):
+    """
+    Indica se o endereço (cep, numero) está numa faixa de cep_atingido
+
+    Consulta o índice em memória das faixas, sem acesso ao banco por linha.
+    """
+    colunas = ('cep', 'numero')
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return indice_ceps.contem(instance.cep, instance.numero)
+
+
+class CPFValidadoMixin:
+    """
+    Valida o campo cpf com a mesma regra da validação em lote
+    (utils.validators). Os dígitos verificadores só são conferidos quando o
+    CPF é novo ou muda, para que registros antigos com CPF fora da regra
+    continuem editáveis.
+    """
+
+    def validate_cpf(self, value):
+        situacao = situacao_cpf(value)
+        if situacao in (TAMANHO_INVALIDO, NAO_NUMERICO):
+            raise serializers.ValidationError(MENSAGENS_CPF[situacao])
+        if situacao != VALIDO and getattr(self.instance, 'cpf', None) != value:
+            raise serializers.ValidationError(MENSAGENS_CPF[situacao])
+        return value
 
 
 class AlojamentoSerializer(serializers.ModelSerializer):
@@ -20,34 +82,20 @@ class CepAtingidoSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class ResponsavelSerializer(serializers.ModelSerializer):
+class ResponsavelSerializer(CPFValidadoMixin, serializers.ModelSerializer):
+    endereco_atingido = EnderecoAtingidoField()
+
     class Meta:
         model = Responsavel
         fields = '__all__'
-        
-    def validate_cpf(self, value):
-        """Validação básica de CPF"""
-        if len(value) != 11:
-            raise serializers.ValidationError("CPF deve ter 11 dígitos")
-        if not value.isdigit():
-            raise serializers.ValidationError("CPF deve conter apenas números")
-        return value
 
 
-class MembroSerializer(serializers.ModelSerializer):
+class MembroSerializer(CPFValidadoMixin, serializers.ModelSerializer):
     cpf_responsavel_nome = serializers.CharField(source='cpf_responsavel.nome', read_only=True)
     
     class Meta:
         model = Membro
         fields = '__all__'
-        
-    def validate_cpf(self, value):
-        """Validação básica de CPF"""
-        if len(value) != 11:
-            raise serializers.ValidationError("CPF deve ter 11 dígitos")
-        if not value.isdigit():
-            raise serializers.ValidationError("CPF deve conter apenas números")
-        return value
 
 
 class DemandaAmbienteSerializer(serializers.ModelSerializer):
@@ -58,89 +106,53 @@ class DemandaAmbienteSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class DemandaEducacaoSerializer(serializers.ModelSerializer):
+class DemandaEducacaoSerializer(CPFValidadoMixin, serializers.ModelSerializer):
     class Meta:
         model = DemandaEducacao
         fields = '__all__'
-        
-    def validate_cpf(self, value):
-        """Validação básica de CPF"""
-        if len(value) != 11:
-            raise serializers.ValidationError("CPF deve ter 11 dígitos")
-        if not value.isdigit():
-            raise serializers.ValidationError("CPF deve conter apenas números")
-        return value
 
 
-class DemandaHabitacaoSerializer(serializers.ModelSerializer):
+class DemandaHabitacaoSerializer(CPFValidadoMixin, serializers.ModelSerializer):
+    distancia = serializers.SerializerMethodField()
+    # `distancia` vem da anotação do ProximidadeFilter, não de uma coluna
+    colunas_dos_metodos = {'distancia': ()}
+
     class Meta:
         model = DemandaHabitacao
         fields = '__all__'
-        
-    def validate_cpf(self, value):
-        """Validação básica de CPF"""
-        if len(value) != 11:
-            raise serializers.ValidationError("CPF deve ter 11 dígitos")
-        if not value.isdigit():
-            raise serializers.ValidationError("CPF deve conter apenas números")
-        return value
+
+    def get_distancia(self, obj):
+        """Distância em metros até o ponto de ?near= (nula sem ?near=)"""
+        distancia = getattr(obj, 'distancia', None)
+        return None if distancia is None else round(distancia, 1)
 
 
-class DemandaInternaSerializer(serializers.ModelSerializer):
+class DemandaInternaSerializer(CPFValidadoMixin, serializers.ModelSerializer):
     class Meta:
         model = DemandaInterna
         fields = '__all__'
-        
-    def validate_cpf(self, value):
-        """Validação básica de CPF"""
-        if len(value) != 11:
-            raise serializers.ValidationError("CPF deve ter 11 dígitos")
-        if not value.isdigit():
-            raise serializers.ValidationError("CPF deve conter apenas números")
-        return value
 
 
-class DemandaSaudeSerializer(serializers.ModelSerializer):
+class DemandaSaudeSerializer(CPFValidadoMixin, serializers.ModelSerializer):
     class Meta:
         model = DemandaSaude
         fields = '__all__'
-        
-    def validate_cpf(self, value):
-        """Validação básica de CPF"""
-        if len(value) != 11:
-            raise serializers.ValidationError("CPF deve ter 11 dígitos")
-        if not value.isdigit():
-            raise serializers.ValidationError("CPF deve conter apenas números")
-        return value
 
 
-class DesaparecidoSerializer(serializers.ModelSerializer):
+class DesaparecidoSerializer(CPFValidadoMixin, serializers.ModelSerializer):
     class Meta:
         model = Desaparecido
         fields = '__all__'
-        
-    def validate_cpf(self, value):
-        """Validação básica de CPF"""
-        if len(value) != 11:
-            raise serializers.ValidationError("CPF deve ter 11 dígitos")
-        if not value.isdigit():
-            raise serializers.ValidationError("CPF deve conter apenas números")
-        return value
 
 
 # Serializers com relacionamentos detalhados
 class ResponsavelComMembrosSerializer(serializers.ModelSerializer):
     membros = MembroSerializer(source='membro_set', many=True, read_only=True)
-    total_membros = serializers.SerializerMethodField()
+    total_membros = ContagemRelacionadaField('membro_set')
     
     class Meta:
         model = Responsavel
         fields = '__all__'
-        
-    @extend_schema_field(serializers.IntegerField)
-    def get_total_membros(self, obj) -> int:
-        """Retorna o total de membros associados ao responsável"""
-        return obj.membro_set.count()
 
 
 class ResponsavelComDemandasSerializer(serializers.ModelSerializer):
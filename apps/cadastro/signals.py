@@ -0,0 +1,54 @@
+"""
+Sinais do cadastro
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import versoes
+from .models import (
+    Alojamento, CepAtingido, DemandaAmbiente, DemandaEducacao, DemandaHabitacao,
+    DemandaInterna, DemandaSaude, Desaparecido, Membro, Responsavel
+)
+
+# Enviado depois de gravações em lote que não disparam post_save/post_delete
+# (bulk_create, COPY). Argumentos: sender=model, chaves=lista de PKs
+# gravadas ou None quando não se sabe quais (ex.: carga de planilha).
+lote_gravado = Signal()
+
+# Enviado dentro da transação, logo antes de uma gravação em lote
+# (sender=model, chaves=lista de PKs ou None, using=alias). Os receptores
+# podem ler o estado anterior dessas linhas e gravar junto com elas;
+# lote_gravado vem depois do commit com as mesmas chaves.
+lote_gravando = Signal()
+
+
+@receiver(post_save, sender=CepAtingido)
+@receiver(post_delete, sender=CepAtingido)
+@receiver(lote_gravado, sender=CepAtingido)
+def invalidar_indice_ceps(sender, **kwargs):
+    from .intervalos import indice_ceps
+    # Só depois do commit, para nenhum processo remontar com dados antigos
+    transaction.on_commit(indice_ceps.invalidar)
+
+
+MODELS_VERSIONADOS = (
+    Alojamento, CepAtingido, Responsavel, Membro, DemandaAmbiente, DemandaEducacao,
+    DemandaHabitacao, DemandaInterna, DemandaSaude, Desaparecido,
+)
+
+
+def renovar_versao(sender, **kwargs):
+    # Na hora, para quem ler antes do commit, e depois dele, para quem
+    # montou uma resposta com o token novo mas os dados ainda antigos
+    versoes.renovar(sender)
+    transaction.on_commit(partial(versoes.renovar, sender))
+
+
+for model in MODELS_VERSIONADOS:
+    uid = f'versao_{model._meta.db_table}'
+    post_save.connect(renovar_versao, sender=model, dispatch_uid=uid)
+    post_delete.connect(renovar_versao, sender=model, dispatch_uid=uid)
+    lote_gravado.connect(renovar_versao, sender=model, dispatch_uid=uid)
@@ -0,0 +1,249 @@
+"""
+Dados sintéticos para testes de carga do cadastro
+
+Gera famílias realistas (responsável, membros e demandas de todos os
+tipos) em arquivos CSV, um por tabela, no formato aceito por
+`carga.carregar`. A mesma semente gera sempre os mesmos registros (as
+datas são relativas ao dia da geração), então os resultados de
+benchmarks de commits diferentes são comparáveis.
+
+Os CPFs são válidos e únicos: a pessoa n recebe como base o n-ésimo
+múltiplo de um número primo com 10^9 (uma permutação dos 9 dígitos),
+com os dígitos verificadores calculados. Os responsáveis moram, na
+maioria, dentro das faixas de numeração dos CEPs atingidos gerados.
+"""
+import csv
+import datetime
+import random
+from pathlib import Path
+
+from django.utils import timezone
+
+ORDEM_CARGA = (
+    'cep_atingido', 'responsavel', 'membro', 'demanda_ambiente', 'demanda_educacao',
+    'demanda_habitacao', 'demanda_interna', 'demanda_saude',
+)
+
+CABECALHOS = {
+    'cep_atingido': ['cep', 'logradouro', 'num_inicial', 'num_final', 'municipio', 'uf', 'bairro'],
+    'responsavel': [
+        'cpf', 'nome', 'cep', 'numero', 'complemento', 'telefone', 'bairro', 'logradouro',
+        'nome_mae', 'data_nasc', 'timestamp', 'status', 'cod_rge',
+    ],
+    'membro': ['cpf', 'nome', 'cpf_responsavel', 'timestamp', 'status'],
+    'demanda_ambiente': [
+        'cpf', 'quantidade', 'especie', 'acompanha_tutor', 'vacinado', 'vac_raiva', 'vac_v8v10',
+        'nec_racao', 'castrado', 'porte', 'evolucao',
+    ],
+    'demanda_educacao': [
+        'cpf', 'cpf_responsavel', 'nome', 'genero', 'alojamento', 'data_nasc', 'unidade_ensino',
+        'turno', 'demanda', 'evolucao',
+    ],
+    'demanda_habitacao': [
+        'cpf', 'latitude', 'longitude', 'area_verde', 'ocupacao', 'material', 'relacao_imovel',
+        'uso_imovel', 'cod_rge', 'evolucao',
+    ],
+    'demanda_interna': ['cpf', 'demanda', 'data', 'status', 'evolucao'],
+    'demanda_saude': [
+        'cpf', 'genero', 'saude_cid', 'data_nasc', 'gest_puer_nutriz', 'mob_reduzida',
+        'cuida_outrem', 'pcd_ou_mental', 'alergia_intol', 'subs_psicoativas', 'med_controlada',
+        'local_ref', 'evolucao',
+    ],
+}
+
+PRENOMES = (
+    'Ana', 'Maria', 'Juliana', 'Fernanda', 'Patrícia', 'Aline', 'Camila', 'Letícia', 'Bruna',
+    'Gabriela', 'Luana', 'Sandra', 'Rosane', 'Vera', 'Cláudia', 'Débora', 'Helena', 'Alice',
+    'João', 'José', 'Carlos', 'Paulo', 'Pedro', 'Lucas', 'Marcos', 'Luiz', 'Gabriel', 'Rafael',
+    'Daniel', 'Rodrigo', 'Eduardo', 'Fábio', 'André', 'Vitor', 'Mateus', 'Gustavo', 'Miguel',
+    'Arthur', 'Davi', 'Heitor',
+)
+SOBRENOMES = (
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima',
+    'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes',
+    'Vieira', 'Barbosa', 'Rocha', 'Dias', 'Nascimento', 'Andrade', 'Moreira', 'Nunes', 'Marques',
+    'Machado', 'Mendes', 'Freitas', 'Schmidt', 'Becker', 'Schneider', 'Müller', 'Weber', 'Kunz',
+)
+MUNICIPIOS = (
+    ('Porto Alegre', 900), ('Canoas', 920), ('São Leopoldo', 930), ('Novo Hamburgo', 933),
+    ('Eldorado do Sul', 927), ('Guaíba', 928), ('Esteio', 932), ('Sapucaia do Sul', 932),
+)
+BAIRROS = (
+    'Centro', 'Mathias Velho', 'Harmonia', 'Rio Branco', 'Fátima', 'Santos Dumont', 'Vicentina',
+    'Scharlau', 'Arquipélago', 'Sarandi', 'Humaitá', 'Navegantes', 'Menino Deus', 'Cidade Baixa',
+    'Canudos', 'Rondônia', 'Campina', 'Feitoria', 'Niterói', 'Estância Velha',
+)
+TIPOS_LOGRADOURO = ('Rua', 'Avenida', 'Travessa', 'Beco')
+DEMANDAS_INTERNAS = (
+    'Cesta básica', 'Kit higiene', 'Kit limpeza', 'Colchão', 'Roupas', 'Documentação',
+    'Auxílio aluguel', 'Transporte', 'Água potável',
+)
+CIDS = ('F32', 'F41', 'E11', 'I10', 'J45', 'G40', 'F20', 'Q90', 'M54', 'N18')
+MATERIAIS = ('Alvenaria', 'Madeira', 'Mista', 'Pré-moldado')
+EVOLUCOES = (
+    'Aguardando atendimento', 'Em acompanhamento', 'Encaminhado à rede', 'Atendido',
+    'Visita agendada', 'Sem contato', None,
+)
+
+# Distribuição do número de membros por família (0 a 6)
+PESOS_MEMBROS = (22, 24, 21, 16, 10, 5, 2)
+
+# Multiplicador da permutação das bases de CPF; primo com 10^9
+_PASSO_CPF = 387420489
+
+
+def cpf_valido(base):
+    """CPF (11 dígitos) com os verificadores calculados para a base de 9 dígitos"""
+    digitos = [int(d) for d in f'{base:09d}']
+    for tamanho in (9, 10):
+        soma = sum(d * peso for d, peso in zip(digitos, range(tamanho + 1, 1, -1)))
+        digitos.append(soma * 10 % 11 % 10)
+    return ''.join(map(str, digitos))
+
+
+class _Pessoas:
+    """Sequência de CPFs válidos, únicos e espalhados"""
+
+    def __init__(self):
+        self._indice = 0
+
+    def proximo(self):
+        while True:
+            self._indice += 1
+            base = f'{self._indice * _PASSO_CPF % 10 ** 9:09d}'
+            if len(set(base)) > 1:
+                return cpf_valido(int(base))
+
+
+def _nome(aleatorio, sobrenome=None):
+    sobrenome = sobrenome or aleatorio.choice(SOBRENOMES)
+    return f'{aleatorio.choice(PRENOMES)} {aleatorio.choice(SOBRENOMES)} {sobrenome}'
+
+
+def _nascimento(aleatorio, hoje, idade_min, idade_max):
+    return (hoje - datetime.timedelta(days=aleatorio.randrange(idade_min * 365, idade_max * 365 + 1))).isoformat()
+
+
+def _sim_nao(aleatorio, chance_sim=0.5):
+    return 'S' if aleatorio.random() < chance_sim else 'N'
+
+
+def _saude(aleatorio, cpf, hoje, idade_min, idade_max):
+    return [
+        cpf, aleatorio.choice(('Feminino', 'Masculino')), aleatorio.choice(CIDS) if aleatorio.random() < 0.6 else '',
+        _nascimento(aleatorio, hoje, idade_min, idade_max), _sim_nao(aleatorio, 0.05),
+        _sim_nao(aleatorio, 0.1), _sim_nao(aleatorio, 0.1), _sim_nao(aleatorio, 0.08),
+        aleatorio.choice(('', '', '', 'Lactose', 'Glúten', 'Dipirona')),
+        '', aleatorio.choice(('', '', 'Fluoxetina', 'Clonazepam', 'Insulina')),
+        aleatorio.choice(('UBS Centro', 'UBS Mathias Velho', 'Hospital de Campanha', '')),
+        aleatorio.choice(EVOLUCOES) or '',
+    ]
+
+
+def _gerar_ceps(aleatorio, quantidade):
+    ceps = {}
+    while len(ceps) < quantidade:
+        municipio, prefixo = aleatorio.choice(MUNICIPIOS)
+        cep = f'{prefixo}{aleatorio.randrange(10 ** 5):05d}'
+        if cep in ceps:
+            continue
+        inicio = aleatorio.choice((1, 1, 1, 100, 300, 500))
+        ceps[cep] = [
+            cep,
+            f'{aleatorio.choice(TIPOS_LOGRADOURO)} {aleatorio.choice(PRENOMES)} {aleatorio.choice(SOBRENOMES)}',
+            inicio, inicio + aleatorio.randrange(100, 2000), municipio, 'RS', aleatorio.choice(BAIRROS),
+        ]
+    return list(ceps.values())
+
+
+def gerar(destino, familias, ceps=2000, semente=42, ao_progredir=None):
+    """
+    Escreve um CSV por tabela em `destino` e retorna {tabela: linhas gravadas}
+
+    `ao_progredir(familias geradas)` é chamado a cada 100 mil famílias.
+    """
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    aleatorio = random.Random(semente)
+    pessoas = _Pessoas()
+    agora = timezone.now()
+    hoje = agora.date()
+    contagens = dict.fromkeys(ORDEM_CARGA, 0)
+
+    arquivos = {tabela: open(destino / f'{tabela}.csv', 'w', newline='', encoding='utf-8') for tabela in ORDEM_CARGA}
+    try:
+        escritores = {tabela: csv.writer(arquivo) for tabela, arquivo in arquivos.items()}
+
+        def escrever(tabela, linha):
+            escritores[tabela].writerow(linha)
+            contagens[tabela] += 1
+
+        for tabela, escritor in escritores.items():
+            escritor.writerow(CABECALHOS[tabela])
+        enderecos = _gerar_ceps(aleatorio, ceps)
+        for endereco in enderecos:
+            escrever('cep_atingido', endereco)
+
+        for familia in range(1, familias + 1):
+            cpf = pessoas.proximo()
+            sobrenome = aleatorio.choice(SOBRENOMES)
+            cep, logradouro, inicio, fim, _, _, bairro = aleatorio.choice(enderecos)
+            # Uma parte das famílias mora fora da faixa atingida do CEP
+            numero = aleatorio.randint(inicio, fim) if aleatorio.random() < 0.9 else fim + aleatorio.randint(1, 500)
+            cadastrado_em = (agora - datetime.timedelta(seconds=aleatorio.randrange(180 * 86400))).isoformat()
+            escrever('responsavel', [
+                cpf, _nome(aleatorio, sobrenome), cep, numero,
+                aleatorio.choice(('', '', '', 'Casa 2', 'Fundos', f'Apto {aleatorio.randrange(1, 400)}')),
+                f'519{aleatorio.randrange(10 ** 8):08d}', bairro, logradouro[:100],
+                _nome(aleatorio), _nascimento(aleatorio, hoje, 18, 90), cadastrado_em,
+                aleatorio.choice('AAAAAAAAAI'), aleatorio.randrange(10 ** 9) if aleatorio.random() < 0.6 else '',
+            ])
+
+            if aleatorio.random() < 0.15:
+                escrever('demanda_ambiente', [
+                    cpf, aleatorio.randint(1, 4), aleatorio.choice(('Cão', 'Gato', 'Cão e gato', 'Ave')),
+                    _sim_nao(aleatorio, 0.7), _sim_nao(aleatorio, 0.6), _sim_nao(aleatorio, 0.5),
+                    _sim_nao(aleatorio, 0.4), _sim_nao(aleatorio, 0.8), _sim_nao(aleatorio, 0.4),
+                    aleatorio.choice('PMG'), aleatorio.choice(EVOLUCOES) or '',
+                ])
+            if aleatorio.random() < 0.4:
+                escrever('demanda_habitacao', [
+                    cpf, f'-29.{aleatorio.randrange(10 ** 8):08d}', f'-51.{aleatorio.randrange(10 ** 8):08d}',
+                    _sim_nao(aleatorio, 0.2), _sim_nao(aleatorio, 0.3), aleatorio.choice(MATERIAIS),
+                    aleatorio.choice(('Próprio', 'Alugado', 'Cedido', 'Ocupação')),
+                    aleatorio.choice(('Residência', 'Misto', 'Comércio')),
+                    aleatorio.randrange(10 ** 9), aleatorio.choice(EVOLUCOES) or '',
+                ])
+            if aleatorio.random() < 0.3:
+                escrever('demanda_interna', [
+                    cpf, aleatorio.choice(DEMANDAS_INTERNAS),
+                    (hoje - datetime.timedelta(days=aleatorio.randrange(180))).isoformat(),
+                    aleatorio.choice(('A', 'A', 'C', 'E', '')), aleatorio.choice(EVOLUCOES) or '',
+                ])
+            if aleatorio.random() < 0.1:
+                escrever('demanda_saude', _saude(aleatorio, cpf, hoje, 18, 90))
+
+            membros = aleatorio.choices(range(len(PESOS_MEMBROS)), weights=PESOS_MEMBROS)[0]
+            for _ in range(membros):
+                cpf_membro = pessoas.proximo()
+                idade = aleatorio.choice((aleatorio.randint(0, 17), aleatorio.randint(0, 17), aleatorio.randint(18, 90)))
+                escrever('membro', [cpf_membro, _nome(aleatorio, sobrenome), cpf, cadastrado_em, 'A'])
+                if 4 <= idade <= 17 and aleatorio.random() < 0.5:
+                    escrever('demanda_educacao', [
+                        cpf_membro, cpf, _nome(aleatorio, sobrenome), aleatorio.choice(('F', 'M')),
+                        aleatorio.randrange(1, 60) if aleatorio.random() < 0.3 else '',
+                        _nascimento(aleatorio, hoje, idade, idade), aleatorio.randrange(1, 400),
+                        aleatorio.choice(('Manhã', 'Tarde', 'Integral')),
+                        aleatorio.choice(('Vaga', 'Transporte escolar', 'Material escolar', 'Uniforme')),
+                        aleatorio.choice(EVOLUCOES) or '',
+                    ])
+                if aleatorio.random() < 0.08:
+                    escrever('demanda_saude', _saude(aleatorio, cpf_membro, hoje, idade, idade))
+
+            if ao_progredir and familia % 100000 == 0:
+                ao_progredir(familia)
+    finally:
+        for arquivo in arquivos.values():
+            arquivo.close()
+    return contagens
+
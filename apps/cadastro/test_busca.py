@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.backends.postgresql.base import DatabaseWrapper
+from django.test import TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .management.commands.criar_indices import indices_trigrama
+from .models import Responsavel
+from .search import BuscaNomeFilter, busca_indexada_disponivel
+from .views import ResponsavelViewSet
+
+
+class BuscaNomeFilterTests(TestCase):
+
+    def _consulta(self, termo):
+        """SQL da busca como o PostgreSQL a receberia (só compila, sem conectar)"""
+        request = Request(APIRequestFactory().get('/', {'search': termo}))
+        with mock.patch('apps.cadastro.search.busca_indexada_disponivel', return_value=True):
+            queryset = BuscaNomeFilter().filter_queryset(request, Responsavel.objects.all(), ResponsavelViewSet())
+        postgresql = DatabaseWrapper({**connection.settings_dict, 'ENGINE': 'django.db.backends.postgresql'})
+        return queryset.query.get_compiler(connection=postgresql).as_sql()[0]
+
+    def test_nomes_comparados_sem_acento_e_por_relevancia(self):
+        sql = self._consulta('joao')
+        self.assertIn('public.f_unaccent(LOWER("responsavel"."nome")) %% (public.f_unaccent(LOWER(%s)))', sql)
+        self.assertIn('AS "relevancia_busca"', sql)
+        self.assertTrue(sql.endswith('DESC'))
+        # Sem dígitos no termo, CPF e CEP ficam fora do WHERE
+        self.assertNotIn('UPPER("responsavel"."cpf"::text) LIKE', sql)
+
+    def test_termo_com_digitos_tambem_busca_documentos(self):
+        self.assertIn('UPPER("responsavel"."cpf"::text) LIKE', self._consulta('0123'))
+
+    def test_sem_postgresql_usa_busca_padrao(self):
+        if connection.vendor != 'postgresql':
+            self.assertFalse(busca_indexada_disponivel('default'))
+        with override_settings(CADASTRO_BUSCA_TRIGRAMA=False):
+            self.assertFalse(busca_indexada_disponivel('default'))
+
+    def test_indices_de_trigrama(self):
+        nomes = dict(indices_trigrama(connection.ops.quote_name))
+        sql = nomes['responsavel_nome_trgm_idx']
+        self.assertIn('CONCURRENTLY IF NOT EXISTS', sql)
+        self.assertIn('gin (public.f_unaccent(lower("nome")) gin_trgm_ops)', sql)
+
+
+class BuscaApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        for i, nome in enumerate(('Maria Souza', 'João Silva', 'Pedro Souza')):
+            Responsavel.objects.create(cpf=f'{i:011d}', nome=nome, cep='93000000', numero=i)
+
+    def test_busca_por_nome(self):
+        dados = self.client.get('/api/v1/cadastro/responsaveis/', {'search': 'souza'}).json()
+        self.assertEqual(sorted(r['nome'] for r in dados['results']), ['Maria Souza', 'Pedro Souza'])
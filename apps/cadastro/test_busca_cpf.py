@@ -0,0 +1,85 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from . import busca_cpf
+from .models import DemandaEducacao, DemandaInterna
+from .test_consultas import criar_familias
+
+URL = '/api/v1/cadastro/responsaveis/buscar-lote/'
+URL_MEMBROS = '/api/v1/cadastro/membros/buscar-lote/'
+
+
+class BuscaLoteTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        criar_familias(0, 6)
+        DemandaInterna.objects.create(cpf='00000000001', demanda='Cesta básica', data=datetime.date(2024, 5, 4))
+        for j in range(2):
+            DemandaEducacao.objects.create(cpf=f'9000000010{j}', cpf_responsavel='00000000001',
+                                           nome=f'Membro 1.{j}')
+
+    def _buscar(self, url, corpo):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.post(url, corpo, format='json')
+        self.assertEqual(resposta.status_code, 200, resposta.content)
+        return resposta.json(), len(consultas)
+
+    def test_encontrados_nao_encontrados_e_invalidos(self):
+        dados, _ = self._buscar(URL, {'cpfs': ['000.000.000-01', '52998224725', '123', '00000000001']})
+        self.assertEqual(list(dados['encontrados']), ['00000000001'])
+        self.assertEqual(dados['encontrados']['00000000001']['nome'], 'Pessoa 1')
+        self.assertEqual(dados['nao_encontrados'], ['52998224725'])
+        self.assertEqual(dados['invalidos'], ['123'])
+
+    def test_membros_e_demandas(self):
+        dados, _ = self._buscar(URL, {'cpfs': ['00000000001', '00000000002'], 'incluir': ['membros', 'demandas']})
+        familia = dados['encontrados']['00000000001']
+        self.assertEqual([m['cpf'] for m in familia['membros']], ['90000000100', '90000000101'])
+        self.assertEqual(familia['demandas']['interna']['demanda'], 'Cesta básica')
+        self.assertEqual(len(familia['demandas']['educacao']), 2)
+        self.assertIsNone(familia['demandas']['saude'])
+        self.assertEqual(dados['encontrados']['00000000002']['demandas']['educacao'], [])
+
+        dados, _ = self._buscar(URL_MEMBROS, {'cpfs': ['90000000100'], 'incluir': ['demandas']})
+        self.assertEqual(dados['encontrados']['90000000100']['demandas']['educacao']['nome'], 'Membro 1.0')
+
+    def test_consultas_nao_dependem_do_numero_de_pessoas(self):
+        corpo = {'incluir': ['membros', 'demandas']}
+        # A primeira serialização carrega o índice de CEPs atingidos do processo
+        self._buscar(URL, {**corpo, 'cpfs': ['00000000000']})
+        _, poucas = self._buscar(URL, {**corpo, 'cpfs': ['00000000001']})
+        _, muitas = self._buscar(URL, {**corpo, 'cpfs': [f'{i:011d}' for i in range(6)]})
+        self.assertEqual(muitas, poucas)
+
+    def test_blocos(self):
+        cpfs = [f'{i:011d}' for i in range(6)]
+        self._buscar(URL, {'cpfs': cpfs})
+        _, um_bloco = self._buscar(URL, {'cpfs': cpfs})
+        with mock.patch.object(busca_cpf, 'TAMANHO_BLOCO', 2):
+            dados, tres_blocos = self._buscar(URL, {'cpfs': cpfs})
+        self.assertEqual(list(dados['encontrados']), cpfs)
+        self.assertEqual(tres_blocos, um_bloco + 2)
+
+    @override_settings(CADASTRO_BUSCA_LOTE_MAX_CPFS=2)
+    def test_pedido_invalido(self):
+        for url, corpo in (
+            (URL, {'cpfs': ['00000000001'] * 3}),
+            (URL, {'cpfs': '00000000001'}),
+            (URL, {'cpfs': [], 'incluir': ['outra']}),
+            (URL, {'cpfs': [], 'incluir': [['membros']]}),
+            (URL_MEMBROS, {'cpfs': [], 'incluir': ['membros']}),
+        ):
+            with self.subTest(url=url, corpo=corpo):
+                resposta = self.client.post(url, corpo, format='json')
+                self.assertEqual(resposta.status_code, 400)
+                self.assertIn('detail', resposta.json())
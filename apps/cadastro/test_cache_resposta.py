@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import Alojamento
+from .views import AlojamentoViewSet
+
+URL = '/api/v1/cadastro/alojamentos/'
+
+
+class RespostaEmCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Alojamento.objects.create(nome='Ginásio')
+
+    def test_acerto_sem_consultas_e_com_os_mesmos_cabecalhos(self):
+        primeira = self.client.get(URL)
+        with self.assertNumQueries(0):
+            segunda = self.client.get(URL)
+        self.assertEqual(segunda.content, primeira.content)
+        for cabecalho in ('ETag', 'Content-Type', 'Vary', 'Allow', 'Cache-Control'):
+            with self.subTest(cabecalho=cabecalho):
+                self.assertEqual(segunda[cabecalho], primeira[cabecalho])
+
+    def test_cabecalhos_definidos_pela_acao_voltam_no_acerto(self):
+        listar = AlojamentoViewSet.list
+
+        def listar_com_idioma(view, request, *args, **kwargs):
+            resposta = listar(view, request, *args, **kwargs)
+            resposta['Content-Language'] = 'pt-br'
+            return resposta
+
+        with mock.patch.object(AlojamentoViewSet, 'list', listar_com_idioma):
+            self.client.get(URL)
+        self.assertEqual(self.client.get(URL)['Content-Language'], 'pt-br')
+
+    def test_if_none_match_depois_do_acerto(self):
+        etag = self.client.get(URL)['ETag']
+        self.assertEqual(self.client.get(URL)['ETag'], etag)
+        self.assertEqual(self.client.get(URL, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_gravacao_invalida(self):
+        self.client.get(URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            Alojamento.objects.create(nome='Escola')
+        nomes = [a['nome'] for a in self.client.get(URL).json()['results']]
+        self.assertEqual(sorted(nomes), ['Escola', 'Ginásio'])
+
+    def test_query_string_faz_parte_da_chave(self):
+        self.client.get(URL)
+        self.assertEqual(self.client.get(URL, {'nome': 'Escola'}).json()['results'], [])
@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from .mixins import colunas_da_consulta, planejar_consulta
+from .models import Membro, Responsavel
+from .serializers import ResponsavelComMembrosSerializer, ResponsavelSerializer
+from .test_consultas import criar_familias
+
+URL = '/api/v1/cadastro/responsaveis/'
+
+
+class ResponsavelComCpfsSerializer(serializers.ModelSerializer):
+    cpfs_membros = serializers.PrimaryKeyRelatedField(source='membro_set', many=True, read_only=True)
+
+    class Meta:
+        model = Responsavel
+        fields = ['cpf', 'nome', 'cpfs_membros']
+
+
+class ColunasDaConsultaTests(TestCase):
+
+    def test_campos_simples(self):
+        self.assertEqual(colunas_da_consulta(ResponsavelSerializer, frozenset({'nome', 'status'})),
+                         ('cpf', 'nome', 'status'))
+
+    def test_acessor_reverso_so_precisa_da_chave(self):
+        campos = frozenset({'nome', 'membros', 'total_membros'})
+        self.assertEqual(colunas_da_consulta(ResponsavelComMembrosSerializer, campos), ('cpf', 'nome'))
+        self.assertEqual(colunas_da_consulta(ResponsavelComCpfsSerializer, frozenset({'cpfs_membros'})), ('cpf',))
+
+    def test_relacao_many_vira_prefetch(self):
+        model, plano = planejar_consulta(ResponsavelComCpfsSerializer).prefetch['membro_set']
+        self.assertIs(model, Membro)
+        self.assertIsNone(plano)
+
+
+class CamposSolicitadosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        criar_familias(0, 3)
+
+    def _get(self, url, **params):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url, params)
+        self.assertEqual(resposta.status_code, 200, resposta.content)
+        return resposta.json(), [c['sql'] for c in consultas if 'FROM "responsavel"' in c['sql']]
+
+    def test_fields_corta_saida_e_colunas(self):
+        dados, sqls = self._get(URL, fields='cpf,nome')
+        self.assertEqual(set(dados['results'][0]), {'cpf', 'nome'})
+        principal = sqls[-1]
+        self.assertIn('"responsavel"."nome"', principal)
+        self.assertNotIn('"responsavel"."nome_mae"', principal)
+
+    def test_omit(self):
+        dados, _ = self._get(URL, omit='endereco_atingido,nome_mae')
+        self.assertNotIn('nome_mae', dados['results'][0])
+        self.assertIn('logradouro', dados['results'][0])
+
+    def test_membros_com_poucas_colunas(self):
+        dados, sqls = self._get(f'{URL}00000000000/com_membros/', fields='cpf,membros')
+        self.assertEqual(set(dados), {'cpf', 'membros'})
+        self.assertEqual(len(dados['membros']), 2)
+        self.assertNotIn('"responsavel"."nome_mae"', sqls[-1])
+
+    def test_campo_desconhecido(self):
+        resposta = self.client.get(URL, {'fields': 'cpf,idade'})
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('idade', resposta.json()['fields'])
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase
+
+from apps.operacional.models import Alteracao
+
+from .carga import (
+    ErroCarga, carregar, classificar_documentos, colunas_do_model, ler_csv, ler_xlsx,
+    processar_bloco, validar_cabecalho, validar_linha
+)
+from .models import Responsavel
+from utils.validators import VALIDO
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+CABECALHO = ['cpf', 'nome', 'cep', 'numero']
+
+
+class ValidacaoLinhasTests(TestCase):
+
+    def _validar(self, linha):
+        situacoes = {coluna: valores[0] for coluna, valores in classificar_documentos(CABECALHO, [linha]).items()}
+        return validar_linha(colunas_do_model(Responsavel), CABECALHO, linha, situacoes)
+
+    def test_documentos_numericos_mantem_zeros_a_esquerda(self):
+        # Como o XLSX entrega CPF e CEP guardados como número
+        self.assertEqual(self._validar([1234567890, 'Ana', 1310100, 10.0])[:3], ['01234567890', 'Ana', '01310100'])
+        self.assertEqual(self._validar([12345678909.0, 'Bia', 93000000.0, 1])[0], '12345678909')
+
+    def test_documentos_formatados(self):
+        self.assertEqual(self._validar(['012.345.678-90', 'Ana', '93000-000', '7'])[::2], ['01234567890', '93000000'])
+        situacoes = classificar_documentos(CABECALHO, [[1234567890, 'Ana', 1310100, 1]])
+        self.assertEqual(situacoes, {'cpf': [VALIDO], 'cep': [VALIDO]})
+
+    def test_linhas_rejeitadas(self):
+        for linha, motivo in (
+            (['12345678900', 'Ana', '93000000', 1], 'cpf:'),
+            (['12345678909', 'Ana', '9300', 1], 'cep:'),
+            (['12345678909', '', '93000000', 1], 'nome: Campo obrigatório'),
+            (['12345678909', 'Ana'], 'Esperadas 4 colunas'),
+        ):
+            with self.subTest(linha=linha):
+                with self.assertRaisesMessage(ValidationError, motivo):
+                    self._validar(linha)
+
+    def test_cabecalho(self):
+        validar_cabecalho(Responsavel, CABECALHO)
+        with self.assertRaisesMessage(ErroCarga, 'Colunas desconhecidas'):
+            validar_cabecalho(Responsavel, CABECALHO + ['idade'])
+        with self.assertRaisesMessage(ErroCarga, 'chave primária'):
+            validar_cabecalho(Responsavel, ['nome', 'cep', 'numero'])
+        with self.assertRaisesMessage(ErroCarga, 'numero'):
+            validar_cabecalho(Responsavel, ['cpf', 'nome', 'cep'])
+
+
+class LeituraArquivosTests(TestCase):
+
+    def _arquivo(self, sufixo):
+        descritor, caminho = tempfile.mkstemp(suffix=sufixo)
+        os.close(descritor)
+        self.addCleanup(os.remove, caminho)
+        return caminho
+
+    def test_csv(self):
+        caminho = self._arquivo('.csv')
+        with open(caminho, 'w', encoding='utf-8-sig') as arquivo:
+            arquivo.write('CPF;Nome\n01234567890;Ana\n')
+        cabecalho, linhas = ler_csv(caminho, delimitador=';')
+        self.assertEqual((cabecalho, list(linhas)), (['cpf', 'nome'], [['01234567890', 'Ana']]))
+
+    @unittest.skipIf(openpyxl is None, 'openpyxl não instalado')
+    def test_xlsx_com_cpf_numerico(self):
+        caminho = self._arquivo('.xlsx')
+        livro = openpyxl.Workbook()
+        livro.active.append(CABECALHO)
+        livro.active.append([1234567890, 'Ana', 1310100, 10])
+        livro.save(caminho)
+
+        cabecalho, linhas = ler_xlsx(caminho)
+        linhas = list(linhas)
+        situacoes = {coluna: valores[0] for coluna, valores in classificar_documentos(cabecalho, linhas).items()}
+        valores = validar_linha(colunas_do_model(Responsavel), cabecalho, linhas[0], situacoes)
+        self.assertEqual(valores, ['01234567890', 'Ana', '01310100', 10])
+
+    def test_carga_exige_postgresql(self):
+        if connection.vendor != 'postgresql':
+            with self.assertRaisesMessage(ErroCarga, 'PostgreSQL'):
+                carregar('responsavel', CABECALHO, iter([]))
+        with self.assertRaisesMessage(ErroCarga, 'Tabela não suportada'):
+            carregar('auth_user', CABECALHO, iter([]))
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'COPY só no PostgreSQL')
+class ProcessarBlocoTests(TestCase):
+
+    def test_grava_e_conta_chaves_repetidas_uma_vez(self):
+        linhas = [
+            ['01234567890', 'Ana', '93000000', '1'],
+            ['01234567890', 'Ana Maria', '93000000', '1'],
+            ['12345678909', 'Bruno', '93000000', '2'],
+            ['123', 'Inválido', '93000000', '3'],
+        ]
+        gravadas, rejeitadas = processar_bloco('default', 'responsavel', CABECALHO, 2, linhas)
+        self.assertEqual(gravadas, 2)
+        self.assertEqual([numero for numero, _, _ in rejeitadas], [5])
+        self.assertEqual(Responsavel.objects.get(cpf='01234567890').nome, 'Ana Maria')
+        # lote_gravando roda na transação do bloco: o log de sincronização vem junto
+        self.assertTrue(Alteracao.objects.filter(modelo='responsavel', operacao=Alteracao.CARGA).exists())
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from . import versoes
+from .models import CepAtingido, Membro, Responsavel
+from .serializers import ResponsavelSerializer
+
+URL = '/api/v1/cadastro/responsaveis/'
+
+
+class RespostaCondicionalTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        self.responsavel = Responsavel.objects.create(cpf='00000000000', nome='Ana', cep='93000000', numero=1)
+
+    def _etag(self, url):
+        resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('no-cache', resposta['Cache-Control'])
+        return resposta['ETag']
+
+    def test_if_none_match_igual_responde_304_sem_serializar(self):
+        for url in (f'{URL}00000000000/', f'{URL}00000000000/com_membros/', URL):
+            with self.subTest(url=url):
+                etag = self._etag(url)
+                with mock.patch.object(ResponsavelSerializer, 'to_representation') as serializar:
+                    resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                serializar.assert_not_called()
+                self.assertEqual(resposta.status_code, 304)
+                self.assertEqual(resposta['ETag'], etag)
+                self.assertEqual(resposta.content, b'')
+
+    def test_detalhe_em_304_consulta_so_a_linha(self):
+        url = f'{URL}00000000000/'
+        etag = self._etag(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_alteracao_troca_o_etag(self):
+        url = f'{URL}00000000000/com_membros/'
+        etag = self._etag(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Membro.objects.create(cpf='00000000191', nome='Filho', cpf_responsavel=self.responsavel)
+        resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+
+    def test_alteracao_fora_da_aplicacao_no_detalhe(self):
+        url = f'{URL}00000000000/'
+        etag = self._etag(url)
+        # Sem sinal, o token não muda; o conteúdo da linha entra no ETag do detalhe
+        Responsavel.objects.filter(pk='00000000000').update(nome='Ana Maria')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_modified_since(self):
+        with mock.patch.object(versoes, '_novo_token', return_value='1000000000.000000-abc'):
+            versoes.renovar(Responsavel, CepAtingido)
+        resposta = self.client.get(URL)
+        self.assertEqual(resposta['Last-Modified'], http_date(1000000000))
+        resposta = self.client.get(URL, HTTP_IF_MODIFIED_SINCE=http_date(1000000000))
+        self.assertEqual(resposta.status_code, 304)
@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .mixins import planejar_consulta
+from .models import Membro, Responsavel
+from .serializers import MembroSerializer, ResponsavelComMembrosSerializer, ResponsavelSerializer
+
+
+def criar_familias(inicio, total, membros=2):
+    for i in range(inicio, inicio + total):
+        responsavel = Responsavel.objects.create(cpf=f'{i:011d}', nome=f'Pessoa {i}', cep='93000000', numero=i)
+        for j in range(membros):
+            Membro.objects.create(cpf=f'9{i:08d}{j:02d}', nome=f'Membro {i}.{j}', cpf_responsavel=responsavel)
+
+
+class PlanoConsultaTests(TestCase):
+
+    def test_source_pontuado_vira_select_related(self):
+        plano = planejar_consulta(MembroSerializer)
+        self.assertEqual(plano.select, {'cpf_responsavel'})
+        self.assertEqual(plano.prefetch, {})
+
+    def test_aninhado_many_vira_prefetch_com_plano_do_filho(self):
+        plano = planejar_consulta(ResponsavelComMembrosSerializer)
+        model, filho = plano.prefetch['membro_set']
+        self.assertIs(model, Membro)
+        self.assertEqual(filho.select, {'cpf_responsavel'})
+        self.assertEqual(plano.contagens, {'_total_total_membros': 'membro'})
+
+    def test_campos_limitam_o_plano(self):
+        plano = planejar_consulta(ResponsavelComMembrosSerializer, frozenset({'cpf', 'nome'}))
+        self.assertEqual((plano.select, plano.prefetch, plano.contagens), (set(), {}, {}))
+        self.assertEqual(planejar_consulta(ResponsavelSerializer).select, set())
+
+
+class ConsultasPorPaginaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+
+    def _consultas(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        return len(consultas)
+
+    def test_numero_de_consultas_nao_cresce_com_as_linhas(self):
+        criar_familias(0, 2)
+        poucas = self._consultas('/api/v1/cadastro/membros/')
+        criar_familias(2, 8)
+        self.assertEqual(self._consultas('/api/v1/cadastro/membros/'), poucas)
+
+    def test_detalhe_com_membros(self):
+        criar_familias(0, 1, membros=5)
+        with CaptureQueriesContext(connection) as consultas:
+            dados = self.client.get('/api/v1/cadastro/responsaveis/00000000000/com_membros/').json()
+        self.assertEqual(dados['total_membros'], 5)
+        self.assertEqual({m['cpf_responsavel_nome'] for m in dados['membros']}, {'Pessoa 0'})
+        self.assertFalse([c['sql'] for c in consultas if 'COUNT' in c['sql'] and 'GROUP BY' not in c['sql']])
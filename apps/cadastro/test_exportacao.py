@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+import unittest
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.operacional.models import Alteracao
+
+from .export import iterar_snapshot
+from .models import Responsavel
+
+URL = '/api/v1/cadastro/responsaveis/exportar/'
+
+
+class ExportacaoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        for i in range(5):
+            Responsavel.objects.create(cpf=f'{i:011d}', nome=f'Pessoa {i}', cep='93000000', numero=i,
+                                       status='A' if i % 2 else 'I')
+
+    def _exportar(self, **params):
+        resposta = self.client.get(URL, params)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.streaming)
+        return resposta, b''.join(resposta.streaming_content).decode()
+
+    def test_ndjson_com_filtros(self):
+        resposta, corpo = self._exportar(status='A')
+        self.assertEqual(resposta['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        linhas = [json.loads(linha) for linha in corpo.splitlines()]
+        self.assertEqual(sorted(linha['cpf'] for linha in linhas), ['00000000001', '00000000003'])
+
+    def test_csv(self):
+        resposta, corpo = self._exportar(formato='csv')
+        self.assertIn('filename="responsavel.csv"', resposta['Content-Disposition'])
+        linhas = list(csv.DictReader(io.StringIO(corpo)))
+        self.assertEqual(len(linhas), 5)
+        self.assertEqual(sorted(linha['nome'] for linha in linhas)[0], 'Pessoa 0')
+
+    def test_array_json(self):
+        _, corpo = self._exportar(formato='json')
+        self.assertEqual(len(json.loads(corpo)), 5)
+
+    def test_formato_invalido(self):
+        self.assertEqual(self.client.get(URL, {'formato': 'xml'}).status_code, 400)
+
+    def test_dentro_de_transacao_com_consultas(self):
+        # No PostgreSQL, trocar o nível de isolamento aqui falharia
+        with transaction.atomic():
+            Responsavel.objects.count()
+            cpfs = [r.cpf for r in iterar_snapshot(Responsavel.objects.order_by('cpf'), chunk_size=2)]
+        self.assertEqual(len(cpfs), 5)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Snapshot REPEATABLE READ só no PostgreSQL')
+class SnapshotPostgresqlTests(TransactionTestCase):
+
+    def test_transacao_repeatable_read_somente_leitura(self):
+        for i in range(3):
+            Alteracao.objects.create(modelo='responsavel', chave=str(i), operacao=Alteracao.GRAVACAO,
+                                     registrado_em=timezone.now())
+        objetos = iterar_snapshot(Alteracao.objects.order_by('id'), chunk_size=1)
+        next(objetos)
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW transaction_isolation')
+            self.assertEqual(cursor.fetchone()[0], 'repeatable read')
+            cursor.execute('SHOW transaction_read_only')
+            self.assertEqual(cursor.fetchone()[0], 'on')
+        self.assertEqual(len(list(objetos)), 2)
@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .intervalos import IndiceFaixas, indice_ceps
+from .models import CepAtingido
+
+URL = '/api/v1/cadastro/ceps-atingidos/verificar/'
+
+
+class IndiceFaixasTests(TestCase):
+
+    def test_faixas_mescladas(self):
+        indice = IndiceFaixas([('93000000', 1, 10), ('93000000', 8, 20), ('93000000', 40, 30)])
+        self.assertEqual(indice.faixas['93000000'], ([1, 30], [20, 40]))
+        for numero, atingido in ((0, False), (1, True), (15, True), (20, True), (25, False), (35, True), (41, False)):
+            with self.subTest(numero=numero):
+                self.assertIs(indice.contem('93000000', numero), atingido)
+
+    def test_faixas_abertas_e_cep_ausente(self):
+        indice = IndiceFaixas([('93000000', None, 10), ('93000001', 5, None), ('93000002', None, None)])
+        self.assertTrue(indice.contem('93000000', -3))
+        self.assertFalse(indice.contem('93000000', 11))
+        self.assertTrue(indice.contem('93000001', 10 ** 9))
+        self.assertTrue(indice.contem('93000002', 1))
+        self.assertTrue(indice.contem('93000000', None))
+        self.assertFalse(indice.contem('99999999', 1))
+
+
+class VerificarTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        indice_ceps.invalidar()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        with self.captureOnCommitCallbacks(execute=True):
+            CepAtingido.objects.create(cep='93000000', logradouro='Rua A', num_inicial=1, num_final=100,
+                                       municipio='Canoas', uf='RS')
+
+    def test_get_normaliza_cep(self):
+        dados = self.client.get(URL, {'cep': '93000-000', 'numero': '50'}).json()
+        self.assertEqual(dados, {'cep': '93000000', 'numero': 50, 'atingido': True})
+        self.assertFalse(self.client.get(URL, {'cep': '93000000', 'numero': '101'}).json()['atingido'])
+
+    def test_post_em_lote(self):
+        resposta = self.client.post(URL, {'enderecos': [
+            {'cep': '93.000-000', 'numero': 1}, {'cep': '93000001', 'numero': 1},
+        ]}, format='json')
+        self.assertEqual([r['atingido'] for r in resposta.json()['resultados']], [True, False])
+
+    def test_cep_mal_formado(self):
+        for cep in ('9300000', '930000001', 'abc'):
+            with self.subTest(cep=cep):
+                resposta = self.client.get(URL, {'cep': cep, 'numero': '1'})
+                self.assertEqual(resposta.status_code, 400)
+        resposta = self.client.post(URL, {'enderecos': [{'cep': '93000000'}, {'cep': '123'}]}, format='json')
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('item 1', resposta.json()['detail'])
+
+    def test_gravacao_invalida_o_indice(self):
+        self.assertFalse(indice_ceps.contem('93100000', 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            CepAtingido.objects.create(cep='93100000', logradouro='Rua B', municipio='Canoas', uf='RS')
+        self.assertTrue(indice_ceps.contem('93100000', 1))
@@ -0,0 +1,103 @@
+import io
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from .models import Membro, Responsavel
+from .parsers import JSONArrayStreamParser
+
+URL = '/api/v1/cadastro/responsaveis/familias-lote/'
+
+
+def familia(cpf, nome, membros=()):
+    return {
+        'responsavel': {'cpf': cpf, 'nome': nome, 'cep': '93000000', 'numero': 1},
+        'membros': [{'cpf': membro, 'nome': f'Membro {membro}'} for membro in membros],
+    }
+
+
+class JSONArrayStreamParserTests(TestCase):
+
+    def _ler(self, corpo, tamanho_bloco=3):
+        parser = JSONArrayStreamParser()
+        parser.tamanho_bloco = tamanho_bloco
+        return list(parser.parse(io.BytesIO(corpo.encode()), parser_context={}))
+
+    def test_arrays_validos(self):
+        casos = {
+            '[]': [],
+            '  [ ]  ': [],
+            '[1, 2 ,3]': [1, 2, 3],
+            '[{"a": [1,2]}, "x,]"]': [{'a': [1, 2]}, 'x,]'],
+        }
+        for corpo, esperado in casos.items():
+            with self.subTest(corpo=corpo):
+                self.assertEqual(self._ler(corpo), esperado)
+                self.assertEqual(self._ler(corpo, tamanho_bloco=64 * 1024), esperado)
+
+    def test_arrays_mal_formados(self):
+        for corpo in ('[1 2]', '[,,]', '[1,]', '[,1]', '[1,,2]', '[1] x', '[1', '[1}', '{"a": 1}', ''):
+            with self.subTest(corpo=corpo):
+                with self.assertRaises(ParseError):
+                    self._ler(corpo)
+
+
+class FamiliasLoteTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+
+    def _enviar(self, lote):
+        with self.captureOnCommitCallbacks(execute=True):
+            resposta = self.client.post(URL, lote, format='json')
+        self.assertEqual(resposta.status_code, 200, resposta.content)
+        return resposta.json()
+
+    def test_resultado_por_linha(self):
+        dados = self._enviar([
+            familia('52998224725', 'Ana', ['11144477735']),
+            familia('123', 'Inválido'),
+            familia('12345678909', 'Bruno'),
+        ])
+        self.assertEqual(
+            {chave: dados[chave] for chave in ('total', 'criados', 'atualizados', 'erros')},
+            {'total': 3, 'criados': 2, 'atualizados': 0, 'erros': 1},
+        )
+        primeiro, invalido, terceiro = dados['resultados']
+        self.assertEqual((primeiro['indice'], primeiro['status']), (0, 'criado'))
+        self.assertEqual(primeiro['membros'], {'criados': 1, 'atualizados': 0})
+        self.assertEqual((invalido['indice'], invalido['status']), (1, 'erro'))
+        self.assertIn('responsavel', invalido['erros'])
+        self.assertEqual(terceiro['status'], 'criado')
+        self.assertEqual(Responsavel.objects.count(), 2)
+        self.assertEqual(Membro.objects.get(cpf='11144477735').cpf_responsavel_id, '52998224725')
+
+    def test_reenvio_atualiza(self):
+        lote = [familia('52998224725', 'Ana', ['11144477735'])]
+        self._enviar(lote)
+        lote[0]['responsavel']['nome'] = 'Ana Maria'
+        dados = self._enviar(lote)
+        self.assertEqual((dados['criados'], dados['atualizados']), (0, 1))
+        self.assertEqual(dados['resultados'][0]['membros'], {'criados': 0, 'atualizados': 1})
+        self.assertEqual(Responsavel.objects.get(cpf='52998224725').nome, 'Ana Maria')
+
+    def test_cpf_repetido_no_lote(self):
+        dados = self._enviar([
+            familia('52998224725', 'Ana', ['11144477735']),
+            familia('52998224725', 'Ana Maria', ['11144477735']),
+        ])
+        self.assertEqual([r['status'] for r in dados['resultados']], ['criado', 'atualizado'])
+        self.assertEqual((dados['criados'], dados['atualizados']), (1, 1))
+        self.assertEqual(dados['resultados'][1]['membros'], {'criados': 0, 'atualizados': 1})
+        self.assertEqual(Responsavel.objects.get(cpf='52998224725').nome, 'Ana Maria')
+
+    def test_array_mal_formado(self):
+        resposta = self.client.post(URL, '[{"responsavel": {}} {"responsavel": {}}]',
+                                    content_type='application/json')
+        self.assertEqual(resposta.status_code, 400)
+        self.assertFalse(Responsavel.objects.exists())
@@ -0,0 +1,127 @@
+import base64
+import datetime
+import json
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .models import Responsavel
+from .pagination import KeysetPagination
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        base = timezone.now().replace(microsecond=0)
+        for i in range(23):
+            # Empates de três em três no timestamp e um nulo a cada cinco
+            timestamp = None if i % 5 == 0 else base - datetime.timedelta(minutes=i // 3)
+            Responsavel.objects.create(
+                cpf=f'{i:011d}', nome=f'Pessoa {i}', cep='93000000', numero=i,
+                timestamp=timestamp, status='A',
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def _esperado(self, ordering):
+        (principal, desempate) = ordering
+        linhas = list(Responsavel.objects.values_list('timestamp', 'cpf'))
+        nao_nulos = [linha for linha in linhas if linha[0] is not None]
+        nulos = [linha for linha in linhas if linha[0] is None]
+        # Ordenações estáveis: primeiro o desempate, depois o campo principal
+        nao_nulos.sort(key=lambda linha: linha[1], reverse=desempate.startswith('-'))
+        nao_nulos.sort(key=lambda linha: linha[0], reverse=principal.startswith('-'))
+        nulos.sort(key=lambda linha: linha[1], reverse=desempate.startswith('-'))
+        return [cpf for _, cpf in nao_nulos + nulos]
+
+    def _pagina(self, url, ordering):
+        paginador = KeysetPagination()
+        request = Request(APIRequestFactory().get(url))
+        pagina = paginador.paginate_queryset(
+            Responsavel.objects.all(), request, SimpleNamespace(cursor_ordering=ordering)
+        )
+        return [r.cpf for r in pagina], paginador.get_next_link(), paginador.get_previous_link()
+
+    def _percorrer(self, ordering, tamanho):
+        paginas, url = [], f'/?page_size={tamanho}'
+        while url:
+            cpfs, url, _ = self._pagina(url, ordering)
+            paginas.append(cpfs)
+        return paginas
+
+    def test_avanca_na_ordem_com_nulos_no_fim(self):
+        for ordering in (('-timestamp', '-cpf'), ('timestamp', 'cpf'), ('timestamp', '-cpf'), ('-timestamp', 'cpf')):
+            for tamanho in (1, 4, 5, 23, 50):
+                with self.subTest(ordering=ordering, tamanho=tamanho):
+                    paginas = self._percorrer(ordering, tamanho)
+                    self.assertEqual(sum(paginas, []), self._esperado(ordering))
+                    self.assertTrue(all(len(pagina) == tamanho for pagina in paginas[:-1]))
+
+    def test_volta_pelas_mesmas_paginas(self):
+        for ordering in (('-timestamp', '-cpf'), ('timestamp', '-cpf')):
+            with self.subTest(ordering=ordering):
+                ida, url = [], '/?page_size=4'
+                while url:
+                    cpfs, url, anterior = self._pagina(url, ordering)
+                    ida.append(cpfs)
+
+                volta = []
+                while anterior:
+                    cpfs, _, anterior = self._pagina(anterior, ordering)
+                    volta.append(cpfs)
+                self.assertEqual(volta, ida[-2::-1])
+
+    def test_cursor_sobre_linha_nula(self):
+        ordering = ('-timestamp', '-cpf')
+        esperado = self._esperado(ordering)
+        nulos = list(Responsavel.objects.filter(timestamp__isnull=True).order_by('-cpf').values_list('cpf', flat=True))
+        self.assertEqual(esperado[-len(nulos):], nulos)
+
+        posicao = esperado.index(nulos[1])
+        for reverso, pagina in ((False, esperado[posicao + 1:posicao + 4]), (True, esperado[posicao - 3:posicao])):
+            with self.subTest(reverso=reverso):
+                dados = {'p': [None, nulos[1]], 'r': 1} if reverso else {'p': [None, nulos[1]]}
+                cursor = base64.urlsafe_b64encode(json.dumps(dados).encode()).decode()
+                cpfs, _, _ = self._pagina(f'/?page_size=3&cursor={cursor}', ordering)
+                self.assertEqual(cpfs, pagina)
+
+    def test_cursor_invalido(self):
+        with self.assertRaises(NotFound):
+            self._pagina('/?cursor=nao-e-um-cursor', ('-timestamp', '-cpf'))
+
+
+class PaginacaoCursorApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        base = timezone.now()
+        for i in range(7):
+            Responsavel.objects.create(
+                cpf=f'{i:011d}', nome=f'Pessoa {i}', cep='93000000', numero=i, status='A',
+                timestamp=None if i == 3 else base - datetime.timedelta(minutes=i),
+            )
+
+    def test_lista_por_cursor(self):
+        url = '/api/v1/cadastro/responsaveis/?paginacao=cursor&page_size=3'
+        cpfs = []
+        while url:
+            dados = self.client.get(url).json()
+            self.assertNotIn('count', dados)
+            cpfs += [r['cpf'] for r in dados['results']]
+            url = dados['next']
+        self.assertEqual(cpfs, ['00000000000', '00000000001', '00000000002', '00000000004',
+                                '00000000005', '00000000006', '00000000003'])
+
+    def test_sem_cursor_mantem_paginacao_por_numero(self):
+        dados = self.client.get('/api/v1/cadastro/responsaveis/').json()
+        self.assertEqual(dados['count'], 7)
@@ -0,0 +1,63 @@
+import datetime
+import unittest
+import uuid
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from .models import DemandaInterna
+from .renderers import ORJSONRenderer, codificar, orjson
+from .serializers import DemandaInternaSerializer
+
+UTC = datetime.timezone.utc
+
+
+@unittest.skipIf(orjson is None, 'orjson não instalado')
+class ORJSONRendererTests(SimpleTestCase):
+
+    def assertMesmaSaida(self, dados):
+        esperado = JSONRenderer().render(dados, 'application/json', {})
+        self.assertEqual(ORJSONRenderer().render(dados, 'application/json', {}), esperado)
+        self.assertEqual(codificar(dados), esperado)
+
+    def test_mesma_saida_do_drf(self):
+        internas = [
+            DemandaInterna(cpf=f'{i:011d}', demanda='Cesta básica', data=datetime.date(2024, 5, i + 1),
+                           status=None if i % 2 else 'A', evolucao='Entregue em mãos ✓')
+            for i in range(3)
+        ]
+        self.assertMesmaSaida({
+            'results': DemandaInternaSerializer(internas, many=True).data,
+            'utc': datetime.datetime(2024, 5, 4, 12, 30, 15, 123456, tzinfo=UTC),
+            'utc_sem_fracao': datetime.datetime(2024, 5, 4, 12, 30, tzinfo=UTC),
+            'local': datetime.datetime(2024, 5, 4, 9, 30, 15, 120000, tzinfo=ZoneInfo('America/Sao_Paulo')),
+            'ingenua': datetime.datetime(2024, 5, 4, 9, 30, 15, 5),
+            'data': datetime.date(2024, 5, 4),
+            'hora': datetime.time(8, 15, 0, 250),
+            'duracao': datetime.timedelta(minutes=3, microseconds=5),
+            'decimal': Decimal('-29.68012345'),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'texto': 'São Leopoldo\u2028linha',
+            'lazy': gettext_lazy('Cadastro'),
+            'numeros': [0, -1, 2 ** 63 - 1, 0.1, 1.5, True, None],
+            'chaves': {1: 'um', None: 'nulo'},
+        })
+
+    def test_inteiro_alem_de_64_bits(self):
+        self.assertMesmaSaida({'grande': 2 ** 64, 'negativo': -(2 ** 70), 'lista': [1, 10 ** 30]})
+
+    def test_nao_finitos_falham_como_no_drf(self):
+        for valor in (float('nan'), float('inf'), Decimal('NaN'), [1.0, {'x': float('-inf')}]):
+            with self.subTest(valor=valor):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({'valor': valor})
+                with self.assertRaises(ValueError):
+                    ORJSONRenderer().render({'valor': valor})
+
+    def test_indentacao_usa_o_drf(self):
+        dados = {'a': [1, 2]}
+        self.assertEqual(ORJSONRenderer().render(dados, 'application/json; indent=2', {}),
+                         JSONRenderer().render(dados, 'application/json; indent=2', {}))
@@ -0,0 +1,91 @@
+import csv
+import datetime
+import io
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from utils.validators import VALIDO, situacao_cpf
+
+from . import sinteticos
+from .carga import TABELAS, classificar_documentos, colunas_do_model, validar_cabecalho, validar_linha
+
+AGORA = datetime.datetime(2024, 5, 10, 12, 0, tzinfo=datetime.timezone.utc)
+
+
+def ler(destino, tabela):
+    with open(Path(destino) / f'{tabela}.csv', newline='', encoding='utf-8') as arquivo:
+        linhas = list(csv.reader(arquivo))
+    return linhas[0], linhas[1:]
+
+
+class GeradorTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pasta = tempfile.TemporaryDirectory()
+        with mock.patch.object(timezone, 'now', return_value=AGORA):
+            cls.contagens = sinteticos.gerar(cls.pasta.name, 500, ceps=50, semente=7)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pasta.cleanup()
+        super().tearDownClass()
+
+    def test_todas_as_tabelas_com_linhas_aceitas_pela_carga(self):
+        for tabela in sinteticos.ORDEM_CARGA:
+            with self.subTest(tabela=tabela):
+                cabecalho, linhas = ler(self.pasta.name, tabela)
+                self.assertEqual(len(linhas), self.contagens[tabela])
+                self.assertGreater(len(linhas), 0)
+                model = TABELAS[tabela]
+                validar_cabecalho(model, cabecalho)
+                campos = colunas_do_model(model)
+                situacoes = classificar_documentos(cabecalho, linhas)
+                for posicao, linha in enumerate(linhas):
+                    validar_linha(campos, cabecalho, linha,
+                                  {coluna: valores[posicao] for coluna, valores in situacoes.items()})
+
+    def test_cpfs_validos_e_unicos(self):
+        _, responsaveis = ler(self.pasta.name, 'responsavel')
+        _, membros = ler(self.pasta.name, 'membro')
+        cpfs = [linha[0] for linha in responsaveis + membros]
+        self.assertEqual(len(responsaveis), 500)
+        self.assertEqual(len(set(cpfs)), len(cpfs))
+        self.assertEqual({situacao_cpf(cpf) for cpf in cpfs}, {VALIDO})
+        self.assertLessEqual({linha[2] for linha in membros}, {linha[0] for linha in responsaveis})
+
+    def test_responsaveis_nos_ceps_atingidos(self):
+        _, ceps = ler(self.pasta.name, 'cep_atingido')
+        faixas = {cep: (int(inicio), int(fim)) for cep, _, inicio, fim, *_ in ceps}
+        _, responsaveis = ler(self.pasta.name, 'responsavel')
+        self.assertLessEqual({linha[2] for linha in responsaveis}, set(faixas))
+        dentro = sum(faixas[linha[2]][0] <= int(linha[3]) <= faixas[linha[2]][1] for linha in responsaveis)
+        self.assertGreater(dentro / len(responsaveis), 0.8)
+        self.assertLess(dentro, len(responsaveis))
+
+    def test_mesma_semente_mesmos_registros(self):
+        with tempfile.TemporaryDirectory() as outra, mock.patch.object(timezone, 'now', return_value=AGORA):
+            sinteticos.gerar(outra, 500, ceps=50, semente=7)
+            for tabela in sinteticos.ORDEM_CARGA:
+                with self.subTest(tabela=tabela):
+                    self.assertEqual(ler(outra, tabela), ler(self.pasta.name, tabela))
+
+    def test_cpf_valido(self):
+        self.assertEqual(sinteticos.cpf_valido(529982247), '52998224725')
+        self.assertEqual(sinteticos.cpf_valido(1234567), '00123456797')
+
+
+class ComandoGerarSinteticosTests(SimpleTestCase):
+
+    def test_somente_arquivos(self):
+        saida = io.StringIO()
+        with tempfile.TemporaryDirectory() as destino:
+            call_command('gerar_sinteticos', familias=20, ceps=5, destino=destino, somente_arquivos=True, stdout=saida)
+            self.assertEqual(len(ler(destino, 'responsavel')[1]), 20)
+        self.assertIn('responsavel: 20 linhas', saida.getvalue())
@@ -0,0 +1,107 @@
+import random
+import unittest
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from utils import validators
+from utils.validators import (
+    DIGITO_VERIFICADOR, DIGITOS_REPETIDOS, NAO_NUMERICO, TAMANHO_INVALIDO, VALIDO,
+    classificar_ceps, classificar_cpfs, situacao_cep, situacao_cpf
+)
+
+from .models import Responsavel
+from .serializers import ResponsavelSerializer
+
+URL = '/api/v1/cadastro/validar-documentos/'
+
+
+def amostra_cpfs(total, semente=7):
+    """Mistura de CPFs válidos, alterados e mal formados"""
+    aleatorio = random.Random(semente)
+    cpfs = []
+    for _ in range(total):
+        base = ''.join(aleatorio.choice('0123456789') for _ in range(9))
+        cpf = base + str(validators._digito(base, range(10, 1, -1)))
+        cpf += str(validators._digito(cpf, range(11, 1, -1)))
+        sorteio = aleatorio.random()
+        if sorteio < 0.2:
+            cpf = cpf[:-1] + str((int(cpf[-1]) + 1) % 10)
+        elif sorteio < 0.3:
+            cpf = cpf[:aleatorio.randrange(12)]
+        elif sorteio < 0.35:
+            cpf = cpf[:5] + 'x' + cpf[6:]
+        elif sorteio < 0.4:
+            cpf = cpf[0] * 11
+        cpfs.append(cpf)
+    return cpfs + ['', None, '１２３４５６７８９０９', 'ção45678909']
+
+
+class ClassificacaoTests(SimpleTestCase):
+
+    def test_situacoes_de_um_cpf(self):
+        for cpf, situacao in (
+            ('01234567890', VALIDO), ('52998224725', VALIDO), ('52998224726', DIGITO_VERIFICADOR),
+            ('11111111111', DIGITOS_REPETIDOS), ('5299822472', TAMANHO_INVALIDO),
+            ('5299822472a', NAO_NUMERICO), (None, TAMANHO_INVALIDO),
+        ):
+            with self.subTest(cpf=cpf):
+                self.assertEqual(situacao_cpf(cpf), situacao)
+
+    @unittest.skipIf(validators.np is None, 'numpy não instalado')
+    def test_vetorizado_igual_ao_valor_a_valor(self):
+        cpfs = amostra_cpfs(5000)
+        self.assertEqual(classificar_cpfs(cpfs), [situacao_cpf('' if c is None else c) for c in cpfs])
+        self.assertIn(DIGITO_VERIFICADOR, classificar_cpfs(cpfs))
+        ceps = [cpf[:8] if cpf else cpf for cpf in cpfs]
+        self.assertEqual(classificar_ceps(ceps), [situacao_cep('' if c is None else c) for c in ceps])
+
+    def test_listas_pequenas_e_vazias(self):
+        self.assertEqual(classificar_cpfs([]), [])
+        self.assertEqual(classificar_cpfs(['52998224725', 52998224725]), [VALIDO, VALIDO])
+        self.assertEqual(classificar_ceps(['93000000', '9300000']), [VALIDO, TAMANHO_INVALIDO])
+
+
+class ValidarDocumentosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+
+    def test_lote_com_formatacao(self):
+        dados = self.client.post(URL, {'cpfs': ['529.982.247-25', '111.111.111-11'], 'ceps': ['93000-000']},
+                                 format='json').json()
+        self.assertEqual(dados['cpfs'], {'total': 2, 'resumo': {VALIDO: 1, DIGITOS_REPETIDOS: 1},
+                                         'resultados': [VALIDO, DIGITOS_REPETIDOS]})
+        self.assertEqual(dados['ceps']['resultados'], [VALIDO])
+
+    def test_somente_invalidos(self):
+        dados = self.client.post(f'{URL}?somente_invalidos=1', {'cpfs': ['52998224725', '52998224726']},
+                                 format='json').json()
+        self.assertEqual(dados['cpfs']['resultados'],
+                         [{'indice': 1, 'valor': '52998224726', 'situacao': DIGITO_VERIFICADOR}])
+
+    def test_corpo_invalido(self):
+        for corpo in ({}, {'cpfs': '52998224725'}, ['52998224725']):
+            with self.subTest(corpo=corpo):
+                self.assertEqual(self.client.post(URL, corpo, format='json').status_code, 400)
+
+
+class SerializerCpfTests(TestCase):
+
+    def _dados(self, cpf):
+        return {'cpf': cpf, 'nome': 'Ana', 'cep': '93000000', 'numero': 1}
+
+    def test_cpf_novo_exige_digitos_verificadores(self):
+        self.assertTrue(ResponsavelSerializer(data=self._dados('52998224725')).is_valid())
+        serializer = ResponsavelSerializer(data=self._dados('52998224726'))
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('cpf', serializer.errors)
+
+    def test_registro_antigo_com_cpf_fora_da_regra_continua_editavel(self):
+        antigo = Responsavel.objects.create(cpf='52998224726', nome='Ana', cep='93000000', numero=1)
+        serializer = ResponsavelSerializer(antigo, data={'cpf': '52998224726', 'nome': 'Ana Maria'}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
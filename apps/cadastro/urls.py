@@ -4,7 +4,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     AlojamentoViewSet, CepAtingidoViewSet, DemandaAmbienteViewSet,
     DemandaEducacaoViewSet, DemandaHabitacaoViewSet, DemandaInternaViewSet,
-    DemandaSaudeViewSet, DesaparecidoViewSet, MembroViewSet, ResponsavelViewSet
+    DemandaSaudeViewSet, DesaparecidoViewSet, MembroViewSet, ResponsavelViewSet,
+    sincronizar, validar_documentos
 )
 
 # Configuração do router
@@ -23,6 +24,8 @@ router.register(r'desaparecidos', DesaparecidoViewSet)
 app_name = 'cadastro'
 
 urlpatterns = [
+    path('validar-documentos/', validar_documentos, name='validar-documentos'),
+    path('sync/', sincronizar, name='sync'),
     # Router URLs direto (sem prefixo adicional)
     path('', include(router.urls)),
 ]
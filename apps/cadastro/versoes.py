@@ -0,0 +1,53 @@
+"""
+Versões dos models do cadastro
+
+Cada model tem um token no cache compartilhado, trocado a cada post_save,
+post_delete ou lote_gravado (na hora e de novo depois do commit). Um
+token igual ao de antes garante que nenhuma gravação feita pela aplicação
+aconteceu desde então, o que permite validar ETags e respostas guardadas
+sem consultar as tabelas.
+
+O token começa pelo instante da troca, usado como Last-Modified. Se o
+token some do cache (expurgo, reinício do Redis), um novo é criado, o que
+só invalida o que dependia dele.
+"""
+import time
+import uuid
+
+from django.core.cache import cache
+
+from utils.metricas import fase, registrar_cache
+
+PREFIXO = 'cadastro:versao:'
+
+
+def _chave(model):
+    return f'{PREFIXO}{model._meta.label_lower}'
+
+
+def _novo_token():
+    return f'{time.time():.6f}-{uuid.uuid4().hex[:12]}'
+
+
+def renovar(*models):
+    """Troca o token dos models informados"""
+    cache.set_many({_chave(model): _novo_token() for model in models}, timeout=None)
+
+
+def obter(models):
+    """Tokens atuais dos models, na mesma ordem"""
+    chaves = [_chave(model) for model in models]
+    with fase('cache'):
+        tokens = cache.get_many(chaves)
+    faltando = [chave for chave in chaves if chave not in tokens]
+    registrar_cache('versao', acertos=len(chaves) - len(faltando), faltas=len(faltando))
+    if faltando:
+        for chave in faltando:
+            cache.add(chave, _novo_token(), timeout=None)
+        tokens.update(cache.get_many(faltando))
+    return [tokens.get(chave) or _novo_token() for chave in chaves]
+
+
+def instante(token):
+    """Momento (epoch) em que o token foi criado"""
+    return float(token.split('-', 1)[0])
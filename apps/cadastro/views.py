@@ -1,9 +1,11 @@
 from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
 from django.db.models import Q
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from .models import (
     Alojamento, CepAtingido, DemandaAmbiente, DemandaEducacao,
     DemandaHabitacao, DemandaInterna, DemandaSaude, Desaparecido,
@@ -15,8 +17,124 @@ from .serializers import (
     DemandaSaudeSerializer, DesaparecidoSerializer, MembroSerializer,
     ResponsavelSerializer, ResponsavelComMembrosSerializer, ResponsavelComDemandasSerializer
 )
+from apps.operacional import pendencias, sincronizacao
+from apps.operacional.correspondencias import ORIGEM_DESAPARECIDO, TIPO as TIPO_NOMES
+from apps.operacional.espacial import ProximidadeFilter
+from apps.operacional.models import CorrespondenciaDesaparecido
+from apps.operacional.serializers import CorrespondenciaDesaparecidoSerializer
 
-class AlojamentoViewSet(viewsets.ReadOnlyModelViewSet):
+from .bulk import LoteMuitoGrande, gravar_familias
+from .busca_cpf import BuscaInvalida, buscar_membros, buscar_responsaveis
+from .intervalos import indice_ceps
+from .mixins import (
+    ConsultaOtimizadaMixin, ExportacaoMixin, GravacaoAtomicaMixin, RespostaCondicionalMixin,
+    RespostaEmCacheMixin
+)
+from .pagination import PaginacaoCursorMixin
+from .parsers import JSONArrayStreamParser
+from .search import BuscaNomeFilter
+from utils.validators import (
+    MENSAGEM_CEP, VALIDO, classificar_ceps, classificar_cpfs, limpar_documento, situacao_cep,
+)
+
+MAX_ENDERECOS_VERIFICACAO = 100000
+MAX_DOCUMENTOS_VALIDACAO = 1000000
+# Dados de referência (alojamentos, CEPs atingidos) mudam poucas vezes por dia
+VALIDADE_CACHE_REFERENCIA = 60 * 60
+
+
+def _resultado_validacao(valores, situacoes, somente_invalidos):
+    resumo = {}
+    for situacao in situacoes:
+        resumo[situacao] = resumo.get(situacao, 0) + 1
+    if somente_invalidos:
+        resultados = [
+            {'indice': indice, 'valor': valores[indice], 'situacao': situacao}
+            for indice, situacao in enumerate(situacoes) if situacao != VALIDO
+        ]
+    else:
+        resultados = situacoes
+    return {'total': len(situacoes), 'resumo': resumo, 'resultados': resultados}
+
+
+@extend_schema(
+    summary="Validação de CPFs e CEPs em lote",
+    description="Recebe {\"cpfs\": [...], \"ceps\": [...]} e classifica cada valor como valido, "
+                "tamanho_invalido, nao_numerico, digitos_repetidos ou digito_verificador. "
+                "Pontos, hífens, barras e espaços de formatação são ignorados.",
+    parameters=[
+        OpenApiParameter('somente_invalidos', OpenApiTypes.BOOL,
+                         description='Lista só os valores inválidos, com a posição de cada um'),
+    ],
+    request=OpenApiTypes.OBJECT,
+    responses={200: OpenApiTypes.OBJECT}
+)
+@api_view(['POST'])
+def validar_documentos(request):
+    """Classifica listas de CPFs e CEPs de uma só vez"""
+    if not isinstance(request.data, dict):
+        return Response({'detail': 'Envie {"cpfs": [...], "ceps": [...]}'},
+                       status=status.HTTP_400_BAD_REQUEST)
+    somente_invalidos = request.query_params.get('somente_invalidos', '').lower() in ('1', 'true', 'sim')
+    resposta = {}
+    for chave, classificar in (('cpfs', classificar_cpfs), ('ceps', classificar_ceps)):
+        valores = request.data.get(chave)
+        if valores is None:
+            continue
+        if not isinstance(valores, list):
+            return Response({'detail': f'"{chave}" deve ser uma lista'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        if len(valores) > MAX_DOCUMENTOS_VALIDACAO:
+            return Response({'detail': f'Máximo de {MAX_DOCUMENTOS_VALIDACAO} valores em "{chave}"'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        valores = [limpar_documento(valor) for valor in valores]
+        resposta[chave] = _resultado_validacao(valores, classificar(valores), somente_invalidos)
+    if not resposta:
+        return Response({'detail': 'Envie ao menos uma das listas "cpfs" ou "ceps"'},
+                       status=status.HTTP_400_BAD_REQUEST)
+    return Response(resposta)
+
+
+@extend_schema(
+    summary="Sincronização incremental",
+    description="Alterações no cadastro (responsáveis, membros, demandas, desaparecidos, "
+                "alojamentos e CEPs atingidos) posteriores ao cursor `since`. Cada registro "
+                "alterado vem uma vez, com o estado atual (`gravado`), como exclusão "
+                "(`excluido`) ou, depois de uma carga de planilha, como `recarregar` da tabela. "
+                "Sem `since`, devolve só o cursor atual, para uso após um download completo.",
+    parameters=[
+        OpenApiParameter('since', OpenApiTypes.INT, description='Cursor devolvido pela sincronização anterior'),
+        OpenApiParameter('limite', OpenApiTypes.INT,
+                         description=f'Alterações por página (padrão {sincronizacao.LIMITE_PADRAO}, '
+                                     f'máximo {sincronizacao.LIMITE_MAXIMO})'),
+        OpenApiParameter('modelos', OpenApiTypes.STR,
+                         description='Tabelas separadas por vírgula (ex.: responsavel,membro)'),
+    ],
+    responses={200: OpenApiTypes.OBJECT}
+)
+@api_view(['GET'])
+def sincronizar(request):
+    """Alterações desde o último cursor do cliente"""
+    since = request.query_params.get('since')
+    if since in (None, ''):
+        return Response({'cursor': sincronizacao.cursor_atual(), 'mais': False, 'alteracoes': []})
+    try:
+        cursor = int(since)
+        limite = int(request.query_params.get('limite', sincronizacao.LIMITE_PADRAO))
+    except ValueError:
+        return Response({'detail': '"since" e "limite" devem ser números inteiros'},
+                       status=status.HTTP_400_BAD_REQUEST)
+    limite = min(max(limite, 1), sincronizacao.LIMITE_MAXIMO)
+    modelos = [nome for nome in request.query_params.get('modelos', '').split(',') if nome]
+    desconhecidos = sorted(set(modelos) - set(sincronizacao.MODELOS))
+    if desconhecidos:
+        return Response({'detail': f'Tabelas desconhecidas: {", ".join(desconhecidos)}'},
+                       status=status.HTTP_400_BAD_REQUEST)
+    proximo, mais, alteracoes = sincronizacao.alteracoes_desde(cursor, limite, modelos)
+    return Response({'cursor': proximo, 'mais': mais, 'alteracoes': alteracoes})
+
+
+class AlojamentoViewSet(RespostaEmCacheMixin, ConsultaOtimizadaMixin, ExportacaoMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet somente leitura para Alojamentos
     """
@@ -25,9 +143,13 @@ class AlojamentoViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     search_fields = ['nome']
     filterset_fields = ['nome']
+    cache_por_acao = {
+        'list': VALIDADE_CACHE_REFERENCIA,
+        'retrieve': VALIDADE_CACHE_REFERENCIA,
+    }
 
 
-class CepAtingidoViewSet(viewsets.ModelViewSet):
+class CepAtingidoViewSet(GravacaoAtomicaMixin, RespostaEmCacheMixin, ConsultaOtimizadaMixin, ExportacaoMixin, viewsets.ModelViewSet):
     """
     ViewSet somente leitura para CEPs atingidos
     """
@@ -36,19 +158,82 @@ class CepAtingidoViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     search_fields = ['cep', 'logradouro', 'municipio', 'bairro']
     filterset_fields = ['uf', 'municipio']
+    versoes_por_acao = {
+        'list': (CepAtingido,),
+        'retrieve': (CepAtingido,),
+        'verificar': (CepAtingido,),
+    }
+    cache_por_acao = {
+        'list': VALIDADE_CACHE_REFERENCIA,
+        'retrieve': VALIDADE_CACHE_REFERENCIA,
+        'verificar': VALIDADE_CACHE_REFERENCIA,
+    }
+
+    @action(detail=False, methods=['get', 'post'])
+    def verificar(self, request):
+        """
+        Verifica se endereços estão em faixas atingidas
 
+        GET: ?cep=...&numero=... para um endereço.
+        POST: {"enderecos": [{"cep": "...", "numero": 10}, ...]} para um lote.
+        """
+        if request.method == 'GET':
+            enderecos = [request.query_params]
+        else:
+            enderecos = request.data.get('enderecos') if isinstance(request.data, dict) else request.data
+            if not isinstance(enderecos, list):
+                return Response({'detail': 'Envie "enderecos" como uma lista de {cep, numero}'},
+                               status=status.HTTP_400_BAD_REQUEST)
+            if len(enderecos) > MAX_ENDERECOS_VERIFICACAO:
+                return Response({'detail': f'Máximo de {MAX_ENDERECOS_VERIFICACAO} endereços por requisição'},
+                               status=status.HTTP_400_BAD_REQUEST)
+
+        indice = indice_ceps.obter()
+        resultados = []
+        for posicao, endereco in enumerate(enderecos):
+            cep = limpar_documento(endereco.get('cep')) if hasattr(endereco, 'get') else ''
+            numero = endereco.get('numero') if hasattr(endereco, 'get') else None
+            if not cep:
+                return Response({'detail': f'CEP é obrigatório (item {posicao})'},
+                               status=status.HTTP_400_BAD_REQUEST)
+            if situacao_cep(cep) != VALIDO:
+                return Response({'detail': f'{MENSAGEM_CEP} (item {posicao})'},
+                               status=status.HTTP_400_BAD_REQUEST)
+            try:
+                numero = int(numero) if numero not in (None, '') else None
+            except (TypeError, ValueError):
+                return Response({'detail': f'Número inválido (item {posicao})'},
+                               status=status.HTTP_400_BAD_REQUEST)
+            resultados.append({'cep': cep, 'numero': numero, 'atingido': indice.contem(cep, numero)})
 
-class ResponsavelViewSet(viewsets.ModelViewSet):
+        if request.method == 'GET':
+            return Response(resultados[0])
+        return Response({'resultados': resultados})
+
+
+class ResponsavelViewSet(GravacaoAtomicaMixin, RespostaCondicionalMixin, PaginacaoCursorMixin, ConsultaOtimizadaMixin, ExportacaoMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de Responsáveis
     """
     queryset = Responsavel.objects.all()
     serializer_class = ResponsavelSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, BuscaNomeFilter]
     search_fields = ['cpf', 'nome', 'nome_mae', 'cep', 'bairro']
+    trigram_search_fields = ['nome', 'nome_mae', 'bairro']
     filterset_fields = ['status', 'bairro', 'cep']
     ordering_fields = ['nome', 'timestamp']
     ordering = ['-timestamp']
+    cursor_ordering = ('-timestamp', '-cpf')
+    versoes_por_acao = {
+        'list': (Responsavel, CepAtingido),
+        'retrieve': (Responsavel, CepAtingido),
+        'buscar_por_cpf': (Responsavel, CepAtingido),
+        'com_membros': (Responsavel, Membro),
+        'com_demandas': (
+            Responsavel, DemandaAmbiente, DemandaEducacao, DemandaHabitacao,
+            DemandaInterna, DemandaSaude,
+        ),
+    }
 
     def get_serializer_class(self):
         if self.action == 'com_membros':
@@ -63,7 +248,7 @@ class ResponsavelViewSet(viewsets.ModelViewSet):
         Retorna responsável com lista de membros
         """
         responsavel = self.get_object()
-        serializer = ResponsavelComMembrosSerializer(responsavel)
+        serializer = self.get_serializer(responsavel)
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'])
@@ -72,7 +257,7 @@ class ResponsavelViewSet(viewsets.ModelViewSet):
         Retorna responsável com todas as demandas associadas
         """
         responsavel = self.get_object()
-        serializer = ResponsavelComDemandasSerializer(responsavel)
+        serializer = self.get_serializer(responsavel)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
@@ -83,7 +268,7 @@ class ResponsavelViewSet(viewsets.ModelViewSet):
         cpf = request.query_params.get('cpf', None)
         if cpf:
             try:
-                responsavel = Responsavel.objects.get(cpf=cpf)
+                responsavel = self.get_queryset().get(cpf=cpf)
                 serializer = self.get_serializer(responsavel)
                 return Response(serializer.data)
             except Responsavel.DoesNotExist:
@@ -92,18 +277,56 @@ class ResponsavelViewSet(viewsets.ModelViewSet):
         return Response({'detail': 'CPF é obrigatório'}, 
                        status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='buscar-lote')
+    def buscar_lote(self, request):
+        """
+        Busca vários responsáveis de uma vez
+
+        Recebe {"cpfs": [...], "incluir": ["membros", "demandas"]} e retorna
+        os encontrados por CPF, os não encontrados e os CPFs mal formados.
+        """
+        try:
+            return Response(buscar_responsaveis(request.data, self.get_serializer_context()))
+        except BuscaInvalida as e:
+            return Response({'detail': str(e)},
+                           status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'], url_path='familias-lote',
+            parser_classes=[JSONArrayStreamParser])
+    def familias_lote(self, request):
+        """
+        Cadastra ou atualiza famílias em lote (upsert por CPF)
+
+        Recebe um array JSON de famílias no formato
+        {"responsavel": {...}, "membros": [...], "demandas": {"saude": [...], ...}}
+        e retorna o resultado de cada uma. Reenviar o mesmo lote é seguro.
+        """
+        try:
+            resumo = gravar_familias(request.data)
+        except LoteMuitoGrande as e:
+            return Response({'detail': str(e)},
+                           status=status.HTTP_400_BAD_REQUEST)
+        return Response(resumo)
+
 
-class MembroViewSet(viewsets.ModelViewSet):
+class MembroViewSet(GravacaoAtomicaMixin, RespostaCondicionalMixin, PaginacaoCursorMixin, ConsultaOtimizadaMixin, ExportacaoMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de Membros
     """
     queryset = Membro.objects.all()
     serializer_class = MembroSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, BuscaNomeFilter]
     search_fields = ['cpf', 'nome', 'cpf_responsavel__nome']
+    trigram_search_fields = ['nome', 'cpf_responsavel__nome']
     filterset_fields = ['status', 'cpf_responsavel']
     ordering_fields = ['nome', 'timestamp']
     ordering = ['-timestamp']
+    cursor_ordering = ('-timestamp', '-cpf')
+    versoes_por_acao = {
+        'list': (Membro, Responsavel),
+        'retrieve': (Membro, Responsavel),
+        'por_responsavel': (Membro, Responsavel),
+    }
 
     @action(detail=False, methods=['get'])
     def por_responsavel(self, request):
@@ -112,47 +335,66 @@ class MembroViewSet(viewsets.ModelViewSet):
         """
         cpf_responsavel = request.query_params.get('cpf_responsavel', None)
         if cpf_responsavel:
-            membros = self.queryset.filter(cpf_responsavel=cpf_responsavel)
-            serializer = self.get_serializer(membros, many=True)
-            return Response(serializer.data)
+            membros = self.get_queryset().filter(cpf_responsavel=cpf_responsavel)
+            return self.responder_lista(membros)
         return Response({'detail': 'CPF do responsável é obrigatório'}, 
                        status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='buscar-lote')
+    def buscar_lote(self, request):
+        """
+        Busca vários membros de uma vez
+
+        Recebe {"cpfs": [...], "incluir": ["demandas"]} e retorna os
+        encontrados por CPF, os não encontrados e os CPFs mal formados.
+        """
+        try:
+            return Response(buscar_membros(request.data, self.get_serializer_context()))
+        except BuscaInvalida as e:
+            return Response({'detail': str(e)},
+                           status=status.HTTP_400_BAD_REQUEST)
+
 
-class DemandaAmbienteViewSet(viewsets.ModelViewSet):
+class DemandaAmbienteViewSet(GravacaoAtomicaMixin, RespostaCondicionalMixin, ConsultaOtimizadaMixin, ExportacaoMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de Demandas de Ambiente
     """
     queryset = DemandaAmbiente.objects.all()
     serializer_class = DemandaAmbienteSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BuscaNomeFilter]
     search_fields = ['cpf__cpf', 'cpf__nome']
+    trigram_search_fields = ['cpf__nome']
     filterset_fields = ['especie', 'vacinado', 'castrado', 'porte']
+    versoes_por_acao = {
+        'list': (DemandaAmbiente, Responsavel),
+        'retrieve': (DemandaAmbiente, Responsavel),
+    }
 
 
-class DemandaEducacaoViewSet(viewsets.ModelViewSet):
+class DemandaEducacaoViewSet(GravacaoAtomicaMixin, RespostaCondicionalMixin, ConsultaOtimizadaMixin, ExportacaoMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de Demandas de Educação
     """
     queryset = DemandaEducacao.objects.all()
     serializer_class = DemandaEducacaoSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BuscaNomeFilter]
     search_fields = ['cpf', 'nome', 'cpf_responsavel']
+    trigram_search_fields = ['nome']
     filterset_fields = ['genero', 'turno', 'alojamento', 'unidade_ensino']
 
 
-class DemandaHabitacaoViewSet(viewsets.ModelViewSet):
+class DemandaHabitacaoViewSet(GravacaoAtomicaMixin, RespostaCondicionalMixin, ConsultaOtimizadaMixin, ExportacaoMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de Demandas de Habitação
     """
     queryset = DemandaHabitacao.objects.all()
     serializer_class = DemandaHabitacaoSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, ProximidadeFilter]
     search_fields = ['cpf']
     filterset_fields = ['material', 'relacao_imovel', 'uso_imovel', 'area_verde', 'ocupacao']
 
 
-class DemandaInternaViewSet(viewsets.ModelViewSet):
+class DemandaInternaViewSet(GravacaoAtomicaMixin, RespostaCondicionalMixin, PaginacaoCursorMixin, ConsultaOtimizadaMixin, ExportacaoMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de Demandas Internas
     """
@@ -163,6 +405,12 @@ class DemandaInternaViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status']
     ordering_fields = ['data']
     ordering = ['-data']
+    cursor_ordering = ('-data', '-cpf')
+    versoes_por_acao = {
+        'list': (DemandaInterna,),
+        'retrieve': (DemandaInterna,),
+        'por_status': (DemandaInterna,),
+    }
 
     @action(detail=False, methods=['get'])
     def por_status(self, request):
@@ -171,14 +419,13 @@ class DemandaInternaViewSet(viewsets.ModelViewSet):
         """
         status_demanda = request.query_params.get('status', None)
         if status_demanda:
-            demandas = self.queryset.filter(status=status_demanda)
-            serializer = self.get_serializer(demandas, many=True)
-            return Response(serializer.data)
+            demandas = self.get_queryset().filter(status=status_demanda)
+            return self.responder_lista(demandas)
         return Response({'detail': 'Status é obrigatório'}, 
                        status=status.HTTP_400_BAD_REQUEST)
 
 
-class DemandaSaudeViewSet(viewsets.ModelViewSet):
+class DemandaSaudeViewSet(GravacaoAtomicaMixin, RespostaCondicionalMixin, ConsultaOtimizadaMixin, ExportacaoMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de Demandas de Saúde
     """
@@ -188,32 +435,38 @@ class DemandaSaudeViewSet(viewsets.ModelViewSet):
     search_fields = ['cpf', 'saude_cid']
     filterset_fields = ['genero', 'gest_puer_nutriz', 'mob_reduzida', 
                        'cuida_outrem', 'pcd_ou_mental']
+    versoes_por_acao = {
+        'list': (DemandaSaude,),
+        'retrieve': (DemandaSaude,),
+        'grupos_prioritarios': (DemandaSaude,),
+    }
 
     @action(detail=False, methods=['get'])
     def grupos_prioritarios(self, request):
         """
         Lista pessoas em grupos prioritários
         """
-        prioritarios = self.queryset.filter(
+        prioritarios = self.get_queryset().filter(
             Q(gest_puer_nutriz='S') | 
             Q(mob_reduzida='S') | 
             Q(pcd_ou_mental='S')
         )
-        serializer = self.get_serializer(prioritarios, many=True)
-        return Response(serializer.data)
+        return self.responder_lista(prioritarios)
 
 
-class DesaparecidoViewSet(viewsets.ModelViewSet):
+class DesaparecidoViewSet(GravacaoAtomicaMixin, RespostaCondicionalMixin, PaginacaoCursorMixin, ConsultaOtimizadaMixin, ExportacaoMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciamento de Desaparecidos
     """
     queryset = Desaparecido.objects.all()
     serializer_class = DesaparecidoSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, BuscaNomeFilter]
     search_fields = ['nome_desaparecido', 'cpf', 'tel_contato']
+    trigram_search_fields = ['nome_desaparecido']
     filterset_fields = ['vinculo']
     ordering_fields = ['data_desaparecimento']
     ordering = ['-data_desaparecimento']
+    cursor_ordering = ('-data_desaparecimento', '-id')
 
     @action(detail=False, methods=['get'])
     def recentes(self, request):
@@ -222,8 +475,24 @@ class DesaparecidoViewSet(viewsets.ModelViewSet):
         """
         from datetime import datetime, timedelta
         data_limite = datetime.now().date() - timedelta(days=30)
-        recentes = self.queryset.filter(data_desaparecimento__gte=data_limite)
-        serializer = self.get_serializer(recentes, many=True)
-        return Response(serializer.data)
+        recentes = self.get_queryset().filter(data_desaparecimento__gte=data_limite)
+        return self.responder_lista(recentes)
+
+    @action(detail=True, methods=['get'])
+    def correspondencias(self, request, pk=None):
+        """
+        Pessoas cadastradas com nome parecido com o do desaparecido
+
+        `processando` indica que o desaparecido (ou uma carga completa)
+        ainda aguarda o job de comparação.
+        """
+        desaparecido = self.get_object()
+        encontradas = CorrespondenciaDesaparecido.objects.filter(
+            desaparecido=desaparecido.pk
+        ).order_by('-pontuacao', 'origem', 'registro')
+        return Response({
+            'processando': pendencias.pendente(TIPO_NOMES, ORIGEM_DESAPARECIDO, desaparecido.pk),
+            'correspondencias': CorrespondenciaDesaparecidoSerializer(encontradas, many=True).data,
+        })
     
     
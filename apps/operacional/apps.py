@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class OperacionalConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.operacional'
+    verbose_name = 'Operacional'
+
+    def ready(self):
+        from . import signals  # noqa: F401
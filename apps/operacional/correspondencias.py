@@ -0,0 +1,162 @@
+"""
+Busca de desaparecidos entre as pessoas cadastradas
+
+Os nomes de responsáveis, membros, alunos (demanda_educacao) e
+desaparecidos são indexados em op_chave_nome pelas chaves de bloqueio de
+`nomes.chaves_bloqueio`. Cada desaparecido é comparado apenas com as
+pessoas que compartilham alguma chave com ele, nunca com a tabela
+inteira; chaves de nomes muito comuns (mais de MAX_BLOCO pessoas) são
+ignoradas, já que as outras chaves do nome ainda o alcançam.
+
+O trabalho é incremental: os sinais enfileiram em op_pendencia cada
+pessoa ou desaparecido alterado e o comando `processar_pendencias`
+reindexa esses registros e recompara só os desaparecidos afetados.
+"""
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count
+
+from apps.cadastro.models import DemandaEducacao, Desaparecido, Membro, Responsavel
+
+from . import nomes
+from .models import ChaveNome, CorrespondenciaDesaparecido
+from .pendencias import TODOS
+
+TIPO = 'nomes'
+LIMIAR = 0.85
+MAX_BLOCO = 1000
+MAX_CORRESPONDENCIAS = 50
+TAMANHO_BLOCO = 1000
+
+
+class Fonte:
+    """Tabela do cadastro com nomes de pessoas"""
+
+    def __init__(self, model, nome, data_nasc=None, familia=None):
+        self.model = model
+        self.nome = nome
+        self.data_nasc = data_nasc
+        self.familia = familia
+
+    def linhas(self, registros=None):
+        """Gera (pk, nome, data_nasc, familia) dos registros"""
+        queryset = self.model._base_manager.all()
+        if registros is not None:
+            queryset = queryset.filter(pk__in=registros)
+        extras = [campo for campo in (self.data_nasc, self.familia) if campo]
+        linhas = queryset.values_list('pk', self.nome, *extras).iterator(chunk_size=TAMANHO_BLOCO)
+        for pk, nome, *valores in linhas:
+            valores = dict(zip(extras, valores))
+            yield str(pk), nome, valores.get(self.data_nasc), valores.get(self.familia)
+
+
+ORIGENS = {
+    'responsavel': Fonte(Responsavel, 'nome', 'data_nasc', 'cpf'),
+    'membro': Fonte(Membro, 'nome', familia='cpf_responsavel'),
+    'educacao': Fonte(DemandaEducacao, 'nome', 'data_nasc', 'cpf_responsavel'),
+    'desaparecido': Fonte(Desaparecido, 'nome_desaparecido'),
+}
+ORIGEM_DESAPARECIDO = 'desaparecido'
+
+
+def indexar(origem, registros=None):
+    """Refaz as chaves de bloqueio da origem (só dos `registros`, se informados)"""
+    atuais = ChaveNome.objects.filter(origem=origem)
+    if registros is not None:
+        registros = list(registros)
+        atuais = atuais.filter(registro__in=registros)
+    chaves = (
+        ChaveNome(origem=origem, registro=pk, chave=chave, nome=nome, data_nasc=data_nasc, familia=familia)
+        for pk, nome, data_nasc, familia in ORIGENS[origem].linhas(registros)
+        for chave in nomes.chaves_bloqueio(nome)
+    )
+    with transaction.atomic():
+        atuais.delete()
+        while bloco := list(islice(chaves, TAMANHO_BLOCO)):
+            ChaveNome.objects.bulk_create(bloco)
+
+
+def _candidatos(chaves):
+    """Pessoas do cadastro nos blocos das chaves, ignorando os blocos grandes demais"""
+    tamanhos = (
+        ChaveNome.objects.filter(chave__in=chaves).exclude(origem=ORIGEM_DESAPARECIDO)
+        .values_list('chave').annotate(total=Count('id')).order_by()
+    )
+    usaveis = [chave for chave, total in tamanhos if total <= MAX_BLOCO]
+    por_chave = {}
+    linhas = (
+        ChaveNome.objects.filter(chave__in=usaveis).exclude(origem=ORIGEM_DESAPARECIDO)
+        .values_list('chave', 'origem', 'registro', 'nome', 'data_nasc', 'familia')
+    )
+    for chave, *pessoa in linhas:
+        por_chave.setdefault(chave, []).append(tuple(pessoa))
+    return por_chave
+
+
+def comparar(desaparecidos):
+    """Refaz as correspondências dos desaparecidos informados"""
+    desaparecidos = iter({str(pk) for pk in desaparecidos})
+    while bloco := list(islice(desaparecidos, TAMANHO_BLOCO)):
+        alvos = {}
+        linhas = ChaveNome.objects.filter(origem=ORIGEM_DESAPARECIDO, registro__in=bloco).values_list(
+            'registro', 'chave', 'nome'
+        )
+        for registro, chave, nome in linhas:
+            alvos.setdefault(registro, (nome, set()))[1].add(chave)
+        por_chave = _candidatos({chave for _, chaves in alvos.values() for chave in chaves})
+
+        novas = []
+        for registro, (nome, chaves) in alvos.items():
+            pessoas = {pessoa for chave in chaves for pessoa in por_chave.get(chave, ())}
+            pontuadas = []
+            for origem, pk, nome_pessoa, data_nasc, familia in pessoas:
+                pontuacao = nomes.pontuar(nome, nome_pessoa)
+                if pontuacao >= LIMIAR:
+                    pontuadas.append((pontuacao, origem, pk, nome_pessoa, data_nasc, familia))
+            pontuadas.sort(key=lambda item: (-item[0], item[1], item[2]))
+            novas.extend(
+                CorrespondenciaDesaparecido(
+                    desaparecido=int(registro), origem=origem, registro=pk, nome=nome_pessoa,
+                    data_nasc=data_nasc, familia=familia, pontuacao=pontuacao,
+                )
+                for pontuacao, origem, pk, nome_pessoa, data_nasc, familia in pontuadas[:MAX_CORRESPONDENCIAS]
+            )
+
+        with transaction.atomic():
+            CorrespondenciaDesaparecido.objects.filter(desaparecido__in=[int(pk) for pk in bloco]).delete()
+            CorrespondenciaDesaparecido.objects.bulk_create(novas, batch_size=TAMANHO_BLOCO)
+
+
+def processar(agrupados):
+    """Processa as pendências {origem: {registros}} do tipo 'nomes'"""
+    afetados = set()
+    for origem, registros in agrupados.items():
+        if origem not in ORIGENS:
+            continue
+        if TODOS in registros:
+            indexar(origem)
+            afetados.update(Desaparecido.objects.values_list('pk', flat=True))
+            continue
+        if origem == ORIGEM_DESAPARECIDO:
+            indexar(origem, registros)
+            afetados.update(registros)
+            continue
+        # Desaparecidos que tinham a pessoa como correspondência ou passam a compartilhar um bloco
+        afetados.update(CorrespondenciaDesaparecido.objects.filter(
+            origem=origem, registro__in=registros
+        ).values_list('desaparecido', flat=True))
+        indexar(origem, registros)
+        afetados.update(ChaveNome.objects.filter(
+            origem=ORIGEM_DESAPARECIDO,
+            chave__in=ChaveNome.objects.filter(origem=origem, registro__in=registros).values('chave'),
+        ).values_list('registro', flat=True))
+    comparar(afetados)
+
+
+def reconstruir():
+    for origem in ORIGENS:
+        indexar(origem)
+    desaparecidos = list(Desaparecido.objects.values_list('pk', flat=True))
+    comparar(desaparecidos)
+    return CorrespondenciaDesaparecido.objects.count()
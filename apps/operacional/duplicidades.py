@@ -0,0 +1,339 @@
+"""
+Detecção e mesclagem de responsáveis duplicados
+
+Cada responsável recebe chaves de bloqueio em op_chave_duplicidade:
+    - chaves do nome (`nomes.chaves_bloqueio`);
+    - CEP + número;
+    - data de nascimento + primeiro nome;
+    - nome da mãe + primeiro nome;
+    - o CPF com cada um dos dígitos apagado, de modo que dois CPFs que
+      diferem num só dígito compartilham uma chave.
+Só responsáveis de um mesmo bloco são comparados, então o custo acompanha
+o tamanho dos blocos e não o quadrado da tabela. Os pares com pontuação
+a partir de LIMIAR ficam em op_duplicidade_responsavel para revisão.
+
+Alterações em responsáveis entram na fila de pendências (tipo
+'duplicidade') e são reavaliadas só contra os próprios blocos.
+"""
+from itertools import combinations, islice
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.cadastro.models import (
+    DemandaAmbiente, DemandaEducacao, DemandaHabitacao, DemandaInterna,
+    DemandaSaude, Desaparecido, Membro, Responsavel
+)
+from apps.cadastro.signals import lote_gravado, lote_gravando
+
+from . import nomes, pendencias
+from .models import ChaveDuplicidade, DuplicidadeResponsavel
+
+TIPO = 'duplicidade'
+LIMIAR = 0.8
+LIMIAR_NOME = 0.8
+MAX_BLOCO = 200
+LOTE_PARES = 20000
+TAMANHO_BLOCO = 1000
+PESOS = {'nome': 0.4, 'nome_mae': 0.2, 'data_nasc': 0.15, 'endereco': 0.15, 'cpf': 0.1}
+CAMPOS = ('cpf', 'nome', 'nome_mae', 'data_nasc', 'cep', 'numero')
+
+# Demandas com uma linha por pessoa (chave primária = CPF)
+DEMANDAS_PESSOA = (DemandaAmbiente, DemandaHabitacao, DemandaInterna, DemandaSaude)
+
+
+class ConflitoMesclagem(Exception):
+    def __init__(self, tabelas):
+        self.tabelas = tabelas
+        super().__init__(f'Os dois responsáveis têm registros em: {", ".join(tabelas)}')
+
+
+def chaves(linha):
+    partes = nomes.tokens(linha['nome'])
+    primeiro = nomes.fonetico(partes[0]) if partes else ''
+    resultado = {f'N:{chave}' for chave in nomes.chaves_bloqueio(linha['nome'])}
+    if linha['cep'] and linha['numero'] is not None:
+        resultado.add(f'E:{linha["cep"]}:{linha["numero"]}')
+    if linha['data_nasc'] and primeiro:
+        resultado.add(f'D:{linha["data_nasc"].isoformat()}:{primeiro}')
+    mae = nomes.tokens(linha['nome_mae'])
+    if mae and primeiro:
+        resultado.add(f'M:{nomes.fonetico(mae[0])}:{nomes.fonetico(mae[-1])}:{primeiro}')
+    cpf = linha['cpf']
+    resultado.update(f'C:{cpf[:i]}_{cpf[i + 1:]}' for i in range(len(cpf)))
+    return resultado
+
+
+def _semelhanca_cpf(a, b):
+    if len(a) != len(b):
+        return 0.0
+    diferencas = [i for i, (x, y) in enumerate(zip(a, b)) if x != y]
+    if len(diferencas) <= 1:
+        return 1.0
+    if len(diferencas) == 2:
+        i, j = diferencas
+        # Dois dígitos vizinhos trocados de posição
+        if j == i + 1 and a[i] == b[j] and a[j] == b[i]:
+            return 1.0
+        return 0.5
+    return 0.0
+
+
+def _semelhanca_data(a, b):
+    if a == b:
+        return 1.0
+    if a.year == b.year and a.month == b.day and a.day == b.month:
+        return 0.5
+    return 0.0
+
+
+def comparar(a, b):
+    """Retorna (pontuação, critérios) do par, ou None se os nomes não se parecem"""
+    nome = nomes.similaridade(a['nome'], b['nome'])
+    if nome < LIMIAR_NOME:
+        return None
+    criterios = {'nome': nome, 'cpf': _semelhanca_cpf(a['cpf'], b['cpf'])}
+    if a['nome_mae'] and b['nome_mae']:
+        criterios['nome_mae'] = nomes.similaridade(a['nome_mae'], b['nome_mae'])
+    if a['data_nasc'] and b['data_nasc']:
+        criterios['data_nasc'] = _semelhanca_data(a['data_nasc'], b['data_nasc'])
+    if a['cep'] and b['cep']:
+        mesmo_cep = a['cep'] == b['cep']
+        criterios['endereco'] = 1.0 if mesmo_cep and a['numero'] == b['numero'] else 0.5 if mesmo_cep else 0.0
+    pontuacao = sum(PESOS[nome] * valor for nome, valor in criterios.items()) / sum(PESOS[nome] for nome in criterios)
+    return round(pontuacao, 4), {nome: round(valor, 4) for nome, valor in criterios.items()}
+
+
+def _linhas(cpfs=None):
+    queryset = Responsavel.objects.all()
+    if cpfs is not None:
+        queryset = queryset.filter(cpf__in=cpfs)
+    return queryset.values(*CAMPOS)
+
+
+def indexar(cpfs=None):
+    """Refaz as chaves de bloqueio dos responsáveis (todos quando None)"""
+    atuais = ChaveDuplicidade.objects.all()
+    if cpfs is not None:
+        atuais = atuais.filter(cpf__in=cpfs)
+    with transaction.atomic():
+        atuais.delete()
+        bloco = []
+        for linha in _linhas(cpfs).iterator(chunk_size=TAMANHO_BLOCO):
+            bloco.extend(ChaveDuplicidade(cpf=linha['cpf'], chave=chave) for chave in chaves(linha))
+            if len(bloco) >= TAMANHO_BLOCO:
+                ChaveDuplicidade.objects.bulk_create(bloco)
+                bloco = []
+        ChaveDuplicidade.objects.bulk_create(bloco)
+
+
+def _par(cpf_a, cpf_b):
+    return (cpf_a, cpf_b) if cpf_a < cpf_b else (cpf_b, cpf_a)
+
+
+def _vizinhos(cpfs):
+    """Pares entre os CPFs informados e os demais responsáveis dos seus blocos"""
+    # Os tamanhos vêm agregados do banco: blocos grandes demais (nomes
+    # comuns, endereços compartilhados) não chegam a ser lidos
+    chaves_dos_cpfs = ChaveDuplicidade.objects.filter(cpf__in=cpfs).values('chave')
+    tamanhos = (
+        ChaveDuplicidade.objects.filter(chave__in=chaves_dos_cpfs)
+        .values_list('chave').annotate(total=Count('id')).order_by()
+    )
+    usaveis = iter([chave for chave, total in tamanhos if 1 < total <= MAX_BLOCO])
+    blocos = {}
+    while lote := list(islice(usaveis, TAMANHO_BLOCO)):
+        for chave, cpf in ChaveDuplicidade.objects.filter(chave__in=lote).values_list('chave', 'cpf'):
+            blocos.setdefault(chave, set()).add(cpf)
+    pares = set()
+    for membros in blocos.values():
+        for cpf in membros & set(cpfs):
+            pares.update(_par(cpf, outro) for outro in membros if outro != cpf)
+    return pares
+
+
+def _avaliar(pares):
+    """Pontua os pares; grava os que passam do limiar e remove os pendentes que não passam"""
+    if not pares:
+        return 0
+    envolvidos = {cpf for par in pares for cpf in par}
+    dados = {linha['cpf']: linha for linha in _linhas(envolvidos)}
+    agora = timezone.now()
+    aprovados, reprovados = [], []
+    for cpf_a, cpf_b in pares:
+        resultado = None
+        if cpf_a in dados and cpf_b in dados:
+            resultado = comparar(dados[cpf_a], dados[cpf_b])
+        if resultado is None or resultado[0] < LIMIAR:
+            reprovados.append((cpf_a, cpf_b))
+            continue
+        pontuacao, criterios = resultado
+        aprovados.append(DuplicidadeResponsavel(
+            responsavel_a_id=cpf_a, responsavel_b_id=cpf_b,
+            pontuacao=pontuacao, criterios=criterios, atualizado_em=agora,
+        ))
+    pendentes = dict(
+        ((cpf_a, cpf_b), pk) for pk, cpf_a, cpf_b in DuplicidadeResponsavel.objects.filter(
+            status=DuplicidadeResponsavel.PENDENTE,
+            responsavel_a__in=envolvidos, responsavel_b__in=envolvidos,
+        ).values_list('pk', 'responsavel_a_id', 'responsavel_b_id')
+    )
+    with transaction.atomic():
+        # Pares já revisados (descartados/mesclados) mantêm o status
+        DuplicidadeResponsavel.objects.bulk_create(
+            aprovados, batch_size=TAMANHO_BLOCO,
+            update_conflicts=True,
+            unique_fields=['responsavel_a', 'responsavel_b'],
+            update_fields=['pontuacao', 'criterios', 'atualizado_em'],
+        )
+        DuplicidadeResponsavel.objects.filter(
+            pk__in=[pendentes[par] for par in reprovados if par in pendentes]
+        ).delete()
+    return len(aprovados)
+
+
+def _pares_de(cpfs):
+    return DuplicidadeResponsavel.objects.filter(
+        Q(responsavel_a__in=cpfs) | Q(responsavel_b__in=cpfs)
+    )
+
+
+def verificar(cpfs):
+    """Reavalia os responsáveis informados contra os seus blocos"""
+    cpfs = set(cpfs)
+    existentes = set(Responsavel.objects.filter(cpf__in=cpfs).values_list('cpf', flat=True))
+    removidos = cpfs - existentes
+    if removidos:
+        ChaveDuplicidade.objects.filter(cpf__in=removidos).delete()
+        _pares_de(removidos).exclude(status=DuplicidadeResponsavel.MESCLADA).delete()
+    if not existentes:
+        return 0
+    indexar(existentes)
+    pares = _vizinhos(existentes)
+    pares.update(
+        _pares_de(existentes).filter(status=DuplicidadeResponsavel.PENDENTE)
+        .values_list('responsavel_a_id', 'responsavel_b_id')
+    )
+    return _avaliar(pares)
+
+
+def processar(agrupados):
+    """Processa as pendências {origem: {cpfs}} do tipo 'duplicidade'"""
+    cpfs = agrupados.get('responsavel', set())
+    if pendencias.TODOS in cpfs:
+        reconstruir()
+    elif cpfs:
+        verificar(cpfs)
+
+
+def reconstruir():
+    """Reindexa todos os responsáveis e compara cada bloco internamente"""
+    inicio = timezone.now()
+    indexar()
+    total = 0
+    pares = set()
+    chave_atual, membros = None, []
+
+    def fechar_bloco():
+        if 1 < len(membros) <= MAX_BLOCO:
+            pares.update(_par(a, b) for a, b in combinations(membros, 2))
+
+    linhas = ChaveDuplicidade.objects.order_by('chave', 'cpf').values_list('chave', 'cpf')
+    for chave, cpf in linhas.iterator(chunk_size=TAMANHO_BLOCO):
+        if chave != chave_atual:
+            fechar_bloco()
+            chave_atual, membros = chave, []
+            if len(pares) >= LOTE_PARES:
+                total += _avaliar(pares)
+                pares = set()
+        membros.append(cpf)
+    fechar_bloco()
+    total += _avaliar(pares)
+    # Pendentes que não foram reencontrados nesta rodada
+    DuplicidadeResponsavel.objects.filter(
+        status=DuplicidadeResponsavel.PENDENTE, atualizado_em__lt=inicio
+    ).delete()
+    return total
+
+
+def descartar(duplicidade):
+    """Marca o par como não duplicado, conferindo o status com o par bloqueado"""
+    with transaction.atomic():
+        duplicidade = DuplicidadeResponsavel.objects.select_for_update().get(pk=duplicidade.pk)
+        if duplicidade.status == DuplicidadeResponsavel.MESCLADA:
+            raise ValueError('Este par já foi mesclado.')
+        duplicidade.status = DuplicidadeResponsavel.DESCARTADA
+        duplicidade.save(update_fields=['status', 'atualizado_em'])
+    return duplicidade
+
+
+def mesclar(duplicidade, cpf_mantido):
+    """
+    Mescla o par mantendo `cpf_mantido`
+
+    Membros, alunos, demandas e desaparecidos do outro responsável passam
+    para o mantido em UPDATEs por tabela, e o outro responsável é
+    excluído. Se os dois tiverem linha numa mesma demanda de uma linha por
+    pessoa, nada é alterado e ConflitoMesclagem indica as tabelas.
+
+    O par e os dois responsáveis ficam bloqueados (SELECT ... FOR UPDATE)
+    até o fim, e o status é conferido de novo depois do bloqueio: dois
+    revisores mesclando o mesmo par (ou pares com um responsável em comum)
+    ao mesmo tempo não movem as mesmas linhas duas vezes.
+    """
+    with transaction.atomic():
+        duplicidade = DuplicidadeResponsavel.objects.select_for_update().get(pk=duplicidade.pk)
+        if duplicidade.status == DuplicidadeResponsavel.MESCLADA:
+            raise ValueError('Este par já foi mesclado.')
+        cpf_a, cpf_b = duplicidade.responsavel_a_id, duplicidade.responsavel_b_id
+        if cpf_mantido not in (cpf_a, cpf_b):
+            raise ValueError('O CPF mantido deve ser um dos dois responsáveis do par.')
+        removido = cpf_b if cpf_mantido == cpf_a else cpf_a
+        bloqueados = Responsavel.objects.select_for_update().filter(cpf__in=[cpf_a, cpf_b]).order_by('cpf')
+        if len(bloqueados.values_list('cpf', flat=True)) != 2:
+            raise ValueError('Um dos responsáveis do par não existe mais.')
+
+        conflitos = [
+            model._meta.db_table for model in DEMANDAS_PESSOA
+            if model._base_manager.filter(pk=removido).exists()
+            and model._base_manager.filter(pk=cpf_mantido).exists()
+        ]
+        if conflitos:
+            raise ConflitoMesclagem(conflitos)
+
+        gravados = {}
+
+        def antes_de_gravar(model, chaves_gravadas):
+            gravados[model] = chaves_gravadas
+            if chaves_gravadas:
+                lote_gravando.send(sender=model, chaves=chaves_gravadas)
+
+        membros = Membro.objects.filter(cpf_responsavel=removido)
+        antes_de_gravar(Membro, list(membros.values_list('cpf', flat=True)))
+        membros.update(cpf_responsavel=cpf_mantido)
+        alunos = DemandaEducacao.objects.filter(cpf_responsavel=removido)
+        antes_de_gravar(DemandaEducacao, list(alunos.values_list('cpf', flat=True)))
+        alunos.update(cpf_responsavel=cpf_mantido)
+        for model in DEMANDAS_PESSOA:
+            if model._base_manager.filter(pk=removido).exists():
+                antes_de_gravar(model, [removido, cpf_mantido])
+                model._base_manager.filter(pk=removido).update(**{model._meta.pk.name: cpf_mantido})
+        desaparecidos = Desaparecido.objects.filter(cpf=removido)
+        antes_de_gravar(Desaparecido, list(desaparecidos.values_list('pk', flat=True)))
+        desaparecidos.update(cpf=cpf_mantido)
+
+        Responsavel.objects.get(cpf=removido).delete()
+        _pares_de([removido]).exclude(pk=duplicidade.pk).delete()
+        duplicidade.status = DuplicidadeResponsavel.MESCLADA
+        duplicidade.save(update_fields=['status', 'atualizado_em'])
+
+        for model, chaves_gravadas in gravados.items():
+            if chaves_gravadas:
+                transaction.on_commit(
+                    lambda model=model, chaves_gravadas=chaves_gravadas: lote_gravado.send(
+                        sender=model, chaves=chaves_gravadas
+                    )
+                )
+        pendencias.enfileirar(TIPO, 'responsavel', [cpf_mantido])
+    return removido
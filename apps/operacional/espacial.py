@@ -0,0 +1,226 @@
+"""
+Índice espacial em grade para as demandas de habitação
+
+Cada demanda com latitude/longitude ocupa uma célula de TAMANHO_CELULA
+graus na tabela op_celula_habitacao. As células são numeradas linha a
+linha (linha * COLUNAS_GRADE + coluna), então um retângulo vira uma faixa
+contígua de células por linha da grade, atendida pelo índice B-tree de
+`celula`. Só as demandas dessas células têm a distância calculada, no
+próprio banco.
+
+Filtros (ProximidadeFilter):
+    ?near=lat,lng&radius=500   demandas a até `radius` metros, das mais
+                               próximas para as mais distantes
+    ?near=lat,lng&nearest=10   as 10 demandas mais próximas
+    ?bbox=oeste,sul,leste,norte demandas dentro do retângulo (lng,lat)
+"""
+import math
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.db import transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Cos, Least, Power, Radians, Sin, Sqrt
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from apps.cadastro.models import DemandaHabitacao
+
+from .models import CelulaHabitacao
+
+TAMANHO_CELULA = 0.005  # graus, ~550 m
+COLUNAS_GRADE = math.ceil(360 / TAMANHO_CELULA) + 1
+# Acima disso o retângulo é filtrado só pelo índice de latitude
+MAX_LINHAS_GRADE = 64
+
+RAIO_TERRA = 6371008.8
+METROS_POR_GRAU = math.pi * RAIO_TERRA / 180
+RAIO_PADRAO = 500
+RAIO_MAXIMO = 50000
+MAX_VIZINHOS = 500
+TAMANHO_BLOCO = 2000
+
+
+def _linha(lat):
+    return math.floor((lat + 90) / TAMANHO_CELULA)
+
+
+def _coluna(lng):
+    return math.floor((lng + 180) / TAMANHO_CELULA)
+
+
+def celula(lat, lng):
+    return _linha(lat) * COLUNAS_GRADE + _coluna(lng)
+
+
+def q_retangulo(sul, oeste, norte, leste):
+    """Q sobre CelulaHabitacao para o retângulo, usando as faixas de células"""
+    exato = Q(latitude__range=(sul, norte), longitude__range=(oeste, leste))
+    primeira, ultima = _linha(sul), _linha(norte)
+    if ultima - primeira + 1 > MAX_LINHAS_GRADE:
+        return exato
+    inicio, fim = _coluna(oeste), _coluna(leste)
+    faixas = [
+        Q(celula__range=(linha * COLUNAS_GRADE + inicio, linha * COLUNAS_GRADE + fim))
+        for linha in range(primeira, ultima + 1)
+    ]
+    return reduce(or_, faixas) & exato
+
+
+def retangulo_do_raio(lat, lng, raio):
+    """(sul, oeste, norte, leste) que contém o círculo de `raio` metros"""
+    graus_lat = raio / METROS_POR_GRAU
+    graus_lng = min(graus_lat / max(math.cos(math.radians(lat)), 1e-6), 180)
+    return (
+        max(lat - graus_lat, -90), max(lng - graus_lng, -180),
+        min(lat + graus_lat, 90), min(lng + graus_lng, 180),
+    )
+
+
+def distancia(lat, lng, campo_lat='latitude', campo_lng='longitude'):
+    """Expressão com a distância em metros (haversine) até o ponto"""
+    lat2 = Radians(Cast(campo_lat, FloatField()))
+    lng2 = Radians(Cast(campo_lng, FloatField()))
+    meia_dlat = (lat2 - Value(math.radians(lat))) / Value(2.0)
+    meia_dlng = (lng2 - Value(math.radians(lng))) / Value(2.0)
+    a = (
+        Power(Sin(meia_dlat), 2)
+        + Value(math.cos(math.radians(lat))) * Cos(lat2) * Power(Sin(meia_dlng), 2)
+    )
+    # Least evita ASin(>1) por arredondamento em pontos antípodas
+    return Value(2 * RAIO_TERRA) * ASin(Least(Sqrt(a), Value(1.0)))
+
+
+def no_raio(lat, lng, raio):
+    """Células a até `raio` metros do ponto, com a distância anotada"""
+    return CelulaHabitacao.objects.filter(
+        q_retangulo(*retangulo_do_raio(lat, lng, raio))
+    ).annotate(distancia=distancia(lat, lng)).filter(distancia__lte=raio)
+
+
+def vizinhos(lat, lng, quantidade, demandas=None):
+    """
+    CPFs das `quantidade` demandas mais próximas (até RAIO_MAXIMO)
+
+    O raio começa numa célula e é multiplicado por 4 até encontrar
+    demandas suficientes, então cada tentativa lê poucas células. Com
+    `demandas` (queryset de DemandaHabitacao já filtrado), só elas contam:
+    o filtro entra na consulta antes do limite.
+    """
+    raio = TAMANHO_CELULA * METROS_POR_GRAU
+    while True:
+        raio = min(raio, RAIO_MAXIMO)
+        candidatas = no_raio(lat, lng, raio)
+        if demandas is not None:
+            candidatas = candidatas.filter(cpf__in=demandas.values('cpf'))
+        encontrados = list(
+            candidatas.order_by('distancia', 'cpf').values_list('cpf', flat=True)[:quantidade]
+        )
+        if len(encontrados) >= quantidade or raio >= RAIO_MAXIMO:
+            return encontrados
+        raio *= 4
+
+
+def _celulas(queryset):
+    linhas = (
+        queryset.exclude(latitude=None).exclude(longitude=None)
+        .values_list('cpf', 'latitude', 'longitude').iterator(chunk_size=TAMANHO_BLOCO)
+    )
+    for cpf, lat, lng in linhas:
+        lat, lng = float(lat), float(lng)
+        if -90 <= lat <= 90 and -180 <= lng <= 180:
+            yield CelulaHabitacao(cpf=cpf, celula=celula(lat, lng), latitude=lat, longitude=lng)
+
+
+def _gravar(celulas):
+    total = 0
+    while bloco := list(islice(celulas, TAMANHO_BLOCO)):
+        CelulaHabitacao.objects.bulk_create(bloco)
+        total += len(bloco)
+    return total
+
+
+def atualizar(chaves):
+    """Recalcula as células das demandas informadas"""
+    chaves = list(chaves)
+    with transaction.atomic():
+        CelulaHabitacao.objects.filter(cpf__in=chaves).delete()
+        _gravar(_celulas(DemandaHabitacao.objects.filter(cpf__in=chaves)))
+
+
+def reconstruir():
+    """Refaz o índice inteiro a partir de demanda_habitacao"""
+    with transaction.atomic():
+        CelulaHabitacao.objects.all().delete()
+        return _gravar(_celulas(DemandaHabitacao.objects.all()))
+
+
+def _numeros(valor, quantidade, parametro):
+    try:
+        numeros = [float(parte) for parte in valor.split(',')]
+    except ValueError:
+        numeros = []
+    if len(numeros) != quantidade or not all(math.isfinite(n) for n in numeros):
+        raise ValidationError({parametro: [f'Informe {quantidade} números separados por vírgula.']})
+    return numeros
+
+
+def _coordenada(lat, lng, parametro):
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValidationError({parametro: ['Coordenadas fora do intervalo válido.']})
+
+
+class ProximidadeFilter(filters.BaseFilterBackend):
+    """
+    Filtros ?near=, ?radius=, ?nearest= e ?bbox= sobre o índice em grade
+
+    Deve ser o último de filter_backends: ?nearest= escolhe as mais
+    próximas entre as demandas que passaram pelos outros filtros.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        if params.get('bbox'):
+            oeste, sul, leste, norte = _numeros(params['bbox'], 4, 'bbox')
+            _coordenada(sul, oeste, 'bbox')
+            _coordenada(norte, leste, 'bbox')
+            if sul > norte or oeste > leste:
+                raise ValidationError({'bbox': ['Use oeste,sul,leste,norte com oeste <= leste e sul <= norte.']})
+            celulas = CelulaHabitacao.objects.filter(q_retangulo(sul, oeste, norte, leste))
+            queryset = queryset.filter(cpf__in=celulas.values('cpf'))
+
+        if not params.get('near'):
+            return queryset
+        lat, lng = _numeros(params['near'], 2, 'near')
+        _coordenada(lat, lng, 'near')
+
+        if params.get('nearest'):
+            try:
+                quantidade = int(params['nearest'])
+            except ValueError:
+                quantidade = 0
+            if not 1 <= quantidade <= MAX_VIZINHOS:
+                raise ValidationError({'nearest': [f'Informe um inteiro entre 1 e {MAX_VIZINHOS}.']})
+            queryset = queryset.filter(cpf__in=vizinhos(lat, lng, quantidade, queryset))
+        else:
+            raio = _numeros(params.get('radius', str(RAIO_PADRAO)), 1, 'radius')[0]
+            if not 0 < raio <= RAIO_MAXIMO:
+                raise ValidationError({'radius': [f'O raio deve estar entre 0 e {RAIO_MAXIMO} metros.']})
+            queryset = queryset.filter(cpf__in=no_raio(lat, lng, raio).values('cpf'))
+
+        return queryset.annotate(distancia=distancia(lat, lng)).order_by('distancia', 'cpf')
+
+    def get_schema_operation_parameters(self, view):
+        def parametro(nome, descricao):
+            return {
+                'name': nome, 'required': False, 'in': 'query',
+                'description': descricao, 'schema': {'type': 'string'},
+            }
+        return [
+            parametro('near', 'Ponto "lat,lng"; ordena pela distância'),
+            parametro('radius', f'Raio em metros a partir de near (padrão {RAIO_PADRAO})'),
+            parametro('nearest', 'Quantidade de demandas mais próximas de near'),
+            parametro('bbox', 'Retângulo "oeste,sul,leste,norte" em graus'),
+        ]
@@ -0,0 +1,51 @@
+"""
+Processa a fila de pendências dos jobs em segundo plano
+
+Cada alteração no cadastro enfileira o registro alterado em op_pendencia;
+este comando consome a fila em lotes. Com --intervalo fica em execução,
+verificando a fila novamente a cada N segundos quando ela esvazia.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.operacional import correspondencias, duplicidades, pendencias
+
+PROCESSADORES = {
+    correspondencias.TIPO: correspondencias.processar,
+    duplicidades.TIPO: duplicidades.processar,
+}
+
+
+class Command(BaseCommand):
+    help = 'Processa as pendências dos jobs em segundo plano (padrão: todos os tipos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tipos', nargs='*',
+            help=f'Tipos de pendência: {", ".join(PROCESSADORES)}'
+        )
+        parser.add_argument(
+            '--limite', type=int, default=1000,
+            help='Pendências por lote (padrão: 1000)'
+        )
+        parser.add_argument(
+            '--intervalo', type=int, default=0,
+            help='Continua em execução verificando a fila a cada N segundos (0 = esvazia e sai)'
+        )
+
+    def handle(self, *args, **options):
+        tipos = options['tipos'] or list(PROCESSADORES)
+        desconhecidos = [tipo for tipo in tipos if tipo not in PROCESSADORES]
+        if desconhecidos:
+            raise CommandError(f'Tipos desconhecidos: {", ".join(desconhecidos)}')
+
+        while True:
+            for tipo in tipos:
+                while processados := pendencias.processar(tipo, PROCESSADORES[tipo], options['limite']):
+                    self.stdout.write(f'{tipo}: {processados} pendências processadas')
+            if not options['intervalo']:
+                break
+            close_old_connections()
+            time.sleep(options['intervalo'])
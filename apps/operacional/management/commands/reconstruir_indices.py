@@ -0,0 +1,54 @@
+"""
+Refaz as tabelas derivadas do app operacional a partir do cadastro
+
+Necessário na primeira instalação e depois de alterações feitas direto no
+banco (fora da API e dos comandos de carga), que não disparam os sinais.
+Com --intervalo o comando fica em execução e repete a reconstrução
+periodicamente (ex.: reconciliação do painel).
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.operacional import correspondencias, duplicidades, espacial, painel, triagem
+
+INDICES = {
+    'espacial': espacial.reconstruir,
+    'painel': painel.reconstruir,
+    'triagem': triagem.reconstruir,
+    'nomes': correspondencias.reconstruir,
+    'duplicidades': duplicidades.reconstruir,
+}
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os índices derivados do cadastro (padrão: todos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'indices', nargs='*',
+            help=f'Índices a reconstruir: {", ".join(INDICES)}'
+        )
+        parser.add_argument(
+            '--intervalo', type=int, default=0,
+            help='Repete a cada N segundos (0 = executa uma vez)'
+        )
+
+    def handle(self, *args, **options):
+        nomes = options['indices'] or list(INDICES)
+        desconhecidos = [nome for nome in nomes if nome not in INDICES]
+        if desconhecidos:
+            raise CommandError(f'Índices desconhecidos: {", ".join(desconhecidos)}')
+
+        while True:
+            for nome in nomes:
+                inicio = time.monotonic()
+                total = INDICES[nome]()
+                self.stdout.write(self.style.SUCCESS(
+                    f'{nome}: {total} registros em {time.monotonic() - inicio:.1f}s'
+                ))
+            if not options['intervalo']:
+                break
+            close_old_connections()
+            time.sleep(options['intervalo'])
@@ -0,0 +1,155 @@
+"""
+Tabelas derivadas do cadastro (índices e resumos)
+
+Ao contrário dos models do cadastro, estas tabelas são gerenciadas pelo
+Django e criadas pelo `migrate --run-syncdb` do entrypoint. Todo o
+conteúdo pode ser refeito a partir do cadastro com
+`manage.py reconstruir_indices`.
+"""
+from django.db import models
+
+
+class CelulaHabitacao(models.Model):
+    """Posição de cada demanda de habitação na grade espacial"""
+    cpf = models.CharField(primary_key=True, max_length=11)
+    celula = models.BigIntegerField(db_index=True)
+    latitude = models.FloatField(db_index=True)
+    longitude = models.FloatField()
+
+    class Meta:
+        db_table = 'op_celula_habitacao'
+
+
+class ContagemPainel(models.Model):
+    """Total de registros do cadastro por grupo do painel e valor"""
+    grupo = models.CharField(max_length=100)
+    chave = models.CharField(max_length=150)
+    total = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'op_contagem_painel'
+        unique_together = (('grupo', 'chave'),)
+
+
+class TriagemFamilia(models.Model):
+    """Pontuação de urgência de cada família (chave: CPF do responsável)"""
+    cpf = models.CharField(primary_key=True, max_length=11)
+    nome = models.CharField(max_length=150)
+    bairro = models.CharField(max_length=100, blank=True, null=True)
+    pontuacao = models.IntegerField()
+    criterios = models.JSONField(default=dict)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'op_triagem_familia'
+        indexes = [models.Index(fields=['-pontuacao', 'cpf'], name='op_triagem_fila_idx')]
+
+
+class Pendencia(models.Model):
+    """Registro do cadastro alterado e ainda não processado por um job"""
+    tipo = models.CharField(max_length=30)
+    origem = models.CharField(max_length=30)
+    registro = models.CharField(max_length=20)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'op_pendencia'
+        unique_together = (('tipo', 'origem', 'registro'),)
+
+
+class ChaveNome(models.Model):
+    """Chaves de bloqueio dos nomes de pessoas do cadastro"""
+    origem = models.CharField(max_length=30)
+    registro = models.CharField(max_length=20)
+    chave = models.CharField(max_length=80)
+    nome = models.CharField(max_length=150)
+    data_nasc = models.DateField(blank=True, null=True)
+    familia = models.CharField(max_length=11, blank=True, null=True)
+
+    class Meta:
+        db_table = 'op_chave_nome'
+        indexes = [
+            models.Index(fields=['chave', 'origem'], name='op_chave_nome_chave_idx'),
+            models.Index(fields=['origem', 'registro'], name='op_chave_nome_registro_idx'),
+        ]
+
+
+class CorrespondenciaDesaparecido(models.Model):
+    """Pessoa do cadastro com nome parecido com o de um desaparecido"""
+    desaparecido = models.IntegerField(db_index=True)
+    origem = models.CharField(max_length=30)
+    registro = models.CharField(max_length=20)
+    nome = models.CharField(max_length=150)
+    data_nasc = models.DateField(blank=True, null=True)
+    familia = models.CharField(max_length=11, blank=True, null=True)
+    pontuacao = models.FloatField()
+    encontrado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'op_correspondencia_desaparecido'
+        unique_together = (('desaparecido', 'origem', 'registro'),)
+        indexes = [models.Index(fields=['origem', 'registro'], name='op_correspondencia_reg_idx')]
+
+
+class ChaveDuplicidade(models.Model):
+    """Chaves de bloqueio usadas na busca de responsáveis duplicados"""
+    cpf = models.CharField(max_length=11)
+    chave = models.CharField(max_length=80)
+
+    class Meta:
+        db_table = 'op_chave_duplicidade'
+        indexes = [
+            models.Index(fields=['chave', 'cpf'], name='op_chave_dup_chave_idx'),
+            models.Index(fields=['cpf'], name='op_chave_dup_cpf_idx'),
+        ]
+
+
+class DuplicidadeResponsavel(models.Model):
+    """Par de responsáveis que provavelmente são a mesma família"""
+    PENDENTE = 'pendente'
+    DESCARTADA = 'descartada'
+    MESCLADA = 'mesclada'
+    STATUS_CHOICES = [(PENDENTE, 'Pendente'), (DESCARTADA, 'Descartada'), (MESCLADA, 'Mesclada')]
+
+    # Sem constraint: depois da mesclagem um dos lados não existe mais
+    responsavel_a = models.ForeignKey(
+        'cadastro.Responsavel', models.DO_NOTHING, db_column='cpf_a', db_constraint=False,
+        null=True, related_name='+'
+    )
+    responsavel_b = models.ForeignKey(
+        'cadastro.Responsavel', models.DO_NOTHING, db_column='cpf_b', db_constraint=False,
+        null=True, related_name='+'
+    )
+    pontuacao = models.FloatField(db_index=True)
+    criterios = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDENTE)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'op_duplicidade_responsavel'
+        unique_together = (('responsavel_a', 'responsavel_b'),)
+        indexes = [models.Index(fields=['status', '-pontuacao'], name='op_duplicidade_fila_idx')]
+
+
+class Alteracao(models.Model):
+    """
+    Registro append-only das gravações no cadastro, lido pelo /cadastro/sync/
+
+    `chave` é a chave primária do registro gravado, ou '*' quando uma carga
+    alterou a tabela sem informar quais registros (o cliente recarrega a
+    tabela inteira).
+    """
+    GRAVACAO = 'gravacao'
+    EXCLUSAO = 'exclusao'
+    CARGA = 'carga'
+    OPERACAO_CHOICES = [(GRAVACAO, 'Gravação'), (EXCLUSAO, 'Exclusão'), (CARGA, 'Carga')]
+
+    id = models.BigAutoField(primary_key=True)
+    modelo = models.CharField(max_length=30)
+    chave = models.CharField(max_length=20)
+    operacao = models.CharField(max_length=10, choices=OPERACAO_CHOICES)
+    registrado_em = models.DateTimeField()
+
+    class Meta:
+        db_table = 'op_alteracao'
+        indexes = [models.Index(fields=['modelo', 'id'], name='op_alteracao_modelo_idx')]
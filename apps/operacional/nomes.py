@@ -0,0 +1,145 @@
+"""
+Normalização, código fonético e similaridade de nomes em português
+
+O código fonético é uma simplificação do BuscaBR: remove acentos, aplica
+as equivalências de grafia mais comuns do português (Z → S, CH/SH → X,
+LH, NH, PH, QU/C duro → K, C antes de E/I → S, G antes de E/I → J,
+Y → I, W → V, H mudo), descarta as vogais depois da primeira letra e
+junta letras repetidas. Assim SOUZA/SOUSA, LUIZ/LUIS e THAIS/TAIS geram
+o mesmo código.
+
+As chaves de bloqueio combinam os códigos de dois sobrenomes/prenomes;
+só nomes que compartilham alguma chave são comparados entre si.
+"""
+import re
+import unicodedata
+
+PARTICULAS = {'DA', 'DAS', 'DE', 'DI', 'DO', 'DOS', 'DU', 'E'}
+
+_SUBSTITUICOES = [
+    (re.compile(r'SCH|SH|CH'), 'X'),
+    (re.compile(r'PH'), 'F'),
+    (re.compile(r'TH'), 'T'),
+    (re.compile(r'LH'), 'L'),
+    (re.compile(r'NH'), 'N'),
+    (re.compile(r'SC(?=[EI])'), 'S'),
+    (re.compile(r'C(?=[EI])'), 'S'),
+    (re.compile(r'QU?|CK|C'), 'K'),
+    # Numa só passada, para o G de GUE/GUI não virar J em seguida
+    (re.compile(r'GU(?=[EI])|G(?=[EI])'), lambda m: 'G' if len(m.group()) == 2 else 'J'),
+    (re.compile(r'Y'), 'I'),
+    (re.compile(r'W'), 'V'),
+    (re.compile(r'Z'), 'S'),
+    (re.compile(r'M$'), 'N'),
+    (re.compile(r'(?<=.)H|^H'), ''),
+]
+_VOGAIS = re.compile(r'(?<=.)[AEIOU]')
+_REPETIDAS = re.compile(r'(.)\1+')
+
+
+def normalizar(nome):
+    """Maiúsculas, sem acentos e sem pontuação"""
+    if not nome:
+        return ''
+    nome = unicodedata.normalize('NFKD', nome.upper())
+    nome = ''.join(c for c in nome if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^A-Z ]', ' ', nome).split())
+
+
+def tokens(nome):
+    """Partes do nome normalizado, sem partículas (DA, DE, DOS...)"""
+    return [parte for parte in normalizar(nome).split() if parte not in PARTICULAS]
+
+
+def fonetico(palavra):
+    for padrao, troca in _SUBSTITUICOES:
+        palavra = padrao.sub(troca, palavra)
+    palavra = _VOGAIS.sub('', palavra)
+    return _REPETIDAS.sub(r'\1', palavra)
+
+
+def chaves_bloqueio(nome):
+    """
+    Chaves de bloqueio de um nome
+
+    Pares de partes: primeiro + último nome e, com três ou mais partes,
+    também primeiro + segundo e segundo + último, para tolerar sobrenomes
+    omitidos. Cada par gera a chave fonética e uma mais larga (código da
+    primeira parte + três letras da segunda), que cobre as grafias que o
+    código fonético separa, como GONÇALVES/GONSALVES.
+    """
+    partes = [parte for parte in tokens(nome) if fonetico(parte)]
+    if not partes:
+        return set()
+    if len(partes) == 1:
+        return {fonetico(partes[0])}
+    pares = [(0, -1)]
+    if len(partes) >= 3:
+        pares += [(0, 1), (1, -1)]
+    chaves = set()
+    for i, j in pares:
+        chaves.add(f'{fonetico(partes[i])}:{fonetico(partes[j])}')
+        chaves.add(f'{fonetico(partes[i])}:{partes[j][:3]}*')
+    return chaves
+
+
+def jaro_winkler(a, b):
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    alcance = max(max(len(a), len(b)) // 2 - 1, 0)
+    marcados_a = [False] * len(a)
+    marcados_b = [False] * len(b)
+    iguais = 0
+    for i, letra in enumerate(a):
+        for j in range(max(0, i - alcance), min(len(b), i + alcance + 1)):
+            if not marcados_b[j] and b[j] == letra:
+                marcados_a[i] = marcados_b[j] = True
+                iguais += 1
+                break
+    if not iguais:
+        return 0.0
+    transposicoes = 0
+    j = 0
+    for i, letra in enumerate(a):
+        if marcados_a[i]:
+            while not marcados_b[j]:
+                j += 1
+            if letra != b[j]:
+                transposicoes += 1
+            j += 1
+    jaro = (iguais / len(a) + iguais / len(b) + (iguais - transposicoes / 2) / iguais) / 3
+    prefixo = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefixo += 1
+    return jaro + prefixo * 0.1 * (1 - jaro)
+
+
+def similaridade(nome_a, nome_b):
+    """
+    Similaridade entre 0 e 1
+
+    Cada parte do nome mais curto é pareada com a parte mais parecida do
+    outro (Jaro-Winkler); a média é levemente penalizada quando um dos
+    nomes tem mais partes que o outro.
+    """
+    partes_a, partes_b = tokens(nome_a), tokens(nome_b)
+    if not partes_a or not partes_b:
+        return 0.0
+    menor, maior = sorted((partes_a, partes_b), key=len)
+    media = sum(max(jaro_winkler(parte, outra) for outra in maior) for parte in menor) / len(menor)
+    return 0.85 * media + 0.15 * len(menor) / len(maior)
+
+
+def pontuar(nome_a, nome_b):
+    """
+    Similaridade arredondada, como é gravada nas correspondências
+
+    O desaparecido não tem data de nascimento no cadastro, então só o nome
+    entra na pontuação; a data da pessoa encontrada vai junto na resposta
+    para a conferência manual.
+    """
+    return round(similaridade(nome_a, nome_b), 4)
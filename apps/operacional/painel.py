@@ -0,0 +1,231 @@
+"""
+Painel operacional com totais pré-calculados
+
+Os totais ficam em op_contagem_painel, uma linha por (grupo, chave), e
+são atualizados por diferença a cada gravação nos models do cadastro: o
+pre_save guarda as chaves que o registro tinha, o post_save soma 1 nas
+chaves novas e subtrai 1 nas que deixaram de valer. Gravações em lote com
+chaves conhecidas fazem o mesmo por diferença: lote_gravando conta as
+chaves das linhas antes da gravação e, depois do commit, elas são contadas
+de novo, lendo só essas linhas pela PK. Só a carga de planilha (chaves
+desconhecidas) reconta os grupos do model gravado, e
+`manage.py reconstruir_indices painel --intervalo 900` reconcilia tudo
+periodicamente, corrigindo qualquer diferença acumulada.
+
+A leitura monta o painel a partir da tabela de totais (poucas linhas) e
+guarda o resultado no cache até a próxima alteração.
+"""
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from apps.cadastro.models import (
+    DemandaAmbiente, DemandaEducacao, DemandaHabitacao, DemandaInterna,
+    DemandaSaude, Membro, Responsavel
+)
+from utils.metricas import fase, registrar_cache
+
+from .models import ContagemPainel
+
+CHAVE_CACHE = 'operacional:painel'
+TAMANHO_CONSULTA = 1000
+VALIDADE_CACHE = 300
+SEM_INFORMACAO = 'sem_informacao'
+
+
+class Dimensao:
+    """
+    Um grupo de totais do painel
+
+    Sem `campo`, conta todos os registros na chave fixa `chave`. Com
+    `campo`, conta por valor do campo; com `campo` e `valor`, conta na
+    chave `campo` só os registros em que o campo tem esse valor.
+    """
+
+    def __init__(self, grupo, campo=None, valor=None, chave=None):
+        self.grupo = grupo
+        self.campo = campo
+        self.valor = valor
+        self.chave = chave if chave is not None else campo
+
+    @property
+    def por_valor(self):
+        return self.campo is not None and self.valor is None
+
+    def chave_do_registro(self, linha):
+        if self.campo is None:
+            return self.chave
+        valor = linha[self.campo]
+        if self.valor is not None:
+            return self.chave if valor == self.valor else None
+        return SEM_INFORMACAO if valor in (None, '') else str(valor)
+
+    def contar(self, model):
+        queryset = model._base_manager.all()
+        if self.por_valor:
+            totais = {}
+            for valor, total in queryset.values_list(self.campo).annotate(total=Count('pk')).order_by():
+                chave = SEM_INFORMACAO if valor in (None, '') else str(valor)
+                totais[chave] = totais.get(chave, 0) + total
+            return {(self.grupo, chave): total for chave, total in totais.items()}
+        if self.valor is not None:
+            queryset = queryset.filter(**{self.campo: self.valor})
+        return {(self.grupo, self.chave): queryset.count()}
+
+    def linhas_atuais(self):
+        if self.por_valor:
+            return ContagemPainel.objects.filter(grupo=self.grupo)
+        return ContagemPainel.objects.filter(grupo=self.grupo, chave=self.chave)
+
+
+DIMENSOES = {
+    Responsavel: [
+        Dimensao('responsaveis', chave='total'),
+        Dimensao('responsaveis.por_bairro', 'bairro'),
+        Dimensao('responsaveis.por_status', 'status'),
+    ],
+    Membro: [
+        Dimensao('membros', chave='total'),
+        Dimensao('membros.por_status', 'status'),
+    ],
+    DemandaAmbiente: [Dimensao('demandas_por_tipo', chave='ambiente')],
+    DemandaEducacao: [
+        Dimensao('demandas_por_tipo', chave='educacao'),
+        Dimensao('educacao_por_alojamento', 'alojamento'),
+    ],
+    DemandaHabitacao: [Dimensao('demandas_por_tipo', chave='habitacao')],
+    DemandaInterna: [Dimensao('demandas_por_tipo', chave='interna')],
+    DemandaSaude: [
+        Dimensao('demandas_por_tipo', chave='saude'),
+        Dimensao('prioridades', 'gest_puer_nutriz', valor='S'),
+        Dimensao('prioridades', 'mob_reduzida', valor='S'),
+        Dimensao('prioridades', 'pcd_ou_mental', valor='S'),
+    ],
+}
+
+CAMPOS = {
+    model: sorted({d.campo for d in dimensoes if d.campo is not None})
+    for model, dimensoes in DIMENSOES.items()
+}
+
+
+def chaves(model, linha):
+    """Conjunto de (grupo, chave) em que o registro é contado"""
+    resultado = set()
+    for dimensao in DIMENSOES[model]:
+        chave = dimensao.chave_do_registro(linha)
+        if chave is not None:
+            resultado.add((dimensao.grupo, chave))
+    return resultado
+
+
+def chaves_da_instancia(instance):
+    model = type(instance)
+    linha = {campo: getattr(instance, model._meta.get_field(campo).attname) for campo in CAMPOS[model]}
+    return chaves(model, linha)
+
+
+def chaves_gravadas(model, pk):
+    """Chaves do registro como está no banco (vazio se ainda não existe)"""
+    linha = model._base_manager.filter(pk=pk).values(*CAMPOS[model] or ['pk']).first()
+    return set() if linha is None else chaves(model, linha)
+
+
+def contar_chaves(model, pks):
+    """Quantos dos registros `pks` são contados em cada (grupo, chave)"""
+    contagem = Counter()
+    pks = list(pks)
+    for inicio in range(0, len(pks), TAMANHO_CONSULTA):
+        linhas = model._base_manager.filter(pk__in=pks[inicio:inicio + TAMANHO_CONSULTA])
+        for linha in linhas.values(*CAMPOS[model] or ['pk']):
+            contagem.update(chaves(model, linha))
+    return contagem
+
+
+def invalidar():
+    cache.delete(CHAVE_CACHE)
+
+
+def _incrementar(grupo, chave, delta):
+    linhas = ContagemPainel.objects.filter(grupo=grupo, chave=chave)
+    if linhas.update(total=F('total') + delta):
+        return
+    try:
+        with transaction.atomic():
+            ContagemPainel.objects.create(grupo=grupo, chave=chave, total=delta)
+    except IntegrityError:
+        linhas.update(total=F('total') + delta)
+
+
+def aplicar(adicionar=(), remover=()):
+    """Soma 1 nas chaves de `adicionar` e subtrai 1 nas de `remover`"""
+    for grupo, chave in adicionar:
+        _incrementar(grupo, chave, 1)
+    for grupo, chave in remover:
+        _incrementar(grupo, chave, -1)
+    if adicionar or remover:
+        invalidar()
+
+
+def aplicar_diferenca(antes, depois):
+    """Soma em cada (grupo, chave) a diferença entre duas contagens"""
+    deltas = {
+        chave: depois.get(chave, 0) - antes.get(chave, 0) for chave in antes.keys() | depois.keys()
+    }
+    deltas = {chave: delta for chave, delta in deltas.items() if delta}
+    for (grupo, chave), delta in deltas.items():
+        _incrementar(grupo, chave, delta)
+    if deltas:
+        invalidar()
+
+
+def _substituir(pares):
+    """Reconta as dimensões de `pares` [(model, dimensão)] e troca as linhas"""
+    totais = {}
+    for model, dimensao in pares:
+        for (grupo, chave), total in dimensao.contar(model).items():
+            totais[(grupo, chave)] = totais.get((grupo, chave), 0) + total
+    with transaction.atomic():
+        for _, dimensao in pares:
+            dimensao.linhas_atuais().delete()
+        ContagemPainel.objects.bulk_create([
+            ContagemPainel(grupo=grupo, chave=chave, total=total)
+            for (grupo, chave), total in totais.items()
+        ])
+    invalidar()
+    return len(totais)
+
+
+def recontar(model):
+    return _substituir([(model, dimensao) for dimensao in DIMENSOES[model]])
+
+
+def reconstruir():
+    """Reconciliação completa a partir das tabelas do cadastro"""
+    return _substituir([
+        (model, dimensao) for model, dimensoes in DIMENSOES.items() for dimensao in dimensoes
+    ])
+
+
+def montar():
+    painel = {}
+    for grupo, chave, total in ContagemPainel.objects.values_list('grupo', 'chave', 'total').order_by('grupo', 'chave'):
+        destino = painel
+        for parte in grupo.split('.'):
+            destino = destino.setdefault(parte, {})
+        destino[chave] = total
+    painel['gerado_em'] = timezone.now().isoformat()
+    return painel
+
+
+def obter():
+    with fase('cache'):
+        painel = cache.get(CHAVE_CACHE)
+    registrar_cache('painel', acertos=painel is not None, faltas=painel is None)
+    if painel is None:
+        painel = montar()
+        cache.set(CHAVE_CACHE, painel, VALIDADE_CACHE)
+    return painel
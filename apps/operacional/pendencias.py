@@ -0,0 +1,57 @@
+"""
+Fila de trabalho dos jobs em segundo plano
+
+Os sinais do cadastro gravam em op_pendencia, na mesma transação da
+alteração, o registro alterado (tipo do job, origem e chave). O comando
+`manage.py processar_pendencias` consome a fila em lotes. Uma pendência
+reenfileirada enquanto o lote é processado tem o `criado_em` renovado e
+não é apagada ao fim do lote, sendo processada de novo na próxima rodada.
+"""
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Pendencia
+
+TODOS = '*'
+# Itens por DELETE: o OR de (id, criado_em) não pode ficar profundo demais
+TAMANHO_EXCLUSAO = 500
+
+
+def enfileirar(tipo, origem, registros):
+    """Enfileira registros de uma origem; TODOS pede o reprocessamento completo"""
+    agora = timezone.now()
+    Pendencia.objects.bulk_create(
+        [Pendencia(tipo=tipo, origem=origem, registro=str(registro), criado_em=agora) for registro in registros],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['tipo', 'origem', 'registro'],
+        update_fields=['criado_em'],
+    )
+
+
+def processar(tipo, funcao, limite=1000):
+    """
+    Entrega até `limite` pendências do tipo para `funcao`, agrupadas como
+    {origem: {registros}}, e retira da fila as que foram processadas
+    """
+    itens = list(Pendencia.objects.filter(tipo=tipo).order_by('criado_em', 'id')[:limite])
+    if not itens:
+        return 0
+    agrupados = {}
+    for item in itens:
+        agrupados.setdefault(item.origem, set()).add(item.registro)
+    funcao(agrupados)
+    # Cada item só sai se não foi reenfileirado (criado_em renovado) enquanto era processado
+    for inicio in range(0, len(itens), TAMANHO_EXCLUSAO):
+        bloco = itens[inicio:inicio + TAMANHO_EXCLUSAO]
+        Pendencia.objects.filter(reduce(or_, (Q(id=item.id, criado_em=item.criado_em) for item in bloco))).delete()
+    return len(itens)
+
+
+def pendente(tipo, origem, registro):
+    """Indica se o registro ainda aguarda processamento"""
+    return Pendencia.objects.filter(tipo=tipo, origem=origem, registro__in=[str(registro), TODOS]).exists()
+
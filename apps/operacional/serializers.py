@@ -0,0 +1,35 @@
+"""
+Serializers do app operacional
+"""
+from rest_framework import serializers
+
+from apps.cadastro.models import Responsavel
+
+from .models import CorrespondenciaDesaparecido, DuplicidadeResponsavel, TriagemFamilia
+
+
+class TriagemFamiliaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TriagemFamilia
+        fields = '__all__'
+
+
+class CorrespondenciaDesaparecidoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CorrespondenciaDesaparecido
+        exclude = ['id', 'desaparecido']
+
+
+class ResponsavelResumoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Responsavel
+        fields = ['cpf', 'nome', 'nome_mae', 'data_nasc', 'cep', 'numero', 'bairro', 'telefone']
+
+
+class DuplicidadeResponsavelSerializer(serializers.ModelSerializer):
+    responsavel_a = ResponsavelResumoSerializer(read_only=True)
+    responsavel_b = ResponsavelResumoSerializer(read_only=True)
+
+    class Meta:
+        model = DuplicidadeResponsavel
+        fields = '__all__'
@@ -0,0 +1,177 @@
+"""
+Mantém as tabelas do app operacional em dia com o cadastro
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.cadastro.models import DemandaHabitacao, DemandaInterna, DemandaSaude, Membro, Responsavel
+from apps.cadastro.signals import lote_gravado, lote_gravando
+
+from . import correspondencias, duplicidades, espacial, painel, pendencias, sincronizacao, triagem
+from .models import Alteracao, CelulaHabitacao
+
+
+@receiver(post_save, sender=DemandaHabitacao)
+def indexar_habitacao(sender, instance, **kwargs):
+    espacial.atualizar([instance.pk])
+
+
+@receiver(post_delete, sender=DemandaHabitacao)
+def remover_habitacao(sender, instance, **kwargs):
+    CelulaHabitacao.objects.filter(cpf=instance.pk).delete()
+
+
+@receiver(lote_gravado, sender=DemandaHabitacao)
+def indexar_lote_habitacao(sender, chaves=None, **kwargs):
+    if chaves is None:
+        espacial.reconstruir()
+    else:
+        espacial.atualizar(chaves)
+
+
+def guardar_chaves_painel(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._chaves_painel = (
+        set() if instance.pk is None else painel.chaves_gravadas(sender, instance.pk)
+    )
+
+
+def atualizar_painel(sender, instance, using, raw=False, **kwargs):
+    if raw:
+        return
+    anteriores = instance.__dict__.pop('_chaves_painel', set())
+    novas = painel.chaves_da_instancia(instance)
+    adicionar, remover = novas - anteriores, anteriores - novas
+    if adicionar or remover:
+        # Fora da transação da gravação, para não segurar o lock das linhas de total
+        transaction.on_commit(lambda: painel.aplicar(adicionar, remover), using=using)
+
+
+def remover_do_painel(sender, instance, using, **kwargs):
+    remover = painel.chaves_da_instancia(instance)
+    transaction.on_commit(lambda: painel.aplicar(remover=remover), using=using)
+
+
+def guardar_chaves_painel_lote(sender, chaves=None, using=None, **kwargs):
+    if chaves is None:
+        return
+    anteriores = painel.contar_chaves(sender, chaves)
+
+    def aplicar():
+        painel.aplicar_diferenca(anteriores, painel.contar_chaves(sender, chaves))
+    transaction.on_commit(aplicar, using=using)
+
+
+def recontar_painel(sender, chaves=None, **kwargs):
+    # Com chaves, a diferença já foi aplicada a partir de lote_gravando
+    if chaves is None:
+        painel.recontar(sender)
+
+
+for model in painel.DIMENSOES:
+    uid = f'painel_{model._meta.db_table}'
+    pre_save.connect(guardar_chaves_painel, sender=model, dispatch_uid=uid)
+    post_save.connect(atualizar_painel, sender=model, dispatch_uid=uid)
+    post_delete.connect(remover_do_painel, sender=model, dispatch_uid=uid)
+    lote_gravando.connect(guardar_chaves_painel_lote, sender=model, dispatch_uid=uid)
+    lote_gravado.connect(recontar_painel, sender=model, dispatch_uid=uid)
+
+
+def _familias(instance):
+    if isinstance(instance, Responsavel):
+        return {instance.pk}
+    if isinstance(instance, Membro):
+        return {instance.cpf_responsavel_id}
+    return triagem.familias_de([instance.pk])
+
+
+def guardar_familia_anterior(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    # Membro trocado de família: as duas famílias são recalculadas
+    instance._familia_anterior = Membro._base_manager.filter(pk=instance.pk).values_list(
+        'cpf_responsavel', flat=True
+    ).first()
+
+
+def atualizar_triagem(sender, instance, using, raw=False, **kwargs):
+    if raw:
+        return
+    familias = _familias(instance)
+    familias.add(instance.__dict__.pop('_familia_anterior', None))
+    familias.discard(None)
+    if familias:
+        transaction.on_commit(lambda: triagem.recalcular(familias), using=using)
+
+
+def atualizar_triagem_lote(sender, chaves=None, **kwargs):
+    if chaves is None:
+        triagem.reconstruir()
+    else:
+        triagem.recalcular(triagem.familias_de(chaves))
+
+
+pre_save.connect(guardar_familia_anterior, sender=Membro, dispatch_uid='triagem_membro')
+for model in (Responsavel, Membro, DemandaSaude, DemandaInterna):
+    uid = f'triagem_{model._meta.db_table}'
+    post_save.connect(atualizar_triagem, sender=model, dispatch_uid=uid)
+    post_delete.connect(atualizar_triagem, sender=model, dispatch_uid=uid)
+    lote_gravado.connect(atualizar_triagem_lote, sender=model, dispatch_uid=uid)
+
+
+def enfileirar_nome(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    origem = ORIGEM_DO_MODEL[sender]
+    pendencias.enfileirar(correspondencias.TIPO, origem, [instance.pk])
+
+
+def enfileirar_nomes_lote(sender, chaves=None, **kwargs):
+    origem = ORIGEM_DO_MODEL[sender]
+    pendencias.enfileirar(correspondencias.TIPO, origem, [pendencias.TODOS] if chaves is None else chaves)
+
+
+ORIGEM_DO_MODEL = {fonte.model: origem for origem, fonte in correspondencias.ORIGENS.items()}
+for model in ORIGEM_DO_MODEL:
+    uid = f'nomes_{model._meta.db_table}'
+    post_save.connect(enfileirar_nome, sender=model, dispatch_uid=uid)
+    post_delete.connect(enfileirar_nome, sender=model, dispatch_uid=uid)
+    lote_gravado.connect(enfileirar_nomes_lote, sender=model, dispatch_uid=uid)
+
+
+def enfileirar_duplicidade(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        pendencias.enfileirar(duplicidades.TIPO, 'responsavel', [instance.pk])
+
+
+def enfileirar_duplicidades_lote(sender, chaves=None, **kwargs):
+    pendencias.enfileirar(duplicidades.TIPO, 'responsavel', [pendencias.TODOS] if chaves is None else chaves)
+
+
+post_save.connect(enfileirar_duplicidade, sender=Responsavel, dispatch_uid='duplicidade_responsavel')
+post_delete.connect(enfileirar_duplicidade, sender=Responsavel, dispatch_uid='duplicidade_responsavel')
+lote_gravado.connect(enfileirar_duplicidades_lote, sender=Responsavel, dispatch_uid='duplicidade_responsavel')
+
+
+# O log de sincronização é gravado na transação da própria alteração
+def registrar_gravacao(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sincronizacao.registrar(sender, [instance.pk])
+
+
+def registrar_exclusao(sender, instance, **kwargs):
+    sincronizacao.registrar(sender, [instance.pk], Alteracao.EXCLUSAO)
+
+
+def registrar_lote(sender, chaves=None, **kwargs):
+    sincronizacao.registrar(sender, chaves)
+
+
+for model in sincronizacao.SERIALIZERS:
+    uid = f'sincronizacao_{model._meta.db_table}'
+    post_save.connect(registrar_gravacao, sender=model, dispatch_uid=uid)
+    post_delete.connect(registrar_exclusao, sender=model, dispatch_uid=uid)
+    lote_gravando.connect(registrar_lote, sender=model, dispatch_uid=uid)
@@ -0,0 +1,151 @@
+"""
+Sincronização incremental dos tablets de campo (/cadastro/sync/)
+
+Cada gravação no cadastro acrescenta uma linha em op_alteracao na mesma
+transação da gravação, então uma queda entre os dois não perde a
+alteração. O cliente guarda o id da última alteração recebida e pede só as
+seguintes: o custo da sincronização depende de quantas alterações houve,
+não do tamanho das tabelas.
+
+A página não repete o histórico: cada registro alterado aparece uma vez,
+com o estado atual. Registro que não existe mais vira uma exclusão
+(tombstone), e uma carga sem chaves vira um pedido de recarga da tabela.
+
+Uma transação pode receber um id menor e ficar visível depois de outra com
+id maior. Por isso a página é um prefixo dos ids: ela termina na primeira
+alteração com menos de SINCRONIZACAO_MARGEM_SEGUNDOS, e as seguintes ficam
+para a próxima chamada, mesmo que já sejam antigas. Tanto o registro
+(registrado_em) quanto o corte (Now() - margem, calculado na consulta) usam
+o relógio do banco, nunca o dos servidores da aplicação; a margem deve
+cobrir a transação de gravação mais longa (lotes grandes).
+"""
+import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.db.models.functions import Now
+
+from apps.cadastro.mixins import planejar_consulta
+from apps.cadastro.models import (
+    Alojamento, CepAtingido, DemandaAmbiente, DemandaEducacao, DemandaHabitacao,
+    DemandaInterna, DemandaSaude, Desaparecido, Membro, Responsavel
+)
+from apps.cadastro.serializers import (
+    AlojamentoSerializer, CepAtingidoSerializer, DemandaAmbienteSerializer,
+    DemandaEducacaoSerializer, DemandaHabitacaoSerializer, DemandaInternaSerializer,
+    DemandaSaudeSerializer, DesaparecidoSerializer, MembroSerializer, ResponsavelSerializer
+)
+
+from .models import Alteracao
+from .pendencias import TODOS
+
+SERIALIZERS = {
+    Responsavel: ResponsavelSerializer,
+    Membro: MembroSerializer,
+    DemandaAmbiente: DemandaAmbienteSerializer,
+    DemandaEducacao: DemandaEducacaoSerializer,
+    DemandaHabitacao: DemandaHabitacaoSerializer,
+    DemandaInterna: DemandaInternaSerializer,
+    DemandaSaude: DemandaSaudeSerializer,
+    Desaparecido: DesaparecidoSerializer,
+    Alojamento: AlojamentoSerializer,
+    CepAtingido: CepAtingidoSerializer,
+}
+MODELOS = {model._meta.db_table: model for model in SERIALIZERS}
+
+GRAVADO = 'gravado'
+EXCLUIDO = 'excluido'
+RECARREGAR = 'recarregar'
+
+LIMITE_PADRAO = 500
+LIMITE_MAXIMO = 5000
+TAMANHO_BLOCO = 1000
+
+
+def registrar(model, chaves, operacao=Alteracao.GRAVACAO):
+    """
+    Acrescenta ao log as chaves gravadas; chaves=None registra uma carga da
+    tabela. Deve rodar na transação da própria gravação.
+    """
+    agora = Now()
+    modelo = model._meta.db_table
+    if chaves is None:
+        linhas = [Alteracao(modelo=modelo, chave=TODOS, operacao=Alteracao.CARGA, registrado_em=agora)]
+    else:
+        linhas = [
+            Alteracao(modelo=modelo, chave=str(chave), operacao=operacao, registrado_em=agora)
+            for chave in chaves
+        ]
+    Alteracao.objects.bulk_create(linhas, batch_size=TAMANHO_BLOCO)
+
+
+def cursor_atual():
+    """Id da última alteração; ponto de partida depois de um download completo"""
+    return Alteracao.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def _estado_atual(model, chaves):
+    """{chave: dados serializados} dos registros que ainda existem"""
+    serializer_class = SERIALIZERS[model]
+    dados = {}
+    chaves = iter(chaves)
+    while bloco := list(islice(chaves, TAMANHO_BLOCO)):
+        objetos = list(planejar_consulta(serializer_class).aplicar(model._base_manager.filter(pk__in=bloco)))
+        for objeto, linha in zip(objetos, serializer_class(objetos, many=True).data):
+            dados[str(objeto.pk)] = linha
+    return dados
+
+
+def alteracoes_desde(cursor, limite=LIMITE_PADRAO, modelos=None):
+    """
+    Página de alterações posteriores a `cursor`
+
+    Retorna (próximo cursor, há mais páginas, alterações), em que cada
+    alteração é {'modelo', 'chave', 'operacao'} e, nas gravações, 'dados'.
+    """
+    margem = getattr(settings, 'SINCRONIZACAO_MARGEM_SEGUNDOS', 30)
+    recente = ExpressionWrapper(
+        Q(registrado_em__gt=Now() - datetime.timedelta(seconds=margem)), output_field=BooleanField()
+    )
+    linhas = Alteracao.objects.filter(id__gt=cursor)
+    if modelos:
+        linhas = linhas.filter(modelo__in=modelos)
+    linhas = list(
+        linhas.annotate(recente=recente).order_by('id').values_list('id', 'modelo', 'chave', 'recente')[:limite + 1]
+    )
+    # Prefixo: da primeira alteração recente em diante, nada entra nesta página
+    for posicao, linha in enumerate(linhas):
+        if linha[3]:
+            linhas = linhas[:posicao]
+            mais = False
+            break
+    else:
+        mais = len(linhas) > limite
+        linhas = linhas[:limite]
+    proximo = linhas[-1][0] if linhas else cursor
+
+    # Cada registro entra uma vez, na posição da sua última alteração da página
+    ultimas = {}
+    for id_alteracao, modelo, chave, _ in linhas:
+        if modelo in MODELOS:
+            ultimas.pop((modelo, chave), None)
+            ultimas[(modelo, chave)] = id_alteracao
+
+    por_modelo = {}
+    for modelo, chave in ultimas:
+        if chave != TODOS:
+            por_modelo.setdefault(modelo, set()).add(chave)
+    estados = {modelo: _estado_atual(MODELOS[modelo], chaves) for modelo, chaves in por_modelo.items()}
+
+    alteracoes = []
+    for modelo, chave in ultimas:
+        if chave == TODOS:
+            alteracoes.append({'modelo': modelo, 'chave': None, 'operacao': RECARREGAR})
+        elif chave in estados[modelo]:
+            alteracoes.append({
+                'modelo': modelo, 'chave': chave, 'operacao': GRAVADO, 'dados': estados[modelo][chave],
+            })
+        else:
+            alteracoes.append({'modelo': modelo, 'chave': chave, 'operacao': EXCLUIDO})
+    return proximo, mais, alteracoes
@@ -0,0 +1,87 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.cadastro.models import Desaparecido, Membro, Responsavel
+
+from . import correspondencias, nomes, pendencias
+from .models import CorrespondenciaDesaparecido, Pendencia
+
+
+class NomesTests(TestCase):
+
+    def test_grafias_equivalentes_tem_o_mesmo_codigo(self):
+        for a, b in (('SOUZA', 'SOUSA'), ('LUIZ', 'LUIS'), ('THAIS', 'TAIS')):
+            with self.subTest(a=a, b=b):
+                self.assertEqual(nomes.fonetico(a), nomes.fonetico(b))
+
+    def test_chaves_de_bloqueio_toleram_grafia_e_sobrenome_omitido(self):
+        self.assertTrue(nomes.chaves_bloqueio('José Gonçalves') & nomes.chaves_bloqueio('Jose Gonsalves'))
+        self.assertTrue(nomes.chaves_bloqueio('Maria Souza') & nomes.chaves_bloqueio('Maria da Silva Souza'))
+        self.assertFalse(nomes.chaves_bloqueio('Maria Souza') & nomes.chaves_bloqueio('Pedro Oliveira'))
+
+    def test_pontuacao(self):
+        self.assertEqual(nomes.pontuar('Maria de Souza', 'MARIA SOUSA'), nomes.pontuar('MARIA SOUSA', 'Maria de Souza'))
+        self.assertGreaterEqual(nomes.pontuar('Maria de Souza', 'Maria Sousa'), correspondencias.LIMIAR)
+        self.assertLess(nomes.pontuar('Maria de Souza', 'Mauro Santos'), correspondencias.LIMIAR)
+
+
+class CorrespondenciasTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        responsavel = Responsavel.objects.create(cpf='00000000000', nome='Maria de Souza', cep='93000000',
+                                                 numero=1, data_nasc=datetime.date(1980, 5, 2))
+        Membro.objects.create(cpf='00000000191', nome='Pedro Oliveira', cpf_responsavel=responsavel)
+        self.desaparecido = Desaparecido.objects.create(cpf='12345678909', nome_desaparecido='Maria Sousa',
+                                                        data_desaparecimento=timezone.localdate(), vinculo='Mãe')
+
+    def _url(self):
+        return f'/api/v1/cadastro/desaparecidos/{self.desaparecido.pk}/correspondencias/'
+
+    def test_fila_e_correspondencias(self):
+        self.assertTrue(self.client.get(self._url()).json()['processando'])
+        while pendencias.processar(correspondencias.TIPO, correspondencias.processar):
+            pass
+        dados = self.client.get(self._url()).json()
+        self.assertFalse(dados['processando'])
+        self.assertEqual([(c['origem'], c['registro']) for c in dados['correspondencias']],
+                         [('responsavel', '00000000000')])
+        self.assertEqual(dados['correspondencias'][0]['familia'], '00000000000')
+
+    def test_pessoa_alterada_sai_das_correspondencias(self):
+        correspondencias.reconstruir()
+        self.assertTrue(CorrespondenciaDesaparecido.objects.exists())
+        Responsavel.objects.filter(cpf='00000000000').update(nome='Joana Pereira')
+        correspondencias.processar({'responsavel': {'00000000000'}})
+        self.assertFalse(CorrespondenciaDesaparecido.objects.exists())
+
+
+class PendenciasTests(TestCase):
+
+    def test_reenfileirada_durante_o_lote_continua_na_fila(self):
+        inicio = timezone.now()
+        with mock.patch('apps.operacional.pendencias.timezone.now', return_value=inicio):
+            pendencias.enfileirar('teste', 'responsavel', ['a'])
+        with mock.patch('apps.operacional.pendencias.timezone.now',
+                        return_value=inicio + datetime.timedelta(seconds=10)):
+            pendencias.enfileirar('teste', 'responsavel', ['b'])
+
+        def processar(agrupados):
+            self.assertEqual(agrupados, {'responsavel': {'a', 'b'}})
+            # Outro servidor, com o relógio um pouco atrás, reenfileira 'a'
+            with mock.patch('apps.operacional.pendencias.timezone.now',
+                            return_value=inicio + datetime.timedelta(seconds=5)):
+                pendencias.enfileirar('teste', 'responsavel', ['a'])
+
+        self.assertEqual(pendencias.processar('teste', processar), 2)
+        self.assertEqual(list(Pendencia.objects.filter(tipo='teste').values_list('registro', flat=True)), ['a'])
+        self.assertTrue(pendencias.pendente('teste', 'responsavel', 'a'))
+        self.assertFalse(pendencias.pendente('teste', 'responsavel', 'b'))
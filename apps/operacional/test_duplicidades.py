@@ -0,0 +1,124 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.cadastro.models import DemandaSaude, Membro, Responsavel
+
+from . import duplicidades
+from .models import DuplicidadeResponsavel
+
+URL = '/api/v1/operacional/duplicidades/'
+NASCIMENTO = datetime.date(1980, 5, 2)
+
+
+def criar_responsavel(cpf, nome='Maria de Souza', **campos):
+    campos = {'nome_mae': 'Ana Pereira', 'data_nasc': NASCIMENTO, 'cep': '93000000', 'numero': 10, **campos}
+    return Responsavel.objects.create(cpf=cpf, nome=nome, **campos)
+
+
+class DeteccaoTests(TestCase):
+
+    def test_cpf_com_um_digito_trocado_compartilha_chave(self):
+        linha = {'cpf': '52998224725', 'nome': 'Maria Souza', 'nome_mae': None, 'data_nasc': None,
+                 'cep': None, 'numero': None}
+        self.assertTrue(duplicidades.chaves(linha) & duplicidades.chaves({**linha, 'cpf': '52998224728'}))
+        self.assertFalse(duplicidades.chaves(linha) & duplicidades.chaves({**linha, 'cpf': '11144477735',
+                                                                           'nome': 'Pedro Oliveira'}))
+
+    def test_comparacao(self):
+        a = {'cpf': '52998224725', 'nome': 'Maria de Souza', 'nome_mae': 'Ana Pereira',
+             'data_nasc': NASCIMENTO, 'cep': '93000000', 'numero': 10}
+        pontuacao, criterios = duplicidades.comparar(a, {**a, 'cpf': '52998227425', 'nome': 'Maria Sousa'})
+        self.assertEqual(criterios['cpf'], 1.0)
+        self.assertGreaterEqual(pontuacao, duplicidades.LIMIAR)
+        self.assertIsNone(duplicidades.comparar(a, {**a, 'nome': 'Pedro Oliveira'}))
+
+    def test_verificar_encontra_o_par_e_remove_quando_deixa_de_valer(self):
+        criar_responsavel('52998224725')
+        criar_responsavel('52998224728', nome='Maria Sousa')
+        criar_responsavel('11144477735', nome='Pedro Oliveira', cep='91000000')
+        # Como a fila faria com cada um ao ser gravado
+        duplicidades.indexar()
+        self.assertEqual(duplicidades.verificar(['52998224728']), 1)
+        par = DuplicidadeResponsavel.objects.get()
+        self.assertEqual((par.responsavel_a_id, par.responsavel_b_id), ('52998224725', '52998224728'))
+
+        Responsavel.objects.filter(cpf='52998224728').update(nome='Joana Lima', nome_mae=None,
+                                                             data_nasc=None, cep='91000000')
+        duplicidades.verificar(['52998224728'])
+        self.assertFalse(DuplicidadeResponsavel.objects.exists())
+
+    def test_blocos_grandes_demais_sao_ignorados(self):
+        # Mesmo endereço, nomes e CPFs diferentes: só o bloco E:cep:numero os junta
+        for cpf, nome in (('11144477735', 'Ana Lima'), ('12345678909', 'Bruno Costa'), ('52998224725', 'Carla Dias')):
+            criar_responsavel(cpf, nome=nome, nome_mae=None, data_nasc=None)
+        duplicidades.indexar()
+        with mock.patch.object(duplicidades, 'MAX_BLOCO', 2):
+            self.assertEqual(duplicidades._vizinhos({'11144477735'}), set())
+        self.assertEqual(duplicidades._vizinhos({'11144477735'}),
+                         {('11144477735', '12345678909'), ('11144477735', '52998224725')})
+
+    def test_reconstruir_igual_ao_incremental(self):
+        criar_responsavel('52998224725')
+        criar_responsavel('52998224728', nome='Maria Sousa')
+        duplicidades.verificar(['52998224725', '52998224728'])
+        incremental = list(DuplicidadeResponsavel.objects.values_list('responsavel_a', 'responsavel_b', 'pontuacao'))
+        self.assertEqual(duplicidades.reconstruir(), 1)
+        self.assertEqual(
+            list(DuplicidadeResponsavel.objects.values_list('responsavel_a', 'responsavel_b', 'pontuacao')),
+            incremental,
+        )
+
+
+class MesclagemTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        self.mantido = criar_responsavel('52998224725')
+        self.removido = criar_responsavel('52998224728', nome='Maria Sousa')
+        duplicidades.verificar([self.mantido.cpf, self.removido.cpf])
+        self.par = DuplicidadeResponsavel.objects.get()
+
+    def _mesclar(self, manter):
+        return self.client.post(f'{URL}{self.par.pk}/mesclar/', {'manter': manter}, format='json')
+
+    def test_move_membros_e_demandas(self):
+        Membro.objects.create(cpf='00000000191', nome='Filho', cpf_responsavel=self.removido)
+        DemandaSaude.objects.create(cpf=self.removido.cpf, gest_puer_nutriz='S', mob_reduzida='N',
+                                    cuida_outrem='N', pcd_ou_mental='N')
+        with self.captureOnCommitCallbacks(execute=True):
+            resposta = self._mesclar(self.mantido.cpf)
+        self.assertEqual(resposta.json(), {'mantido': self.mantido.cpf, 'removido': self.removido.cpf})
+        self.assertEqual(Membro.objects.get().cpf_responsavel_id, self.mantido.cpf)
+        self.assertEqual(DemandaSaude.objects.get().cpf, self.mantido.cpf)
+        self.assertFalse(Responsavel.objects.filter(cpf=self.removido.cpf).exists())
+        self.par.refresh_from_db()
+        self.assertEqual(self.par.status, DuplicidadeResponsavel.MESCLADA)
+        self.assertEqual(self._mesclar(self.mantido.cpf).status_code, 400)
+
+    def test_conflito_nas_demandas_de_uma_linha_por_pessoa(self):
+        for cpf in (self.mantido.cpf, self.removido.cpf):
+            DemandaSaude.objects.create(cpf=cpf, gest_puer_nutriz='N', mob_reduzida='N',
+                                        cuida_outrem='N', pcd_ou_mental='N')
+        with self.assertRaises(duplicidades.ConflitoMesclagem) as erro:
+            duplicidades.mesclar(self.par, self.mantido.cpf)
+        self.assertEqual(erro.exception.tabelas, ['demanda_saude'])
+
+        resposta = self._mesclar(self.mantido.cpf)
+        self.assertEqual(resposta.status_code, 409)
+        self.assertEqual(resposta.json()['tabelas'], ['demanda_saude'])
+        self.assertTrue(Responsavel.objects.filter(cpf=self.removido.cpf).exists())
+
+    def test_cpf_fora_do_par_e_descarte(self):
+        self.assertEqual(self._mesclar('11144477735').status_code, 400)
+        resposta = self.client.post(f'{URL}{self.par.pk}/descartar/')
+        self.assertEqual(resposta.json()['status'], DuplicidadeResponsavel.DESCARTADA)
+        # Reavaliar não traz o par de volta para a fila
+        duplicidades.verificar([self.mantido.cpf])
+        self.assertFalse(DuplicidadeResponsavel.objects.filter(status=DuplicidadeResponsavel.PENDENTE).exists())
@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.cadastro.models import DemandaHabitacao
+
+from . import espacial
+from .models import CelulaHabitacao
+
+URL = '/api/v1/cadastro/demandas-habitacao/'
+# Centro de Canoas; 0,001 grau de latitude ≈ 111 m
+LAT, LNG = -29.9178, -51.1839
+
+
+class IndiceGradeTests(TestCase):
+
+    def test_celulas_da_mesma_linha_sao_contiguas(self):
+        self.assertEqual(espacial.celula(LAT, LNG + espacial.TAMANHO_CELULA), espacial.celula(LAT, LNG) + 1)
+        self.assertEqual(
+            espacial.celula(LAT + espacial.TAMANHO_CELULA, LNG) - espacial.celula(LAT, LNG),
+            espacial.COLUNAS_GRADE,
+        )
+
+    def test_retangulo_do_raio_contem_o_circulo(self):
+        sul, oeste, norte, leste = espacial.retangulo_do_raio(LAT, LNG, 1000)
+        self.assertAlmostEqual((norte - sul) * espacial.METROS_POR_GRAU, 2000)
+        self.assertGreater(leste - oeste, norte - sul)
+
+    def test_gravacao_mantem_o_indice(self):
+        demanda = DemandaHabitacao.objects.create(cpf='00000000191', latitude=LAT, longitude=LNG)
+        self.assertEqual(CelulaHabitacao.objects.get(cpf=demanda.cpf).celula, espacial.celula(LAT, LNG))
+        demanda.delete()
+        self.assertFalse(CelulaHabitacao.objects.exists())
+
+
+class ProximidadeFilterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        # Uma demanda a cada ~111 m para o norte; as ímpares em área verde
+        for i in range(6):
+            DemandaHabitacao.objects.create(cpf=f'{i:011d}', latitude=LAT + i * 0.001, longitude=LNG,
+                                            area_verde='S' if i % 2 else 'N')
+        DemandaHabitacao.objects.create(cpf='99999999999')
+
+    def _cpfs(self, **params):
+        resposta = self.client.get(URL, params)
+        self.assertEqual(resposta.status_code, 200, resposta.content)
+        return [d['cpf'] for d in resposta.json()['results']]
+
+    def test_raio_ordenado_pela_distancia(self):
+        self.assertEqual(self._cpfs(near=f'{LAT + 0.0021},{LNG}', radius='150'),
+                         ['00000000002', '00000000003', '00000000001'])
+
+    def test_mais_proximas(self):
+        self.assertEqual(self._cpfs(near=f'{LAT},{LNG}', nearest='2'), ['00000000000', '00000000001'])
+
+    def test_mais_proximas_depois_dos_outros_filtros(self):
+        self.assertEqual(self._cpfs(near=f'{LAT},{LNG}', nearest='2', area_verde='S'),
+                         ['00000000001', '00000000003'])
+
+    def test_bbox(self):
+        bbox = f'{LNG - 0.001},{LAT + 0.0015},{LNG + 0.001},{LAT + 0.0035}'
+        self.assertEqual(sorted(self._cpfs(bbox=bbox)), ['00000000002', '00000000003'])
+
+    def test_parametros_invalidos(self):
+        for params in ({'near': '1'}, {'near': '91,0'}, {'near': f'{LAT},{LNG}', 'radius': '0'},
+                       {'near': f'{LAT},{LNG}', 'nearest': '0'}, {'bbox': '1,1,0,0'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(URL, params).status_code, 400)
@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.cadastro.models import DemandaSaude, Membro, Responsavel
+from apps.cadastro.signals import lote_gravado, lote_gravando
+
+from . import painel
+from .models import ContagemPainel
+
+
+def totais():
+    return {
+        (grupo, chave): total
+        for grupo, chave, total in ContagemPainel.objects.values_list('grupo', 'chave', 'total')
+        if total
+    }
+
+
+class PainelIncrementalTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def assertIgualARecontagem(self):
+        incremental = totais()
+        painel.reconstruir()
+        self.assertEqual(incremental, totais())
+
+    def test_gravacoes_individuais(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(4):
+                Responsavel.objects.create(cpf=f'{i:011d}', nome=f'Pessoa {i}', cep='93000000', numero=i,
+                                           bairro='Centro' if i % 2 else 'Niterói', status='A')
+            responsavel = Responsavel.objects.get(cpf='00000000000')
+            Membro.objects.create(cpf='00000000191', nome='Filho', cpf_responsavel=responsavel, status='A')
+            DemandaSaude.objects.create(cpf='00000000191', gest_puer_nutriz='S', mob_reduzida='N',
+                                        cuida_outrem='N', pcd_ou_mental='S')
+        self.assertEqual(totais()[('responsaveis.por_bairro', 'Centro')], 2)
+        self.assertEqual(totais()[('prioridades', 'pcd_ou_mental')], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            responsavel.bairro = 'Centro'
+            responsavel.status = None
+            responsavel.save()
+            Responsavel.objects.get(cpf='00000000003').delete()
+        self.assertEqual(totais()[('responsaveis.por_bairro', 'Centro')], 2)
+        self.assertEqual(totais()[('responsaveis.por_status', painel.SEM_INFORMACAO)], 1)
+        self.assertIgualARecontagem()
+
+    def test_lote_com_chaves_conta_so_as_linhas_gravadas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                Responsavel.objects.create(cpf=f'{i:011d}', nome=f'Pessoa {i}', cep='93000000', numero=i,
+                                           status='A')
+        chaves = ['00000000000', '00000000001']
+        with self.captureOnCommitCallbacks(execute=True):
+            lote_gravando.send(sender=Responsavel, chaves=chaves, using='default')
+            Responsavel.objects.filter(pk__in=chaves).update(status='I')
+        with mock.patch.object(painel, 'recontar') as recontar:
+            lote_gravado.send(sender=Responsavel, chaves=chaves, using='default')
+        recontar.assert_not_called()
+        self.assertEqual(totais()[('responsaveis.por_status', 'I')], 2)
+        self.assertIgualARecontagem()
+
+    def test_lote_sem_chaves_reconta_o_model(self):
+        Responsavel.objects.bulk_create([
+            Responsavel(cpf=f'{i:011d}', nome=f'Pessoa {i}', cep='93000000', numero=i) for i in range(3)
+        ])
+        lote_gravado.send(sender=Responsavel, chaves=None, using='default')
+        self.assertEqual(totais()[('responsaveis', 'total')], 3)
+
+
+class PainelApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+
+    def test_leitura_em_cache_ate_a_proxima_alteracao(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Responsavel.objects.create(cpf='00000000000', nome='Ana', cep='93000000', numero=1, bairro='Centro')
+        dados = self.client.get('/api/v1/operacional/painel/').json()
+        self.assertEqual(dados['responsaveis'], {'total': 1, 'por_bairro': {'Centro': 1},
+                                                 'por_status': {painel.SEM_INFORMACAO: 1}})
+        with self.assertNumQueries(0):
+            self.client.get('/api/v1/operacional/painel/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Responsavel.objects.create(cpf='00000000191', nome='Bia', cep='93000000', numero=2, bairro='Centro')
+        self.assertEqual(self.client.get('/api/v1/operacional/painel/').json()['responsaveis']['total'], 2)
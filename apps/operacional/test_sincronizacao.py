@@ -0,0 +1,121 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.functions import Now
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.cadastro.models import Alojamento, Responsavel
+
+from . import sincronizacao
+from .models import Alteracao
+
+URL = '/api/v1/cadastro/sync/'
+
+
+class CursorSincronizacaoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for i in range(3):
+            Responsavel.objects.create(cpf=f'{i:011d}', nome=f'Pessoa {i}', cep='93000000', numero=i)
+        Alteracao.objects.all().delete()
+
+    def _alteracao(self, chave, segundos_atras):
+        return Alteracao.objects.create(
+            modelo='responsavel', chave=chave, operacao=Alteracao.GRAVACAO,
+            registrado_em=timezone.now() - datetime.timedelta(seconds=segundos_atras),
+        )
+
+    @override_settings(SINCRONIZACAO_MARGEM_SEGUNDOS=30)
+    def test_pagina_termina_na_primeira_alteracao_recente(self):
+        antiga = self._alteracao('00000000000', 60)
+        self._alteracao('00000000001', 0)
+        self._alteracao('00000000002', 60)
+
+        proximo, mais, alteracoes = sincronizacao.alteracoes_desde(0)
+        # A terceira já é antiga, mas vem depois de uma recente: fica para depois
+        self.assertEqual((proximo, mais), (antiga.id, False))
+        self.assertEqual([a['chave'] for a in alteracoes], ['00000000000'])
+
+        Alteracao.objects.update(registrado_em=timezone.now() - datetime.timedelta(seconds=60))
+        proximo, mais, alteracoes = sincronizacao.alteracoes_desde(antiga.id)
+        self.assertEqual([a['chave'] for a in alteracoes], ['00000000001', '00000000002'])
+        self.assertEqual(proximo, Alteracao.objects.order_by('-id').first().id)
+
+    @override_settings(SINCRONIZACAO_MARGEM_SEGUNDOS=30)
+    def test_id_menor_gravado_por_ultimo_segura_a_pagina(self):
+        antiga = self._alteracao('00000000000', 60)
+        atrasada = self._alteracao('00000000001', 60)
+        posterior = self._alteracao('00000000002', 60)
+        # A transação da alteração do meio terminou agora, depois da seguinte
+        Alteracao.objects.filter(id=atrasada.id).update(registrado_em=Now())
+
+        # O corte vem do banco: um servidor com o relógio adiantado não libera a página
+        adiantado = timezone.now() + datetime.timedelta(hours=1)
+        with mock.patch.object(timezone, 'now', return_value=adiantado):
+            proximo, mais, alteracoes = sincronizacao.alteracoes_desde(0)
+        self.assertEqual((proximo, mais), (antiga.id, False))
+        self.assertEqual([a['chave'] for a in alteracoes], ['00000000000'])
+        self.assertLess(atrasada.id, posterior.id)
+
+    @override_settings(SINCRONIZACAO_MARGEM_SEGUNDOS=0)
+    def test_limite_e_cursor(self):
+        ids = [self._alteracao(f'{i:011d}', 60).id for i in range(3)]
+        proximo, mais, alteracoes = sincronizacao.alteracoes_desde(0, limite=2)
+        self.assertEqual((proximo, mais, len(alteracoes)), (ids[1], True, 2))
+        proximo, mais, alteracoes = sincronizacao.alteracoes_desde(proximo, limite=2)
+        self.assertEqual((proximo, mais, [a['chave'] for a in alteracoes]), (ids[2], False, ['00000000002']))
+        self.assertEqual(sincronizacao.alteracoes_desde(proximo), (proximo, False, []))
+
+    @override_settings(SINCRONIZACAO_MARGEM_SEGUNDOS=0)
+    def test_registro_aparece_uma_vez_com_estado_atual(self):
+        responsavel = Responsavel.objects.get(cpf='00000000000')
+        responsavel.nome = 'Nome novo'
+        responsavel.save()
+        Responsavel.objects.get(cpf='00000000001').delete()
+
+        _, _, alteracoes = sincronizacao.alteracoes_desde(0)
+        por_chave = {a['chave']: a for a in alteracoes}
+        self.assertEqual(len(alteracoes), 2)
+        self.assertEqual(por_chave['00000000000']['operacao'], sincronizacao.GRAVADO)
+        self.assertEqual(por_chave['00000000000']['dados']['nome'], 'Nome novo')
+        self.assertEqual(por_chave['00000000001']['operacao'], sincronizacao.EXCLUIDO)
+
+    def test_rollback_descarta_alteracao(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Alojamento.objects.create(nome='Ginásio')
+                self.assertTrue(Alteracao.objects.filter(modelo='alojamento').exists())
+                raise RuntimeError
+        self.assertFalse(Alteracao.objects.filter(modelo='alojamento').exists())
+
+
+class SincronizarApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+
+    @override_settings(SINCRONIZACAO_MARGEM_SEGUNDOS=0)
+    def test_cursor_inicial_e_alteracoes_seguintes(self):
+        cursor = self.client.get(URL).json()['cursor']
+        resposta = self.client.post('/api/v1/cadastro/responsaveis/', {
+            'cpf': '52998224725', 'nome': 'Ana', 'cep': '93000000', 'numero': 1,
+        }, format='json')
+        self.assertEqual(resposta.status_code, 201, resposta.content)
+
+        dados = self.client.get(URL, {'since': cursor}).json()
+        self.assertEqual(dados['mais'], False)
+        self.assertEqual([(a['modelo'], a['chave'], a['operacao']) for a in dados['alteracoes']],
+                         [('responsavel', '52998224725', sincronizacao.GRAVADO)])
+        self.assertEqual(self.client.get(URL, {'since': dados['cursor']}).json()['alteracoes'], [])
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get(URL, {'since': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(URL, {'since': 0, 'modelos': 'nao_existe'}).status_code, 400)
@@ -0,0 +1,95 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.cadastro.models import DemandaInterna, DemandaSaude, Membro, Responsavel
+
+from . import triagem
+from .models import TriagemFamilia
+
+URL = '/api/v1/operacional/triagem/'
+
+
+def nascimento_com(anos):
+    return datetime.date(timezone.localdate().year - anos, 1, 1)
+
+
+class PontuacaoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.responsavel = Responsavel.objects.create(cpf='00000000000', nome='Ana', cep='93000000', numero=1,
+                                                          data_nasc=nascimento_com(85))
+            Membro.objects.create(cpf='00000000191', nome='Filho', cpf_responsavel=self.responsavel)
+
+    def pontuacao(self):
+        return TriagemFamilia.objects.get(cpf='00000000000')
+
+    def test_criterios_da_familia(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            DemandaSaude.objects.create(cpf='00000000191', data_nasc=nascimento_com(4), gest_puer_nutriz='N',
+                                        mob_reduzida='S', cuida_outrem='N', pcd_ou_mental='N')
+            DemandaInterna.objects.create(cpf='00000000191', demanda='Cesta básica', data=timezone.localdate(),
+                                          status='Aberta')
+            DemandaInterna.objects.create(cpf='00000000000', demanda='Colchão', data=timezone.localdate(),
+                                          status='Concluída')
+        linha = self.pontuacao()
+        self.assertEqual(linha.criterios, {
+            'membro': 1, 'idoso_80': 1, 'primeira_infancia': 1, 'mob_reduzida': 1, 'demanda_aberta': 1,
+        })
+        self.assertEqual(linha.pontuacao, 2 + 25 + 20 + 25 + 10)
+
+    def test_alteracoes_recalculam_so_a_familia(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            demanda = DemandaInterna.objects.create(cpf='00000000191', demanda='Cesta', data=timezone.localdate())
+        self.assertEqual(self.pontuacao().criterios['demanda_aberta'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            demanda.status = 'ENCERRADA'
+            demanda.save()
+        self.assertNotIn('demanda_aberta', self.pontuacao().criterios)
+        with self.captureOnCommitCallbacks(execute=True):
+            Membro.objects.get(cpf='00000000191').delete()
+        self.assertEqual(self.pontuacao().criterios['membro'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.responsavel.delete()
+        self.assertFalse(TriagemFamilia.objects.exists())
+
+    def test_status_encerrado_sem_acento_e_maiusculas(self):
+        self.assertFalse(triagem.demanda_aberta(' concluída '))
+        self.assertTrue(triagem.demanda_aberta(None))
+        self.assertTrue(triagem.demanda_aberta('Em andamento'))
+
+    def test_reconstruir_confere_com_o_incremental(self):
+        antes = list(TriagemFamilia.objects.values_list('cpf', 'pontuacao', 'criterios'))
+        TriagemFamilia.objects.all().delete()
+        self.assertEqual(triagem.reconstruir(), 1)
+        self.assertEqual(list(TriagemFamilia.objects.values_list('cpf', 'pontuacao', 'criterios')), antes)
+
+
+class FilaTriagemTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('teste', password='x'))
+        TriagemFamilia.objects.bulk_create([
+            TriagemFamilia(cpf=f'{i:011d}', nome=f'Família {i}', bairro='Centro' if i % 2 else 'Rio Branco',
+                           pontuacao=i % 4, criterios={}, atualizado_em=timezone.now())
+            for i in range(8)
+        ])
+
+    def test_mais_urgentes_primeiro_em_paginas(self):
+        primeira = self.client.get(URL, {'page_size': 3}).json()
+        self.assertEqual([f['cpf'] for f in primeira['results']], ['00000000003', '00000000007', '00000000002'])
+        segunda = self.client.get(primeira['next']).json()
+        self.assertEqual([f['cpf'] for f in segunda['results']], ['00000000006', '00000000001', '00000000005'])
+
+    def test_filtro_por_bairro(self):
+        dados = self.client.get(URL, {'bairro': 'Centro'}).json()
+        self.assertEqual([f['cpf'] for f in dados['results']], ['00000000003', '00000000007', '00000000001',
+                                                                 '00000000005'])
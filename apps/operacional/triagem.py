@@ -0,0 +1,160 @@
+"""
+Fila de triagem: famílias ordenadas por urgência
+
+A pontuação de cada família (responsável + membros) soma:
+    - flags de DemandaSaude de qualquer pessoa da família
+      (gestante/puérpera/nutriz, mobilidade reduzida, PcD/transtorno mental);
+    - crianças e idosos, pela data de nascimento do responsável e das
+      demandas de saúde;
+    - quantidade de membros;
+    - demandas internas ainda abertas.
+
+As pontuações ficam em op_triagem_familia, com índice em
+(pontuacao DESC, cpf), e são recalculadas só para as famílias afetadas
+quando responsável, membro, demanda de saúde ou demanda interna muda. Como
+as idades mudam com o tempo, `reconstruir_indices triagem` deve rodar
+uma vez por dia.
+"""
+import unicodedata
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.cadastro.models import DemandaInterna, DemandaSaude, Membro, Responsavel
+
+from .models import TriagemFamilia
+
+PESOS = {
+    'gest_puer_nutriz': 30,
+    'mob_reduzida': 25,
+    'pcd_ou_mental': 25,
+    'primeira_infancia': 20,  # menos de 6 anos
+    'crianca': 10,            # 6 a 11 anos
+    'idoso': 15,              # 60 a 79 anos
+    'idoso_80': 25,           # 80 anos ou mais
+    'membro': 2,
+    'demanda_aberta': 10,
+}
+MAX_MEMBROS = 10
+MAX_DEMANDAS_ABERTAS = 3
+STATUS_ENCERRADOS = {
+    'C', 'E', 'F', 'CONCLUIDA', 'CONCLUIDO', 'ENCERRADA', 'ENCERRADO',
+    'FINALIZADA', 'FINALIZADO', 'ATENDIDA', 'ATENDIDO', 'CANCELADA', 'CANCELADO',
+}
+TAMANHO_BLOCO = 1000
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto.strip().upper())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def demanda_aberta(status):
+    return not status or _normalizar(status) not in STATUS_ENCERRADOS
+
+
+def _idade(nascimento, hoje):
+    return hoje.year - nascimento.year - ((hoje.month, hoje.day) < (nascimento.month, nascimento.day))
+
+
+def _faixa_etaria(idade):
+    if idade < 6:
+        return 'primeira_infancia'
+    if idade < 12:
+        return 'crianca'
+    if idade >= 80:
+        return 'idoso_80'
+    if idade >= 60:
+        return 'idoso'
+    return None
+
+
+def familias_de(cpfs):
+    """CPFs dos responsáveis das famílias a que os CPFs informados pertencem"""
+    cpfs = [cpf for cpf in set(cpfs) if cpf]
+    if not cpfs:
+        return set()
+    familias = set(Responsavel.objects.filter(cpf__in=cpfs).values_list('cpf', flat=True))
+    familias.update(Membro.objects.filter(cpf__in=cpfs).values_list('cpf_responsavel', flat=True))
+    return familias
+
+
+def pontuar(criterios):
+    return sum(PESOS[nome] * quantidade for nome, quantidade in criterios.items())
+
+
+def _calcular_bloco(familias):
+    hoje = timezone.localdate()
+    responsaveis = {
+        linha['cpf']: linha for linha in
+        Responsavel.objects.filter(cpf__in=familias).values('cpf', 'nome', 'bairro', 'data_nasc')
+    }
+    familia_da_pessoa = {cpf: cpf for cpf in responsaveis}
+    membros = {cpf: 0 for cpf in responsaveis}
+    for cpf, responsavel in Membro.objects.filter(cpf_responsavel__in=responsaveis).values_list('cpf', 'cpf_responsavel'):
+        familia_da_pessoa.setdefault(cpf, responsavel)
+        membros[responsavel] += 1
+
+    nascimentos = {cpf: linha['data_nasc'] for cpf, linha in responsaveis.items() if linha['data_nasc']}
+    criterios = {
+        cpf: {'membro': min(membros[cpf], MAX_MEMBROS)} for cpf in responsaveis
+    }
+
+    saude = DemandaSaude.objects.filter(cpf__in=familia_da_pessoa).values(
+        'cpf', 'data_nasc', 'gest_puer_nutriz', 'mob_reduzida', 'pcd_ou_mental'
+    )
+    for linha in saude:
+        atual = criterios[familia_da_pessoa[linha['cpf']]]
+        for flag in ('gest_puer_nutriz', 'mob_reduzida', 'pcd_ou_mental'):
+            if linha[flag] == 'S':
+                atual[flag] = atual.get(flag, 0) + 1
+        if linha['data_nasc']:
+            nascimentos[linha['cpf']] = linha['data_nasc']
+
+    for cpf, nascimento in nascimentos.items():
+        faixa = _faixa_etaria(_idade(nascimento, hoje))
+        if faixa:
+            atual = criterios[familia_da_pessoa[cpf]]
+            atual[faixa] = atual.get(faixa, 0) + 1
+
+    internas = DemandaInterna.objects.filter(cpf__in=familia_da_pessoa).values_list('cpf', 'status')
+    for cpf, status in internas:
+        if demanda_aberta(status):
+            atual = criterios[familia_da_pessoa[cpf]]
+            atual['demanda_aberta'] = min(atual.get('demanda_aberta', 0) + 1, MAX_DEMANDAS_ABERTAS)
+
+    return [
+        TriagemFamilia(
+            cpf=cpf, nome=linha['nome'], bairro=linha['bairro'],
+            pontuacao=pontuar(criterios[cpf]), criterios=criterios[cpf],
+            atualizado_em=timezone.now(),
+        )
+        for cpf, linha in responsaveis.items()
+    ]
+
+
+def recalcular(familias):
+    """Recalcula a pontuação das famílias; remove as que não existem mais"""
+    familias = iter(set(familias))
+    total = 0
+    while bloco := list(islice(familias, TAMANHO_BLOCO)):
+        linhas = _calcular_bloco(bloco)
+        existentes = {linha.cpf for linha in linhas}
+        with transaction.atomic():
+            TriagemFamilia.objects.filter(cpf__in=set(bloco) - existentes).delete()
+            TriagemFamilia.objects.bulk_create(
+                linhas,
+                update_conflicts=True,
+                unique_fields=['cpf'],
+                update_fields=['nome', 'bairro', 'pontuacao', 'criterios', 'atualizado_em'],
+            )
+        total += len(linhas)
+    return total
+
+
+def reconstruir():
+    """Recalcula todas as famílias e descarta as que saíram do cadastro"""
+    total = recalcular(Responsavel.objects.values_list('cpf', flat=True).iterator(chunk_size=TAMANHO_BLOCO))
+    TriagemFamilia.objects.exclude(cpf__in=Responsavel.objects.values('cpf')).delete()
+    return total
@@ -0,0 +1,18 @@
+"""
+URLs do app operacional
+"""
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from .views import DuplicidadeViewSet, TriagemViewSet, painel
+
+router = DefaultRouter()
+router.register(r'triagem', TriagemViewSet)
+router.register(r'duplicidades', DuplicidadeViewSet)
+
+app_name = 'operacional'
+
+urlpatterns = [
+    path('painel/', painel, name='painel'),
+    path('', include(router.urls)),
+]
@@ -0,0 +1,84 @@
+"""
+Views do app operacional
+"""
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action, api_view
+from rest_framework.response import Response
+
+from apps.cadastro.mixins import ConsultaOtimizadaMixin
+from apps.cadastro.pagination import KeysetPagination
+
+from . import duplicidades
+from . import painel as painel_operacional
+from .models import DuplicidadeResponsavel, TriagemFamilia
+from .serializers import DuplicidadeResponsavelSerializer, TriagemFamiliaSerializer
+
+
+@extend_schema(
+    summary="Painel operacional",
+    description="Totais por bairro, status, alojamento, grupo prioritário e tipo de demanda, "
+                "pré-calculados a cada gravação no cadastro",
+    responses={200: OpenApiTypes.OBJECT}
+)
+@api_view(['GET'])
+def painel(request):
+    """Totais do cadastro para o painel dos coordenadores"""
+    return Response(painel_operacional.obter())
+
+
+class TriagemViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Fila de triagem: famílias da mais para a menos urgente
+
+    Paginada por cursor; `?page_size=50` traz as 50 próximas famílias.
+    """
+    queryset = TriagemFamilia.objects.all()
+    serializer_class = TriagemFamiliaSerializer
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-pontuacao', 'cpf')
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['bairro']
+
+
+class DuplicidadeViewSet(ConsultaOtimizadaMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Pares de responsáveis provavelmente duplicados, para revisão
+
+    Filtre por `?status=pendente` para a fila de revisão.
+    """
+    queryset = DuplicidadeResponsavel.objects.all()
+    serializer_class = DuplicidadeResponsavelSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['status']
+    ordering_fields = ['pontuacao', 'atualizado_em']
+    ordering = ['-pontuacao', 'id']
+
+    @action(detail=True, methods=['post'])
+    def mesclar(self, request, pk=None):
+        """
+        Mescla o par: {"manter": "<cpf>"} indica o responsável que fica
+        """
+        duplicidade = self.get_object()
+        if duplicidade.status == DuplicidadeResponsavel.MESCLADA:
+            return Response({'detail': 'Este par já foi mesclado.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            removido = duplicidades.mesclar(duplicidade, request.data.get('manter'))
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except duplicidades.ConflitoMesclagem as e:
+            return Response({'detail': str(e), 'tabelas': e.tabelas}, status=status.HTTP_409_CONFLICT)
+        return Response({'mantido': request.data.get('manter'), 'removido': removido})
+
+    @action(detail=True, methods=['post'])
+    def descartar(self, request, pk=None):
+        """
+        Marca o par como não duplicado; ele não volta para a fila
+        """
+        try:
+            duplicidade = duplicidades.descartar(self.get_object())
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(duplicidade).data)
@@ -0,0 +1,113 @@
+"""
+Autenticação JWT da API
+
+`JWTAuthentication` resolve o usuário do token sem consultar o banco na
+maioria das requisições: primeiro num cache do processo com validade
+curta (AUTENTICACAO_CACHE_LOCAL_SEGUNDOS), depois no cache compartilhado
+(Redis, AUTENTICACAO_CACHE_SEGUNDOS) e só então em auth_user.
+
+Salvar ou excluir um User (inclusive trocar a senha ou desativar) apaga a
+entrada no Redis e no processo que gravou (ver signals.py). Os outros
+workers podem usar a cópia local por até AUTENTICACAO_CACHE_LOCAL_SEGUNDOS;
+com 0, o cache local fica desligado. Alterações feitas com
+QuerySet.update() não disparam signals e só valem quando a entrada expira.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication as JWTAuthenticationBase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from utils.metricas import fase, registrar_cache
+
+PREFIXO = 'autenticacao:usuario:'
+MAX_LOCAL = 10000
+
+_locais = {}
+_locais_lock = threading.Lock()
+
+
+def _chave(user_id):
+    return f'{PREFIXO}{user_id}'
+
+
+def _validade_local():
+    return getattr(settings, 'AUTENTICACAO_CACHE_LOCAL_SEGUNDOS', 5)
+
+
+def invalidar(user_id):
+    """Remove o usuário do cache compartilhado e do cache deste processo"""
+    with _locais_lock:
+        _locais.pop(str(user_id), None)
+    cache.delete(_chave(user_id))
+
+
+def _obter(user_id):
+    chave_local = str(user_id)
+    agora = time.monotonic()
+    entrada = _locais.get(chave_local)
+    if entrada is not None and entrada[0] > agora:
+        registrar_cache('usuario_local', acertos=1)
+        return entrada[1]
+    with fase('cache'):
+        usuario = cache.get(_chave(user_id))
+    registrar_cache('usuario', acertos=usuario is not None, faltas=usuario is None)
+    if usuario is not None:
+        _guardar_local(chave_local, usuario, agora)
+    return usuario
+
+
+def _guardar(user_id, usuario):
+    cache.set(_chave(user_id), usuario, getattr(settings, 'AUTENTICACAO_CACHE_SEGUNDOS', 300))
+    _guardar_local(str(user_id), usuario, time.monotonic())
+
+
+def _guardar_local(chave_local, usuario, agora):
+    validade = _validade_local()
+    if validade <= 0:
+        return
+    with _locais_lock:
+        if len(_locais) >= MAX_LOCAL:
+            _locais.clear()
+        _locais[chave_local] = (agora + validade, usuario)
+
+
+class JWTAuthentication(JWTAuthenticationBase):
+    """
+    JWTAuthentication do simplejwt com o usuário em cache e o tempo medido
+    na fase auth do Server-Timing
+    """
+
+    def authenticate(self, request):
+        with fase('auth'):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        usuario = _obter(user_id)
+        if usuario is None:
+            try:
+                usuario = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            _guardar(user_id, usuario)
+
+        if not usuario.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(usuario.password)
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        # Cópia: a view pode alterar request.user sem afetar o cache
+        return copy.copy(usuario)
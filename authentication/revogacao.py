@@ -0,0 +1,77 @@
+"""
+Revogação de tokens JWT no cache compartilhado (Redis)
+
+Substitui a blacklist relacional do simplejwt (app token_blacklist, que
+não está instalado e cujas tabelas só crescem). Cada token revogado vira
+uma chave pelo jti com validade igual ao que falta para o token expirar;
+revogar todos os tokens de um usuário grava o segundo da revogação, e
+tokens emitidos antes dele (iat, em segundos inteiros) deixam de valer.
+Os emitidos no mesmo segundo continuam válidos, para que um login feito
+logo depois da revogação não nasça revogado. A checagem é um único
+get_many com as duas chaves.
+
+Na rotação do refresh, `consumir` revoga com cache.add: de duas
+requisições simultâneas com o mesmo refresh, só uma grava a chave e gira
+o token; a outra é recusada.
+"""
+import time
+
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+
+PREFIXO = 'autenticacao:revogado:'
+
+
+def _chave_jti(jti):
+    return f'{PREFIXO}jti:{jti}'
+
+
+def _chave_usuario(user_id):
+    return f'{PREFIXO}usuario:{user_id}'
+
+
+def _restante(token):
+    """Segundos até o token expirar"""
+    exp = token.get('exp')
+    return exp - time.time() if exp else token.lifetime.total_seconds()
+
+
+def revogar(token):
+    """Revoga um token até ele expirar"""
+    jti = token.get(api_settings.JTI_CLAIM)
+    if jti is None:
+        return
+    restante = _restante(token)
+    if restante > 0:
+        cache.set(_chave_jti(jti), 1, timeout=int(restante) + 1)
+
+
+def consumir(token):
+    """
+    Revoga o token só se ele ainda não estava revogado; retorna False se
+    outra requisição o revogou antes
+    """
+    jti = token.get(api_settings.JTI_CLAIM)
+    restante = _restante(token)
+    if jti is None or restante <= 0:
+        return False
+    return cache.add(_chave_jti(jti), 1, timeout=int(restante) + 1)
+
+
+def revogar_todos(user_id):
+    """Revoga todos os tokens já emitidos para o usuário"""
+    # Nenhum token dura mais que o refresh; depois disso a marca é inútil
+    validade = int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()) + 1
+    cache.set(_chave_usuario(user_id), int(time.time()), timeout=validade)
+
+
+def revogado(token):
+    chave_jti = _chave_jti(token.get(api_settings.JTI_CLAIM))
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    chaves = [chave_jti] if user_id is None else [chave_jti, _chave_usuario(user_id)]
+    valores = cache.get_many(chaves)
+    if chave_jti in valores:
+        return True
+    revogado_em = valores.get(_chave_usuario(user_id)) if user_id is not None else None
+    iat = token.get('iat')
+    return revogado_em is not None and iat is not None and iat < revogado_em
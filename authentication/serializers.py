@@ -1,6 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+
+from .revogacao import revogado
+from .tokens import RefreshToken
 
 
 class LoginSerializer(serializers.Serializer):
@@ -77,6 +83,10 @@ class LogoutSerializer(serializers.Serializer):
         required=False,
         help_text="Token de refresh para invalidar (opcional)"
     )
+    todos = serializers.BooleanField(
+        required=False,
+        help_text="Revoga todos os tokens do usuário, em todos os dispositivos (opcional)"
+    )
 
 
 class LogoutResponseSerializer(serializers.Serializer):
@@ -124,3 +134,36 @@ class ErrorResponseSerializer(serializers.Serializer):
                 'message': 'Credenciais inválidas'
             }
         }
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    """Login JWT padrão emitindo tokens revogáveis"""
+    token_class = RefreshToken
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """Refresh que recusa tokens revogados e revoga o anterior na rotação"""
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                # Dois refresh simultâneos passam pelo verify(); só o que consumir gira o token
+                refresh.consumir()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class TokenVerifySerializer(jwt_serializers.TokenVerifySerializer):
+    """Verificação que também consulta a revogação no Redis"""
+
+    def validate(self, attrs):
+        if revogado(UntypedToken(attrs['token'])):
+            raise serializers.ValidationError('Token revogado')
+        return {}
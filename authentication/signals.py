@@ -0,0 +1,20 @@
+"""
+Invalidação do cache de usuários da autenticação JWT
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework_simplejwt.settings import api_settings
+
+from .backends import invalidar
+
+
+def invalidar_usuario(sender, instance, **kwargs):
+    user_id = getattr(instance, api_settings.USER_ID_FIELD)
+    invalidar(user_id)
+    # De novo após o commit: uma requisição concorrente pode ter guardado a versão antiga
+    transaction.on_commit(lambda: invalidar(user_id))
+
+
+post_save.connect(invalidar_usuario, sender=get_user_model(), dispatch_uid='autenticacao_usuario_gravado')
+post_delete.connect(invalidar_usuario, sender=get_user_model(), dispatch_uid='autenticacao_usuario_excluido')
@@ -0,0 +1,61 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import backends
+
+URL = '/api/v1/auth/user/'
+
+
+class CacheUsuarioTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        backends._locais.clear()
+        self.usuario = User.objects.create_user('teste', password='x')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.usuario)}')
+
+    def _consultas_auth_user(self):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(URL)
+        self.assertEqual(resposta.status_code, 200)
+        return len([c for c in consultas if '"auth_user"' in c['sql']])
+
+    def test_cache_quente_nao_consulta_auth_user(self):
+        self.assertEqual(self._consultas_auth_user(), 1)
+        self.assertEqual(self._consultas_auth_user(), 0)
+
+    @override_settings(AUTENTICACAO_CACHE_LOCAL_SEGUNDOS=0)
+    def test_cache_compartilhado_sem_o_local(self):
+        self.assertEqual(self._consultas_auth_user(), 1)
+        self.assertEqual(backends._locais, {})
+        self.assertEqual(self._consultas_auth_user(), 0)
+
+    def test_gravar_usuario_invalida(self):
+        self._consultas_auth_user()
+        self.usuario.first_name = 'Ana'
+        self.usuario.save()
+        self.assertEqual(self._consultas_auth_user(), 1)
+        self.assertEqual(self.client.get(URL).json()['first_name'], 'Ana')
+
+    def test_usuario_desativado(self):
+        self._consultas_auth_user()
+        self.usuario.is_active = False
+        self.usuario.save()
+        self.assertEqual(self.client.get(URL).status_code, 401)
+
+    def test_usuario_excluido(self):
+        self._consultas_auth_user()
+        self.usuario.delete()
+        self.assertEqual(self.client.get(URL).status_code, 401)
+
+    def test_view_recebe_copia(self):
+        token = AccessToken.for_user(self.usuario)
+        primeiro = backends.JWTAuthentication().get_user(token)
+        primeiro.first_name = 'Alterado'
+        self.assertEqual(backends.JWTAuthentication().get_user(token).first_name, '')
@@ -0,0 +1,146 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .revogacao import consumir, revogado, revogar, revogar_todos
+from .tokens import RefreshToken
+
+
+class RevogacaoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('teste', password='x')
+
+    def test_revogar_token(self):
+        token, outro = RefreshToken.for_user(self.usuario), RefreshToken.for_user(self.usuario)
+        revogar(token)
+        self.assertTrue(revogado(token))
+        self.assertFalse(revogado(outro))
+
+    def test_revogar_todos(self):
+        anterior = RefreshToken.for_user(self.usuario)
+        acesso_anterior = anterior.access_token
+        for token in (anterior, acesso_anterior):
+            token.set_iat(at_time=timezone.now() - datetime.timedelta(seconds=5))
+        revogar_todos(self.usuario.pk)
+        # Emitido no mesmo segundo da revogação (ou depois): continua valendo
+        seguinte = RefreshToken.for_user(self.usuario)
+        de_outro_usuario = RefreshToken.for_user(User.objects.create_user('outro', password='x'))
+        de_outro_usuario.set_iat(at_time=timezone.now() - datetime.timedelta(seconds=5))
+
+        self.assertTrue(revogado(anterior))
+        self.assertTrue(revogado(acesso_anterior))
+        self.assertFalse(revogado(seguinte))
+        self.assertFalse(revogado(de_outro_usuario))
+
+    def test_consumir_so_uma_vez(self):
+        token = RefreshToken.for_user(self.usuario)
+        self.assertTrue(consumir(token))
+        self.assertTrue(revogado(token))
+        self.assertFalse(consumir(token))
+        expirado = RefreshToken.for_user(self.usuario)
+        expirado.set_exp(from_time=timezone.now() - datetime.timedelta(days=8))
+        self.assertFalse(consumir(expirado))
+
+
+class RotacaoApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('teste', password='x')
+        self.client = APIClient()
+
+    def _login(self):
+        resposta = self.client.post('/api/v1/auth/login/', {'username': 'teste', 'password': 'x'}, format='json')
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()
+
+    def _perfil(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        try:
+            return self.client.get('/api/v1/auth/profile/').status_code
+        finally:
+            self.client.credentials()
+
+    def test_rotacao_revoga_refresh_anterior(self):
+        tokens = self._login()
+        resposta = self.client.post('/api/v1/auth/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(resposta.status_code, 200)
+        novos = resposta.json()
+        self.assertNotEqual(novos['refresh'], tokens['refresh'])
+
+        reuso = self.client.post('/api/v1/auth/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(reuso.status_code, 401)
+        self.assertEqual(
+            self.client.post('/api/v1/auth/refresh/', {'refresh': novos['refresh']}, format='json').status_code, 200
+        )
+
+    def test_logout_revoga_access_e_refresh(self):
+        tokens = self._login()
+        self.assertEqual(self._perfil(tokens['access']), 200)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        resposta = self.client.post('/api/v1/auth/logout/', {'refresh': tokens['refresh']}, format='json')
+        self.client.credentials()
+        self.assertEqual(resposta.status_code, 200)
+
+        self.assertEqual(self._perfil(tokens['access']), 401)
+        self.assertEqual(
+            self.client.post('/api/v1/auth/refresh/', {'refresh': tokens['refresh']}, format='json').status_code, 401
+        )
+        verificacao = self.client.post('/api/v1/auth/verify/', {'token': tokens['refresh']}, format='json')
+        self.assertEqual(verificacao.status_code, 400)
+
+    def test_logout_de_todos_os_dispositivos(self):
+        usuario = User.objects.get(username='teste')
+        antigo = RefreshToken.for_user(usuario)
+        acesso_antigo = antigo.access_token
+        for token in (antigo, acesso_antigo):
+            token.set_iat(at_time=timezone.now() - datetime.timedelta(seconds=5))
+        tokens = self._login()
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        self.assertEqual(self.client.post('/api/v1/auth/logout/', {'todos': True}, format='json').status_code, 200)
+        self.client.credentials()
+
+        self.assertEqual(self._perfil(str(acesso_antigo)), 401)
+        self.assertEqual(
+            self.client.post('/api/v1/auth/refresh/', {'refresh': str(antigo)}, format='json').status_code, 401
+        )
+        # Login logo depois da revogação não nasce revogado
+        self.assertEqual(self._perfil(self._login()['access']), 200)
+
+    def test_refresh_simultaneos_giram_uma_vez(self):
+        refresh = self._login()['refresh']
+        # Os dois passaram pelo verify() antes de qualquer um revogar o token
+        with mock.patch.object(RefreshToken, 'verificar_revogacao'):
+            primeira = self.client.post('/api/v1/auth/refresh/', {'refresh': refresh}, format='json')
+            segunda = self.client.post('/api/v1/auth/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(primeira.status_code, 200)
+        self.assertEqual(segunda.status_code, 401)
+
+    def test_trocar_senha_revoga_tokens_emitidos(self):
+        refresh = RefreshToken.for_user(User.objects.get(username='teste'))
+        access = refresh.access_token
+        for token in (refresh, access):
+            token.set_iat(at_time=timezone.now() - datetime.timedelta(seconds=5))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        resposta = self.client.post('/api/v1/auth/change-password/',
+                                    {'current_password': 'x', 'new_password': 'nova-senha-1'}, format='json')
+        self.client.credentials()
+        self.assertEqual(resposta.status_code, 200)
+
+        self.assertEqual(self._perfil(str(access)), 401)
+        self.assertEqual(
+            self.client.post('/api/v1/auth/refresh/', {'refresh': str(refresh)}, format='json').status_code, 401
+        )
+        novo = self.client.post('/api/v1/auth/login/', {'username': 'teste', 'password': 'nova-senha-1'},
+                                format='json')
+        self.assertEqual(self._perfil(novo.json()['access']), 200)
@@ -0,0 +1,43 @@
+"""
+Tokens JWT com revogação no Redis (ver revogacao.py)
+"""
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+
+from .revogacao import consumir, revogado, revogar
+
+
+class RevogavelMixin:
+    """
+    `blacklist()` revoga o token e `verify()` recusa os revogados;
+    `consumir()` revoga de forma atômica, para usar o token uma vez só
+    """
+
+    def verificar_revogacao(self):
+        if revogado(self):
+            raise TokenError(_('Token is blacklisted'))
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        self.verificar_revogacao()
+
+    def blacklist(self):
+        revogar(self)
+
+    def consumir(self):
+        if not consumir(self):
+            raise TokenError(_('Token is blacklisted'))
+
+
+class AccessToken(RevogavelMixin, tokens.AccessToken):
+    def verificar_revogacao(self):
+        # Uma leitura de cache a mais por requisição; AUTENTICACAO_REVOGAR_ACESSO=False
+        # deixa o access token valer até expirar (ACCESS_TOKEN_LIFETIME)
+        if getattr(settings, 'AUTENTICACAO_REVOGAR_ACESSO', True):
+            super().verificar_revogacao()
+
+
+class RefreshToken(RevogavelMixin, tokens.RefreshToken):
+    access_token_class = AccessToken
@@ -2,7 +2,7 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 
@@ -16,6 +16,8 @@ from .serializers import (
     LogoutSerializer, LogoutResponseSerializer, ChangePasswordSerializer,
     ChangePasswordResponseSerializer, ErrorResponseSerializer
 )
+from .revogacao import revogar, revogar_todos
+from .tokens import RefreshToken
 
 
 @extend_schema(
@@ -133,16 +135,20 @@ def logout_view(request):
     """
     Endpoint de logout que invalida o token de refresh
     
-    Opcionalmente recebe o refresh token para invalidar.
-    Se não fornecido, apenas confirma o logout.
+    Revoga o token de acesso usado na requisição e, se enviado, o refresh
+    token. Com "todos": true, revoga todos os tokens do usuário.
     """
     try:
+        if request.data.get('todos') in (True, 'true', '1'):
+            revogar_todos(request.user.pk)
+        if request.auth is not None:
+            revogar(request.auth)
         refresh_token = request.data.get('refresh')
         if refresh_token:
             try:
                 token = RefreshToken(refresh_token)
                 token.blacklist()
-            except Exception:
+            except TokenError:
                 pass  # Token já pode estar inválido
         
         return Response({
@@ -182,7 +188,8 @@ def change_password_view(request):
     """
     Permite alterar a senha do usuário autenticado
     
-    Requer a senha atual para confirmação e uma nova senha válida.
+    Requer a senha atual para confirmação e uma nova senha válida. Os
+    tokens já emitidos para o usuário são revogados; é preciso novo login.
     """
     serializer = ChangePasswordSerializer(data=request.data)
     
@@ -205,6 +212,7 @@ def change_password_view(request):
     
     user.set_password(new_password)
     user.save()
+    revogar_todos(user.pk)
     
     return Response({
         'success': True,
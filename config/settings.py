@@ -35,11 +35,13 @@ INSTALLED_APPS = [
     
     # Local apps
     'apps.cadastro',
+    'apps.operacional',
     'apps.api',
     'authentication',
 ]
 
 MIDDLEWARE = [
+    'utils.middleware.RequestLoggingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -87,6 +89,9 @@ class DatabaseRouter:
 
 DATABASE_ROUTERS = ['config.settings.DatabaseRouter']
 
+# Testes criam as tabelas do cadastro no banco de testes e usam cache local
+TEST_RUNNER = 'config.test_runner.CadastroTestRunner'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -123,13 +128,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # ✅ REST Framework - CONFIGURAÇÃO CORRIGIDA
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.backends.JWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # ORJSONRenderer (encoder nativo) ou rest_framework.renderers.JSONRenderer;
+    # `manage.py comparar_renderizadores` compara os dois
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        config('CADASTRO_RENDERIZADOR_JSON', default='apps.cadastro.renderers.ORJSONRenderer'),
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -249,6 +256,9 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Lidos pelo app quando roda no navegador (Flutter web)
+CORS_EXPOSE_HEADERS = ['server-timing', 'x-db-queries']
+
 CORS_ALLOW_METHODS = [
     'DELETE',
     'GET',
@@ -258,6 +268,11 @@ CORS_ALLOW_METHODS = [
     'PUT',
 ]
 
+# Cache do usuário do token em authentication.backends.JWTAuthentication:
+# validade no Redis e na cópia local de cada processo (0 desliga a local)
+AUTENTICACAO_CACHE_SEGUNDOS = config('AUTENTICACAO_CACHE_SEGUNDOS', default=300, cast=int)
+AUTENTICACAO_CACHE_LOCAL_SEGUNDOS = config('AUTENTICACAO_CACHE_LOCAL_SEGUNDOS', default=5, cast=int)
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
@@ -277,7 +292,7 @@ SIMPLE_JWT = {
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
     
-    'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    'AUTH_TOKEN_CLASSES': ('authentication.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
     
@@ -286,8 +301,16 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
+
+    # Revogação por jti no Redis (authentication/revogacao.py), sem o app token_blacklist
+    'TOKEN_OBTAIN_SERIALIZER': 'authentication.serializers.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.serializers.TokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'authentication.serializers.TokenVerifySerializer',
 }
 
+# Checa a revogação também nos access tokens (uma leitura de cache por requisição)
+AUTENTICACAO_REVOGAR_ACESSO = config('AUTENTICACAO_REVOGAR_ACESSO', default=True, cast=bool)
+
 # Cache
 CACHES = {
     'default': {
@@ -299,6 +322,42 @@ CACHES = {
     }
 }
 
+# Busca por nome sem acento/trigramas (requer `manage.py criar_indices` no PostgreSQL)
+CADASTRO_BUSCA_TRIGRAMA = config('CADASTRO_BUSCA_TRIGRAMA', default=True, cast=bool)
+
+# Limite de famílias por requisição em /cadastro/responsaveis/familias-lote/
+CADASTRO_LOTE_MAX_FAMILIAS = config('CADASTRO_LOTE_MAX_FAMILIAS', default=10000, cast=int)
+
+# Limite de CPFs por requisição em .../buscar-lote/ (responsáveis e membros)
+CADASTRO_BUSCA_LOTE_MAX_CPFS = config('CADASTRO_BUSCA_LOTE_MAX_CPFS', default=5000, cast=int)
+
+# Idade mínima (segundos) das alterações entregues pelo /cadastro/sync/; deve cobrir
+# a transação de gravação mais longa (ver apps/operacional/sincronizacao.py)
+SINCRONIZACAO_MARGEM_SEGUNDOS = config('SINCRONIZACAO_MARGEM_SEGUNDOS', default=30, cast=int)
+
+# Métricas em /api/v1/metrics/ (ver utils/metricas.py). Sem METRICAS_ARMAZENAMENTO,
+# usa o Redis quando ele é o cache; METRICAS_TOKEN exige "Authorization: Bearer <token>"
+# (sem ele, o endpoint só responde a usuários staff)
+METRICAS_ATIVAS = config('METRICAS_ATIVAS', default=True, cast=bool)
+METRICAS_ARMAZENAMENTO = config('METRICAS_ARMAZENAMENTO', default='')
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+
+# Fração das requisições (0 a 1) que respondem Server-Timing com as fases
+# (auth, db, cache, app, render); X-DB-Queries vai junto se SERVER_TIMING_CONSULTAS.
+# Em produção, 1%; com DEBUG, todas (SERVER_TIMING_AMOSTRAGEM=1 no .env faz o mesmo)
+SERVER_TIMING_AMOSTRAGEM = config('SERVER_TIMING_AMOSTRAGEM', default=1.0 if DEBUG else 0.01, cast=float)
+SERVER_TIMING_CONSULTAS = config('SERVER_TIMING_CONSULTAS', default=True, cast=bool)
+
+# Sondagem de saúde por worker (ver apps/api/sondagem.py): /api/v1/health/detalhado/
+# e /api/v1/ready/ (503 quando o p95 passa do orçamento ou a replicação atrasa).
+# SAUDE_CAPACIDADE_WORKER é o número de requisições simultâneas do worker (1 no sync)
+SAUDE_INTERVALO_SEGUNDOS = config('SAUDE_INTERVALO_SEGUNDOS', default=5, cast=float)
+SAUDE_JANELA = config('SAUDE_JANELA', default=120, cast=int)
+SAUDE_ORCAMENTO_BANCO_MS = config('SAUDE_ORCAMENTO_BANCO_MS', default=250, cast=float)
+SAUDE_ORCAMENTO_REDIS_MS = config('SAUDE_ORCAMENTO_REDIS_MS', default=50, cast=float)
+SAUDE_ORCAMENTO_REPLICACAO_SEGUNDOS = config('SAUDE_ORCAMENTO_REPLICACAO_SEGUNDOS', default=30, cast=float)
+SAUDE_CAPACIDADE_WORKER = config('SAUDE_CAPACIDADE_WORKER', default=1, cast=int)
+
 # Email Configuration (opcional)
 if config('EMAIL_HOST', default=''):
     EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
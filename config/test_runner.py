@@ -0,0 +1,56 @@
+"""
+Runner dos testes automatizados (manage.py test)
+
+As tabelas do cadastro vêm do banco existente: os models não são
+gerenciados e o DatabaseRouter bloqueia as migrations do app. No banco de
+testes elas precisam existir, então o runner cria essas tabelas junto com
+as demais (as de auth_/django_ já vêm dos apps do Django). O cache passa a
+ser local em memória, para que os testes não escrevam no Redis.
+
+Só entram os módulos test_*.py: apps/cadastro/tests.py é um script manual
+contra um servidor em execução.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+CACHE_TESTES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'testes',
+    }
+}
+
+
+class CadastroTestRunner(DiscoverRunner):
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        # A raiz do projeto tem __init__.py; sem top_level os testes seriam
+        # importados com o nome do diretório como pacote
+        parser.set_defaults(pattern='test_*.py', top_level=str(settings.BASE_DIR))
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_local = override_settings(CACHES=CACHE_TESTES)
+        self._cache_local.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_local.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def setup_databases(self, **kwargs):
+        modelos = [
+            model for model in apps.get_app_config('cadastro').get_models()
+            if not model._meta.managed and not model._meta.db_table.startswith(('auth_', 'django_'))
+        ]
+        for model in modelos:
+            model._meta.managed = True
+        try:
+            with override_settings(DATABASE_ROUTERS=[]):
+                return super().setup_databases(**kwargs)
+        finally:
+            for model in modelos:
+                model._meta.managed = False
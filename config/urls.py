@@ -25,6 +25,7 @@ api_v1_patterns = [
     # Apps
     path('', include('apps.api.urls')),
     path('cadastro/', include('apps.cadastro.urls')),
+    path('operacional/', include('apps.operacional.urls')),
     
     # Custom Authentication
     path('auth/', include('authentication.urls')),
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Teste de carga da API do cadastro
+
+Dispara uma mistura de operações (listagem, busca por nome, busca por
+CPF, responsável com demandas e gravações) com N conexões concorrentes
+durante um tempo fixo e grava, por operação, latências p50/p95/p99 e
+vazão num JSON comparável entre commits.
+
+Use contra um servidor local com dados sintéticos
+(`manage.py gerar_sinteticos`): as gravações alteram o telefone de
+responsáveis da amostra.
+
+Exemplos:
+    python scripts/benchmark_api.py --usuario admin --senha admin123 --duracao 60 --concorrencia 16
+    python scripts/benchmark_api.py --token $TOKEN --saida depois.json --comparar antes.json
+    python scripts/benchmark_api.py --cpfs dados_sinteticos/responsavel.csv --mistura busca_cpf=1
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import quote, urlsplit
+
+NOMES_BUSCA = ('Silva', 'Santos', 'Oliveira', 'Ana', 'João', 'Maria Souza', 'Schmidt', 'Costa', 'Lima')
+
+MISTURA_PADRAO = {
+    'lista': 25,
+    'lista_filtrada': 10,
+    'busca_nome': 15,
+    'busca_cpf': 20,
+    'com_demandas': 15,
+    'gravacao': 15,
+}
+
+
+def operacao(nome, cpfs, aleatorio):
+    """(método, caminho relativo à API, corpo) de uma operação sorteada"""
+    cpf = aleatorio.choice(cpfs)
+    if nome == 'lista':
+        return 'GET', '/cadastro/responsaveis/', None
+    if nome == 'lista_filtrada':
+        return 'GET', f'/cadastro/demandas-internas/?status={aleatorio.choice("ACE")}', None
+    if nome == 'busca_nome':
+        return 'GET', f'/cadastro/responsaveis/?search={quote(aleatorio.choice(NOMES_BUSCA))}', None
+    if nome == 'busca_cpf':
+        return 'GET', f'/cadastro/responsaveis/buscar_por_cpf/?cpf={cpf}', None
+    if nome == 'com_demandas':
+        return 'GET', f'/cadastro/responsaveis/{cpf}/com_demandas/', None
+    if nome == 'gravacao':
+        return 'PATCH', f'/cadastro/responsaveis/{cpf}/', {'telefone': int(f'519{aleatorio.randrange(10 ** 8):08d}')}
+    raise ValueError(f'Operação desconhecida: {nome}')
+
+
+class Cliente:
+    """Conexão HTTP persistente (keep-alive) de um worker"""
+
+    def __init__(self, url, token=None, tempo_limite=30):
+        partes = urlsplit(url)
+        self._classe = http.client.HTTPSConnection if partes.scheme == 'https' else http.client.HTTPConnection
+        self._servidor = partes.netloc
+        self._prefixo = partes.path.rstrip('/')
+        self._tempo_limite = tempo_limite
+        self._conexao = None
+        self.cabecalhos = {'Accept': 'application/json'}
+        if token:
+            self.cabecalhos['Authorization'] = f'Bearer {token}'
+
+    def requisitar(self, metodo, caminho, corpo=None):
+        """(status, bytes da resposta); reabre a conexão se o servidor fechou"""
+        cabecalhos = dict(self.cabecalhos)
+        dados = None
+        if corpo is not None:
+            dados = json.dumps(corpo).encode()
+            cabecalhos['Content-Type'] = 'application/json'
+        for tentativa in (1, 2):
+            if self._conexao is None:
+                self._conexao = self._classe(self._servidor, timeout=self._tempo_limite)
+            try:
+                self._conexao.request(metodo, self._prefixo + caminho, body=dados, headers=cabecalhos)
+                resposta = self._conexao.getresponse()
+                return resposta.status, resposta.read()
+            except (http.client.HTTPException, ConnectionError):
+                self._conexao.close()
+                self._conexao = None
+                if tentativa == 2:
+                    raise
+
+    def json(self, metodo, caminho, corpo=None):
+        status, conteudo = self.requisitar(metodo, caminho, corpo)
+        if status >= 400:
+            raise RuntimeError(f'{metodo} {caminho}: HTTP {status} {conteudo[:200]!r}')
+        return json.loads(conteudo)
+
+
+def obter_token(url, usuario, senha):
+    return Cliente(url).json('POST', '/auth/login/', {'username': usuario, 'password': senha})['access']
+
+
+def ler_cpfs(caminho, limite):
+    """CPFs da primeira coluna de um arquivo (aceita o responsavel.csv do gerador)"""
+    cpfs = []
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            valor = linha.split(',', 1)[0].strip()
+            if valor.isdigit():
+                cpfs.append(valor)
+                if len(cpfs) >= limite:
+                    break
+    return cpfs
+
+
+def coletar_cpfs(cliente, limite):
+    """Amostra de CPFs de responsáveis percorrendo a listagem da API"""
+    cpfs = []
+    pagina = cliente.json('GET', '/cadastro/responsaveis/?fields=cpf')
+    while True:
+        cpfs.extend(item['cpf'] for item in pagina.get('results', []))
+        proxima = pagina.get('next')
+        if len(cpfs) >= limite or not proxima:
+            return cpfs[:limite]
+        partes = urlsplit(proxima)
+        caminho = partes.path[len(cliente._prefixo):] + (f'?{partes.query}' if partes.query else '')
+        pagina = cliente.json('GET', caminho)
+
+
+def percentil(ordenados, fracao):
+    """Percentil pelo método do posto mais próximo"""
+    if not ordenados:
+        return None
+    posicao = max(0, min(len(ordenados) - 1, int(round(fracao * len(ordenados) + 0.5)) - 1))
+    return ordenados[posicao]
+
+
+class Resultados:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = {}
+        self.status = {}
+        self.erros = Counter()
+
+    def registrar(self, nome, segundos, status):
+        with self._lock:
+            self.latencias.setdefault(nome, []).append(segundos * 1000)
+            self.status.setdefault(nome, Counter())[status] += 1
+            if status >= 400:
+                self.erros[nome] += 1
+
+    def registrar_falha(self, nome):
+        with self._lock:
+            self.erros[nome] += 1
+            self.status.setdefault(nome, Counter())['falha'] += 1
+
+    def resumo(self, segundos):
+        def medir(latencias, erros, status):
+            ordenadas = sorted(latencias)
+            return {
+                'requisicoes': len(ordenadas),
+                'erros': erros,
+                'por_segundo': round(len(ordenadas) / segundos, 2),
+                'p50_ms': _arredondar(percentil(ordenadas, 0.50)),
+                'p95_ms': _arredondar(percentil(ordenadas, 0.95)),
+                'p99_ms': _arredondar(percentil(ordenadas, 0.99)),
+                'max_ms': _arredondar(ordenadas[-1] if ordenadas else None),
+                'status': {str(codigo): total for codigo, total in sorted(status.items(), key=str)},
+            }
+
+        operacoes = {
+            nome: medir(self.latencias.get(nome, []), self.erros[nome], self.status.get(nome, {}))
+            for nome in sorted(set(self.latencias) | set(self.erros))
+        }
+        todas = [latencia for latencias in self.latencias.values() for latencia in latencias]
+        status_total = sum((Counter(status) for status in self.status.values()), Counter())
+        return operacoes, medir(todas, sum(self.erros.values()), status_total)
+
+
+def _arredondar(valor):
+    return None if valor is None else round(valor, 2)
+
+
+def _worker(args, token, cpfs, pesos, inicio_medicao, fim, resultados, semente):
+    cliente = Cliente(args.url, token, args.tempo_limite)
+    aleatorio = random.Random(semente)
+    nomes, valores = zip(*pesos.items())
+    while time.monotonic() < fim:
+        nome = aleatorio.choices(nomes, weights=valores)[0]
+        metodo, caminho, corpo = operacao(nome, cpfs, aleatorio)
+        inicio = time.monotonic()
+        try:
+            status, _ = cliente.requisitar(metodo, caminho, corpo)
+        except (OSError, http.client.HTTPException):
+            if inicio >= inicio_medicao:
+                resultados.registrar_falha(nome)
+            continue
+        if inicio >= inicio_medicao:
+            resultados.registrar(nome, time.monotonic() - inicio, status)
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _mistura(texto):
+    pesos = {}
+    for parte in filter(None, texto.split(',')):
+        nome, _, peso = parte.partition('=')
+        if nome not in MISTURA_PADRAO:
+            raise argparse.ArgumentTypeError(f'Operação desconhecida: {nome}. Opções: {", ".join(MISTURA_PADRAO)}')
+        pesos[nome] = float(peso or 1)
+    if not pesos or not any(pesos.values()):
+        raise argparse.ArgumentTypeError('Informe ao menos uma operação com peso positivo')
+    return pesos
+
+
+def imprimir(relatorio, anterior=None):
+    linhas = list(relatorio['operacoes'].items()) + [('TOTAL', relatorio['total'])]
+    print(f'{"operação":<16}{"req":>8}{"req/s":>9}{"p50":>9}{"p95":>9}{"p99":>9}{"erros":>7}')
+    for nome, medida in linhas:
+        print(
+            f'{nome:<16}{medida["requisicoes"]:>8}{medida["por_segundo"]:>9.1f}'
+            f'{_ms(medida["p50_ms"])}{_ms(medida["p95_ms"])}{_ms(medida["p99_ms"])}{medida["erros"]:>7}'
+        )
+    if not anterior:
+        return
+    print(f'\nComparado com {anterior.get("commit") or "o anterior"} (p95 e req/s):')
+    for nome, medida in linhas:
+        antes = anterior['total'] if nome == 'TOTAL' else anterior['operacoes'].get(nome)
+        if not antes or not antes.get('p95_ms') or not medida.get('p95_ms') or not antes.get('por_segundo'):
+            continue
+        print(
+            f'{nome:<16} p95 {antes["p95_ms"]:.1f} -> {medida["p95_ms"]:.1f} ms '
+            f'({(medida["p95_ms"] / antes["p95_ms"] - 1) * 100:+.0f}%), '
+            f'req/s {antes["por_segundo"]:.1f} -> {medida["por_segundo"]:.1f} '
+            f'({(medida["por_segundo"] / antes["por_segundo"] - 1) * 100:+.0f}%)'
+        )
+
+
+def _ms(valor):
+    return f'{"-":>9}' if valor is None else f'{valor:>9.1f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga da API do cadastro')
+    parser.add_argument('--url', default='http://127.0.0.1:8000/api/v1', help='URL base da API')
+    parser.add_argument('--usuario', help='Usuário para obter o token JWT')
+    parser.add_argument('--senha', help='Senha do usuário')
+    parser.add_argument('--token', help='Token JWT de acesso (em vez de usuário e senha)')
+    parser.add_argument('--duracao', type=float, default=60, help='Segundos de medição (padrão: 60)')
+    parser.add_argument('--aquecimento', type=float, default=5, help='Segundos iniciais descartados (padrão: 5)')
+    parser.add_argument('--concorrencia', type=int, default=8, help='Conexões simultâneas (padrão: 8)')
+    parser.add_argument('--mistura', type=_mistura, default=MISTURA_PADRAO,
+                        help='Pesos das operações, ex.: lista=25,busca_cpf=20,gravacao=0')
+    parser.add_argument('--cpfs', help='Arquivo com CPFs na primeira coluna (padrão: coleta pela API)')
+    parser.add_argument('--amostra', type=int, default=2000, help='Tamanho da amostra de CPFs (padrão: 2000)')
+    parser.add_argument('--semente', type=int, default=42, help='Semente do sorteio das operações (padrão: 42)')
+    parser.add_argument('--tempo-limite', type=float, default=30, help='Timeout por requisição em segundos')
+    parser.add_argument('--saida', default='benchmark.json', help='Arquivo JSON do resultado (padrão: benchmark.json)')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior para comparar')
+    args = parser.parse_args()
+
+    token = args.token or (obter_token(args.url, args.usuario, args.senha) if args.usuario else None)
+    if args.cpfs:
+        cpfs = ler_cpfs(args.cpfs, args.amostra)
+    else:
+        cpfs = coletar_cpfs(Cliente(args.url, token, args.tempo_limite), args.amostra)
+    if not cpfs:
+        sys.exit('Nenhum CPF de responsável para a amostra; carregue dados com manage.py gerar_sinteticos')
+
+    resultados = Resultados()
+    inicio_medicao = time.monotonic() + args.aquecimento
+    fim = inicio_medicao + args.duracao
+    print(f'{args.concorrencia} conexões, {args.aquecimento:.0f}s de aquecimento + {args.duracao:.0f}s, '
+          f'{len(cpfs)} CPFs na amostra')
+    workers = [
+        threading.Thread(
+            target=_worker,
+            args=(args, token, cpfs, args.mistura, inicio_medicao, fim, resultados, args.semente + indice),
+            daemon=True,
+        )
+        for indice in range(args.concorrencia)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    operacoes, total = resultados.resumo(args.duracao)
+    relatorio = {
+        'versao': 1,
+        'commit': _commit(),
+        'executado_em': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'parametros': {
+            'url': args.url, 'duracao': args.duracao, 'aquecimento': args.aquecimento,
+            'concorrencia': args.concorrencia, 'mistura': args.mistura, 'amostra_cpfs': len(cpfs),
+            'semente': args.semente,
+        },
+        'operacoes': operacoes,
+        'total': total,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            anterior = json.load(arquivo)
+    imprimir(relatorio, anterior)
+    print(f'\nResultado gravado em {args.saida}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""
+Métricas da API no formato texto do Prometheus
+
+O RequestLoggingMiddleware mede cada requisição (duração, tamanho da
+resposta, consultas SQL e tempo no banco) e acumula os valores num
+coletor da própria requisição; no fim, tudo vai para o armazenamento
+numa única ida: um hash no Redis, somado por todos os workers do
+gunicorn, ou um dicionário do processo quando o cache não é o Redis
+(desenvolvimento). Leituras de cache entram pelo mesmo coletor com
+`registrar_cache`.
+
+As rotas são identificadas pelo nome resolvido da URL (ex.:
+cadastro:responsavel-list), não pelo caminho, para que CPFs e ids não
+virem séries novas; requisições que não resolvem entram como
+"nao_resolvida".
+
+As requisições em andamento não são um gauge atualizado na entrada (seria
+uma ida a mais ao Redis por requisição): http_ocupado_segundos_total soma a
+duração de cada uma no envio final, e rate() dele é o número médio de
+requisições em andamento (lei de Little), somando todos os workers. O valor
+instantâneo de cada worker aparece em /api/v1/health/detalhado/.
+
+`exportar` monta o texto servido em /api/v1/metrics/.
+
+Nas requisições sorteadas para o Server-Timing (SERVER_TIMING_AMOSTRAGEM),
+o coletor também soma o tempo das fases marcadas com `fase` (autenticação,
+leituras de cache) e quanto delas foi gasto no banco.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHAVE_REDIS = 'metricas:valores'
+
+LIMITES = {
+    'http_duracao_segundos': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    'http_resposta_bytes': (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+}
+
+# nome -> (tipo, descrição), na ordem de exportação
+FAMILIAS = {
+    'http_requisicoes_total': ('counter', 'Requisições atendidas por rota, método e status'),
+    'http_duracao_segundos': ('histogram', 'Duração das requisições por rota e método'),
+    'http_resposta_bytes': ('histogram', 'Tamanho das respostas sem streaming por rota'),
+    'http_ocupado_segundos_total': (
+        'counter', 'Soma das durações das requisições; a taxa é a média de requisições em andamento'
+    ),
+    'db_consultas_total': ('counter', 'Consultas SQL executadas por rota'),
+    'db_duracao_segundos_total': ('counter', 'Tempo gasto em consultas SQL por rota'),
+    'cache_leituras_total': ('counter', 'Leituras de cache por uso e resultado'),
+}
+
+_coletor_atual = contextvars.ContextVar('metricas_coletor', default=None)
+
+# Requisições deste processo (para a saturação do worker em apps/api/sondagem.py)
+_processo_lock = threading.Lock()
+_processo = {'em_andamento': 0, 'atendidas': 0, 'ocupado': 0.0}
+
+
+def ativas():
+    return getattr(settings, 'METRICAS_ATIVAS', True)
+
+
+def amostrar():
+    """Sorteia se a requisição leva o Server-Timing"""
+    taxa = getattr(settings, 'SERVER_TIMING_AMOSTRAGEM', 0)
+    return taxa >= 1 or (taxa > 0 and random.random() < taxa)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def rotulos(**valores):
+    """Rótulos no formato do Prometheus, na ordem recebida"""
+    return ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in valores.items())
+
+
+class Coletor:
+    """Valores de uma requisição, somados ao armazenamento no fim"""
+
+    def __init__(self, detalhar=False):
+        self.valores = {}
+        self.consultas = 0
+        self.tempo_consultas = 0.0
+        self.detalhar = detalhar
+        self.fases = {}
+        self.fases_no_banco = {}
+        self.marcas = {}
+
+    def somar(self, nome, rotulos_serie, valor=1):
+        campo = f'{nome}\t{rotulos_serie}'
+        self.valores[campo] = self.valores.get(campo, 0) + valor
+
+    def observar(self, nome, rotulos_serie, valor):
+        limites = LIMITES[nome]
+        posicao = bisect_left(limites, valor)
+        limite = limites[posicao] if posicao < len(limites) else '+Inf'
+        self.somar(f'{nome}_bucket', f'{rotulos_serie}\t{limite}')
+        self.somar(f'{nome}_sum', rotulos_serie, valor)
+        self.somar(f'{nome}_count', rotulos_serie)
+
+
+def iniciar(detalhar=False):
+    """Abre o coletor da requisição atual"""
+    coletor = Coletor(detalhar)
+    return coletor, _coletor_atual.set(coletor)
+
+
+def encerrar(coletor, token):
+    _coletor_atual.reset(token)
+    gravar(coletor.valores)
+
+
+def coletor_atual():
+    return _coletor_atual.get()
+
+
+@contextmanager
+def fase(nome):
+    """Soma ao Server-Timing o tempo do bloco (só nas requisições sorteadas)"""
+    coletor = _coletor_atual.get()
+    if coletor is None or not coletor.detalhar:
+        yield
+        return
+    inicio = time.perf_counter()
+    banco_antes = coletor.tempo_consultas
+    try:
+        yield
+    finally:
+        coletor.fases[nome] = coletor.fases.get(nome, 0.0) + time.perf_counter() - inicio
+        coletor.fases_no_banco[nome] = (
+            coletor.fases_no_banco.get(nome, 0.0) + coletor.tempo_consultas - banco_antes
+        )
+
+
+def entrar_requisicao():
+    with _processo_lock:
+        _processo['em_andamento'] += 1
+
+
+def sair_requisicao(duracao):
+    with _processo_lock:
+        _processo['em_andamento'] -= 1
+        _processo['atendidas'] += 1
+        _processo['ocupado'] += duracao
+
+
+def processo():
+    """Requisições em andamento, atendidas e segundos ocupados neste processo"""
+    with _processo_lock:
+        return dict(_processo)
+
+
+def registrar_cache(uso, acertos=0, faltas=0):
+    """Conta leituras de cache da requisição atual (fora de requisições, não conta)"""
+    coletor = _coletor_atual.get()
+    if coletor is None:
+        return
+    if acertos:
+        coletor.somar('cache_leituras_total', rotulos(uso=uso, resultado='acerto'), int(acertos))
+    if faltas:
+        coletor.somar('cache_leituras_total', rotulos(uso=uso, resultado='falta'), int(faltas))
+
+
+class _Memoria:
+    """Valores do processo; só serve com um worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores = {}
+
+    def somar(self, valores):
+        with self._lock:
+            for campo, valor in valores.items():
+                self._valores[campo] = self._valores.get(campo, 0) + valor
+
+    def ler(self):
+        with self._lock:
+            return dict(self._valores)
+
+
+class _Redis:
+    """Hash compartilhado por todos os workers"""
+
+    def _conexao(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    def somar(self, valores):
+        pipe = self._conexao().pipeline(transaction=False)
+        for campo, valor in valores.items():
+            if isinstance(valor, int):
+                pipe.hincrby(CHAVE_REDIS, campo, valor)
+            else:
+                pipe.hincrbyfloat(CHAVE_REDIS, campo, valor)
+        pipe.execute()
+
+    def ler(self):
+        return {
+            campo.decode(): float(valor)
+            for campo, valor in self._conexao().hgetall(CHAVE_REDIS).items()
+        }
+
+
+_armazenamento = None
+_armazenamento_lock = threading.Lock()
+
+
+def armazenamento():
+    global _armazenamento
+    if _armazenamento is None:
+        with _armazenamento_lock:
+            if _armazenamento is None:
+                tipo = getattr(settings, 'METRICAS_ARMAZENAMENTO', '') or (
+                    'redis' if 'django_redis' in settings.CACHES['default']['BACKEND'] else 'memoria'
+                )
+                _armazenamento = _Redis() if tipo == 'redis' else _Memoria()
+    return _armazenamento
+
+
+def gravar(valores):
+    """Soma os valores ao armazenamento; falha no Redis não derruba a requisição"""
+    if not valores:
+        return
+    try:
+        armazenamento().somar(valores)
+    except Exception as e:
+        logger.warning(f'Métricas não gravadas: {e}')
+
+
+def _numero(valor):
+    valor = float(valor)
+    return str(int(valor)) if valor.is_integer() else repr(valor)
+
+
+def _serie(nome, rotulos_serie, valor):
+    return f'{nome}{{{rotulos_serie}}} {_numero(valor)}' if rotulos_serie else f'{nome} {_numero(valor)}'
+
+
+def exportar():
+    """Texto no formato de exposição do Prometheus (versão 0.0.4)"""
+    linhas_por_familia = {nome: [] for nome in FAMILIAS}
+    baldes = {}
+    for campo, valor in sorted(armazenamento().ler().items()):
+        nome, rotulos_serie, *limite = campo.split('\t')
+        if limite:
+            baldes.setdefault((nome[:-len('_bucket')], rotulos_serie), {})[limite[0]] = valor
+            continue
+        familia = nome
+        for sufixo in ('_sum', '_count'):
+            if nome.endswith(sufixo) and nome[:-len(sufixo)] in LIMITES:
+                familia = nome[:-len(sufixo)]
+        linhas_por_familia.setdefault(familia, []).append(_serie(nome, rotulos_serie, valor))
+
+    # Os baldes são guardados sem acumular; o Prometheus espera o acumulado
+    for (familia, rotulos_serie), contagens in baldes.items():
+        acumulado = 0
+        for limite in (*LIMITES[familia], '+Inf'):
+            acumulado += contagens.get(str(limite), 0)
+            rotulos_balde = ','.join(filter(None, (rotulos_serie, rotulos(le=limite))))
+            linhas_por_familia[familia].append(_serie(f'{familia}_bucket', rotulos_balde, acumulado))
+
+    saida = []
+    for familia, linhas in linhas_por_familia.items():
+        if not linhas:
+            continue
+        tipo, descricao = FAMILIAS.get(familia, ('untyped', ''))
+        saida.append(f'# HELP {familia} {descricao}')
+        saida.append(f'# TYPE {familia} {tipo}')
+        saida.extend(linhas)
+    return '\n'.join(saida) + '\n'
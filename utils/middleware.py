@@ -1,18 +1,140 @@
 import logging
 import time
-from django.utils.deprecation import MiddlewareMixin
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metricas
 
 logger = logging.getLogger(__name__)
 
-class RequestLoggingMiddleware(MiddlewareMixin):
-    def process_request(self, request):
-        request.start_time = time.time()
-        
-    def process_response(self, request, response):
-        if hasattr(request, 'start_time'):
-            duration = time.time() - request.start_time
-            logger.info(
-                f"{request.method} {request.path} - "
-                f"{response.status_code} - {duration:.2f}s"
-            )
+
+class RequestLoggingMiddleware:
+    """
+    Registra cada requisição no log e nas métricas (ver utils.metricas)
+
+    Nas requisições sorteadas por SERVER_TIMING_AMOSTRAGEM, responde também
+    o cabeçalho Server-Timing com as fases:
+
+    - auth: autenticação (inclui a busca do usuário no banco)
+    - db: todas as consultas SQL, com a quantidade em desc
+    - cache: leituras de cache marcadas com metricas.fase('cache')
+    - app: view e serializers, descontados banco, cache e auth
+    - render: renderização da resposta (JSON)
+    - total: a requisição inteira, vista por este middleware
+
+    e, com SERVER_TIMING_CONSULTAS, o X-DB-Queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metricas.entrar_requisicao()
+        inicio = time.perf_counter()
+        try:
+            return self._atender(request)
+        finally:
+            metricas.sair_requisicao(time.perf_counter() - inicio)
+
+    def _atender(self, request):
+        registrar = metricas.ativas()
+        detalhar = metricas.amostrar()
+        if not (registrar or detalhar):
+            inicio = time.perf_counter()
+            response = self.get_response(request)
+            self._registrar_log(request, response, time.perf_counter() - inicio)
+            return response
+
+        coletor, token = metricas.iniciar(detalhar)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as pilha:
+                for conexao in connections.all():
+                    pilha.enter_context(conexao.execute_wrapper(self._medir_consulta(coletor)))
+                response = self.get_response(request)
+            fim = time.perf_counter()
+            duracao = fim - inicio
+            if registrar:
+                self._registrar_metricas(coletor, request, response, duracao)
+            if detalhar:
+                self._server_timing(coletor, response, duracao, fim)
+        finally:
+            metricas.encerrar(coletor, token)
+        self._registrar_log(request, response, duracao)
         return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        coletor = metricas.coletor_atual()
+        if coletor is not None and coletor.detalhar:
+            coletor.marcas['view'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Chamado logo antes do render() das respostas do DRF
+        coletor = metricas.coletor_atual()
+        if coletor is not None and coletor.detalhar:
+            coletor.marcas['render'] = time.perf_counter()
+
+            def marcar_fim(_):
+                coletor.marcas['fim_render'] = time.perf_counter()
+            response.add_post_render_callback(marcar_fim)
+        return response
+
+    @staticmethod
+    def _medir_consulta(coletor):
+        def medir(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                coletor.consultas += 1
+                coletor.tempo_consultas += time.perf_counter() - inicio
+        return medir
+
+    @staticmethod
+    def _registrar_metricas(coletor, request, response, duracao):
+        match = request.resolver_match
+        rota = match.view_name if match else 'nao_resolvida'
+        coletor.somar('http_requisicoes_total', metricas.rotulos(
+            rota=rota, metodo=request.method, status=response.status_code
+        ))
+        coletor.observar('http_duracao_segundos', metricas.rotulos(rota=rota, metodo=request.method), duracao)
+        coletor.somar('http_ocupado_segundos_total', '', duracao)
+        if not response.streaming:
+            coletor.observar('http_resposta_bytes', metricas.rotulos(rota=rota), len(response.content))
+        if coletor.consultas:
+            coletor.somar('db_consultas_total', metricas.rotulos(rota=rota), coletor.consultas)
+            coletor.somar('db_duracao_segundos_total', metricas.rotulos(rota=rota), coletor.tempo_consultas)
+
+    @staticmethod
+    def _server_timing(coletor, response, duracao, fim):
+        fases, marcas = coletor.fases, coletor.marcas
+        auth = fases.get('auth', 0.0)
+        cache = fases.get('cache', 0.0)
+        entradas = [('auth', auth, None)] if 'auth' in fases else []
+        entradas.append(('db', coletor.tempo_consultas, f'{coletor.consultas} consultas'))
+        if 'cache' in fases:
+            entradas.append(('cache', cache, None))
+        if 'view' in marcas:
+            fim_view = marcas.get('render', fim)
+            banco_fora_do_auth = coletor.tempo_consultas - coletor.fases_no_banco.get('auth', 0.0)
+            app = fim_view - marcas['view'] - auth - cache - banco_fora_do_auth
+            entradas.append(('app', max(app, 0.0), 'view e serializers'))
+        if 'fim_render' in marcas:
+            entradas.append(('render', marcas['fim_render'] - marcas['render'], None))
+        entradas.append(('total', duracao, None))
+
+        response['Server-Timing'] = ', '.join(
+            f'{nome};dur={segundos * 1000:.1f}' + (f';desc="{descricao}"' if descricao else '')
+            for nome, segundos, descricao in entradas
+        )
+        if getattr(settings, 'SERVER_TIMING_CONSULTAS', True):
+            response['X-DB-Queries'] = str(coletor.consultas)
+
+    @staticmethod
+    def _registrar_log(request, response, duracao):
+        logger.info(
+            f"{request.method} {request.path} - "
+            f"{response.status_code} - {duracao:.2f}s"
+        )
@@ -1,34 +1,151 @@
-from django.core.exceptions import ValidationError
+"""
+Validação de CPF e CEP, de um valor ou de colunas inteiras
+
+As funções `classificar_cpfs` e `classificar_ceps` recebem uma sequência de
+valores e devolvem a situação de cada um. Com numpy instalado, os valores
+viram uma matriz N x 11 de dígitos e os dígitos verificadores de todas as
+linhas saem de dois produtos matriciais pelos pesos, sem laço em Python;
+sem numpy (ou em listas pequenas) a mesma regra roda valor a valor.
+"""
+from itertools import compress
 import re
 
+from django.core.exceptions import ValidationError
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+VALIDO = 'valido'
+TAMANHO_INVALIDO = 'tamanho_invalido'
+NAO_NUMERICO = 'nao_numerico'
+DIGITOS_REPETIDOS = 'digitos_repetidos'
+DIGITO_VERIFICADOR = 'digito_verificador'
+
+# A posição na tupla é o código usado na classificação vetorizada; as três
+# primeiras situações são comuns a CPF e CEP
+SITUACOES_CPF = (VALIDO, TAMANHO_INVALIDO, NAO_NUMERICO, DIGITOS_REPETIDOS, DIGITO_VERIFICADOR)
+SITUACOES_CEP = (VALIDO, TAMANHO_INVALIDO, NAO_NUMERICO)
+
+MENSAGENS_CPF = {
+    TAMANHO_INVALIDO: 'CPF deve ter 11 dígitos',
+    NAO_NUMERICO: 'CPF deve conter apenas números',
+    DIGITOS_REPETIDOS: 'CPF inválido',
+    DIGITO_VERIFICADOR: 'CPF inválido',
+}
+MENSAGEM_CEP = 'CEP deve ter 8 dígitos numéricos'
+
+# Abaixo disso, montar as matrizes custa mais que validar valor a valor
+MIN_VETORIZADO = 64
+
+_PONTUACAO = str.maketrans('', '', '.-/ ')
+
+
+def limpar_documento(valor):
+    """Texto do valor sem a pontuação de formatação (123.456.789-09 -> 12345678909)"""
+    return '' if valor is None else str(valor).strip().translate(_PONTUACAO)
+
+
+def _numerico(valor):
+    return valor.isascii() and valor.isdigit()
+
+
+def _digito(digitos, pesos):
+    resto = sum(int(digito) * peso for digito, peso in zip(digitos, pesos)) % 11
+    return 0 if resto < 2 else 11 - resto
+
+
+def situacao_cpf(cpf):
+    if not cpf or len(cpf) != 11:
+        return TAMANHO_INVALIDO
+    if not _numerico(cpf):
+        return NAO_NUMERICO
+    if cpf == cpf[0] * 11:
+        return DIGITOS_REPETIDOS
+    primeiro = _digito(cpf[:9], range(10, 1, -1))
+    segundo = _digito(cpf[:10], range(11, 1, -1))
+    if cpf[-2:] != f'{primeiro}{segundo}':
+        return DIGITO_VERIFICADOR
+    return VALIDO
+
+
+def situacao_cep(cep):
+    if not cep or len(cep) != 8:
+        return TAMANHO_INVALIDO
+    if not _numerico(cep):
+        return NAO_NUMERICO
+    return VALIDO
+
+
+def _textos(valores):
+    return ['' if valor is None else str(valor) for valor in valores]
+
+
+def _matriz(valores, tamanho):
+    """
+    Códigos (tamanho inválido / não numérico / válido) e a matriz de
+    dígitos dos valores com o tamanho certo, na ordem em que aparecem
+    """
+    total = len(valores)
+    tamanhos = np.fromiter(map(len, valores), dtype=np.int64, count=total)
+    certos = tamanhos == tamanho
+    codigos = np.full(total, SITUACOES_CPF.index(TAMANHO_INVALIDO), dtype=np.uint8)
+    selecionados = valores if certos.all() else list(compress(valores, certos))
+    # Um byte por caractere: o que não cabe em latin-1 vira '?' e não é dígito
+    texto = ''.join(selecionados).encode('latin-1', 'replace')
+    digitos = np.frombuffer(texto, dtype=np.uint8).reshape(-1, tamanho).astype(np.int16) - ord('0')
+    numericos = ((digitos >= 0) & (digitos <= 9)).all(axis=1)
+    parcial = np.where(numericos, SITUACOES_CPF.index(VALIDO), SITUACOES_CPF.index(NAO_NUMERICO))
+    codigos[certos] = parcial
+    return codigos, certos, digitos, numericos
+
+
+def _codigos_cpf(valores):
+    codigos, certos, digitos, numericos = _matriz(valores, 11)
+    parcial = codigos[certos]
+    digitos = digitos[numericos]
+    repetidos = (digitos == digitos[:, :1]).all(axis=1)
+    resto = (digitos[:, :9] @ np.arange(10, 1, -1, dtype=np.int16)) % 11
+    primeiro = np.where(resto < 2, 0, 11 - resto)
+    resto = (digitos[:, :10] @ np.arange(11, 1, -1, dtype=np.int16)) % 11
+    segundo = np.where(resto < 2, 0, 11 - resto)
+    corretos = (primeiro == digitos[:, 9]) & (segundo == digitos[:, 10])
+    parcial[numericos] = np.select(
+        [repetidos, ~corretos],
+        [SITUACOES_CPF.index(DIGITOS_REPETIDOS), SITUACOES_CPF.index(DIGITO_VERIFICADOR)],
+        SITUACOES_CPF.index(VALIDO),
+    )
+    codigos[certos] = parcial
+    return codigos
+
+
+def classificar_cpfs(valores):
+    """Situação de cada CPF (uma das SITUACOES_CPF), na ordem recebida"""
+    valores = _textos(valores)
+    if np is None or len(valores) < MIN_VETORIZADO:
+        return [situacao_cpf(valor) for valor in valores]
+    return np.array(SITUACOES_CPF, dtype=object)[_codigos_cpf(valores)].tolist()
+
+
+def classificar_ceps(valores):
+    """Situação de cada CEP (uma das SITUACOES_CEP), na ordem recebida"""
+    valores = _textos(valores)
+    if np is None or len(valores) < MIN_VETORIZADO:
+        return [situacao_cep(valor) for valor in valores]
+    codigos = _matriz(valores, 8)[0]
+    return np.array(SITUACOES_CEP, dtype=object)[codigos].tolist()
+
+
 def validate_cpf(cpf):
     """Valida CPF brasileiro"""
-    if not cpf or len(cpf) != 11:
-        raise ValidationError('CPF deve ter 11 dígitos')
-    
-    if not cpf.isdigit():
-        raise ValidationError('CPF deve conter apenas números')
-    
-    # Validação do algoritmo do CPF
-    if cpf == cpf[0] * 11:  # CPFs com todos os dígitos iguais
-        raise ValidationError('CPF inválido')
-    
-    # Cálculo dos dígitos verificadores
-    def calculate_digit(cpf_part, weights):
-        total = sum(int(digit) * weight for digit, weight in zip(cpf_part, weights))
-        remainder = total % 11
-        return 0 if remainder < 2 else 11 - remainder
-    
-    first_digit = calculate_digit(cpf[:9], range(10, 1, -1))
-    second_digit = calculate_digit(cpf[:10], range(11, 1, -1))
-    
-    if cpf[-2:] != f"{first_digit}{second_digit}":
-        raise ValidationError('CPF inválido')
-    
+    situacao = situacao_cpf(cpf)
+    if situacao != VALIDO:
+        raise ValidationError(MENSAGENS_CPF[situacao])
     return cpf
 
 def validate_cep(cep):
     """Valida CEP brasileiro"""
     if not re.match(r'^\d{8}$', cep):
-        raise ValidationError('CEP deve ter 8 dígitos numéricos')
+        raise ValidationError(MENSAGEM_CEP)
     return cep